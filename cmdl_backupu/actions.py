@@ -54,24 +54,36 @@
 import logging
 import sys
 import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from shutil import copy2
 
+from cmdl_backupu.copy_backends import zeroCopy, deltaCopy, SIGNATURES_DIR
+from cmdl_backupu.dest_tree import dirsTree, DEST_TREE_THREADS
+from cmdl_backupu.manifest import hashCopy, copyManifest, zip_write_hashed, hash_file, verify_manifest, \
+    MANIFEST_ALGORITHMS, MANIFEST_EXT
 from cmdl_backupu.new_folder import *
+from cmdl_backupu.quick_check import quickCheck
+from cmdl_backupu.run_journal import runJournal, resumableCopy, find_resumable, COPY_RESUMED, COPY_CHECKPOINTED
 from cmdl_backupu.scan import *
+from cmdl_backupu.watch import changeJournal
 
 
 def set_archive_sttrib(file_path, AAtrib_ON=False):
     """
-    Switch UO or DOWN archive file attribute - work on MS Windows OS
+    Switch UO or DOWN archive file attribute - work on MS Windows OS (at once, by archive_provider())
     :param file_path:
     :param AAtrib_ON: True - Switch attribute ON, False- OFF
-    :return: windows system command attr return
     """
+    archive_provider().set_archive(file_path, AAtrib_ON)
 
-    if AAtrib_ON:
-        return subprocess.check_output(['attrib', '+a', file_path])
-    else:
-        return subprocess.check_output(['attrib', '-a', file_path])
+
+# progress mark ('*' or '+') step in files for streaming work - when number of files is unknown
+STREAM_PROGRESS_STEP = 100
+
+# files given to copy threads pool ahead of finished ones - by thread
+COPY_QUEUE_PER_THREAD = 4
 
 
 def file_size2mb(size_in_bytes: int) -> int:
@@ -79,12 +91,34 @@ def file_size2mb(size_in_bytes: int) -> int:
 
 
 class abcActionU(ABC):
+    # True - stat files of source dirs taken from scan index again (files changed in place keep dir modification time)
+    _index_verify_files = False
+    # file info, needed for all scanned files (not only filtered) - only paths: size of all source files is not read
+    _scan_need_fields = ('path',)
+
+    # more then 1 - copy files in so many threads at once (see _do_copy)
+    _copy_threads = 0
+
+    # quickCheck - don't copy files unchanged in destination (see _changed_pairs), None - copy all files
+    _quick_check = None
+
+    # runJournal - copied files of work for resume (destination dir only), None - no journal
+    _run_journal = None
+
+    # checksum algorithm of manifest of copied files (see _manifest_add), '' - no manifest
+    _checksum = ''
+    _manifest = None
+    _verify = False
 
     def __init__(self, source_base_dir: str, destination_base_dir: str,
                  destination_subdir: str = '', prefix: str = '', delimiter: str = '_',
                  log_level=logging.DEBUG, scan_filters: list = list(),
                  new_folder_rule: abcNewFolderExistsRule = errorRule(),
-                 archive_format: str = '', log_file_name='', set_up_logger_on_init=True) -> None:
+                 archive_format: str = '', log_file_name='', set_up_logger_on_init=True,
+                 scan_threads: int = 0, scan_index: str = '', ignore_file: str = '',
+                 filter_stats: str = None, copy_threads: int = 0, zero_copy: bool = False,
+                 skip_unchanged: bool = False, modify_window: float = 0., delta_copy: bool = False,
+                 resume: bool = False, checksum: str = '', verify: bool = False) -> None:
         """
         :param source_base_dir: str or pathlike - root of source directory subtree
         :param destination_base_dir: str of pathlike - root of destination subtree
@@ -95,6 +129,32 @@ class abcActionU(ABC):
         :param scan_filters: list - list of abcFilter-objects - for filter source files
         :param new_folder_rule: abcNewFolderExistsRule's object, for resolve existing destination dir conflict
         :param archive_format: str - empty string = no archive operation, any valid archive file extension - archive destination files
+        :param scan_threads: int - more then 1 - scan source dirs in so many threads at once (for network sources)
+        :param scan_index: str or pathlike - file of persistent scan index: unchanged source dirs are not listed again;
+                           empty string - no index
+        :param ignore_file: str - name of gitignore-style ignore files in source tree (ignore.IGNORE_FILE_NAME):
+                            files and dirs matched by them are not scanned; empty string - no ignore files
+        :param filter_stats: str or pathlike - count evaluations, passes, rejects and time of every scan filter and
+                             log them after scan; not empty - save them to this json file too; None - no counting
+        :param copy_threads: int - more then 1 - copy files in so many threads at once (for network destinations)
+        :param zero_copy: bool - True - copy files data in kernel (copy_backends.zeroCopy: reflink, copy_file_range,
+                          sendfile), False - by shutil.copy2
+        :param skip_unchanged: bool - True - don't copy files, which are in destination dir already with the same size
+                               and change time (quick_check.quickCheck); not for archive
+        :param modify_window: float - max difference of change times in seconds for the same file (skip_unchanged)
+        :param delta_copy: bool - True - write only changed blocks of big files, which are in destination already
+                           (copy_backends.deltaCopy, block signatures are kept outside of destination dir - in
+                           <destination base>/SIGNATURES_DIR/<destination dir name>/<file>.bsig)
+        :param resume: bool - True - keep run journal of work (run_journal) and continue not finished work with
+                       journal (run_journal.find_resumable) from the same source with the same prefix into its
+                       destination dir: files copied by it and not changed since are skipped, big files are copied
+                       from checkpoint; if there is no such work - new destination dir is made as usual. Not for
+                       archive
+        :param checksum: str - checksum algorithm (manifest.MANIFEST_ALGORITHMS) - compute checksums of files while
+                         copying (by buffer in user space, without zero copy) and write manifest next to work log;
+                         '' - no manifest
+        :param verify: bool - True - after work rehash destination files and compare with manifest (with default
+                       checksum algorithm if checksum is not given)
         """
         assert Path(source_base_dir).exists(), 'source dir must exists'
         assert Path(destination_base_dir).exists(), 'destination base dir must exists'
@@ -102,7 +162,17 @@ class abcActionU(ABC):
         self._source = source_base_dir
         self._dest_base = destination_base_dir
 
-        self._scan = xScan(start_path=self.source_folder)
+        # quick check compares source stat data with destination - files of unchanged dirs must be stat'ed again
+        index = scanIndex(scan_index, verify_files=self._index_verify_files or skip_unchanged) if scan_index else None
+        ignore = backupIgnore(source_base_dir, file_name=ignore_file) if ignore_file else None
+        self._filter_stats = filter_stats
+        if scan_threads > 1:
+            self._scan = xScan(start_path=self.source_folder, engine=scan_engine.PARALLEL, threads=scan_threads,
+                               index=index, need_fields=self._scan_need_fields, ignore=ignore,
+                               filter_stats=filter_stats is not None)
+        else:
+            self._scan = xScan(start_path=self.source_folder, index=index, need_fields=self._scan_need_fields,
+                               ignore=ignore, filter_stats=filter_stats is not None)
         self._scan.set_filters(*scan_filters)
 
         self._new_fold = newFolder(strBaseFolder=self.destination_base,
@@ -112,12 +182,46 @@ class abcActionU(ABC):
         self._archive_format = archive_format
 
         self._dest_folder = self._new_fold.folder
+        self._resumed = False
+        if not archive_format:
+            if resume:
+                # not by sub-name - it can be dated (next day backup continues work of the day before)
+                name_prefix = prefix + delimiter if prefix else ''
+                folder = find_resumable(self.destination_base, self.source_folder, name_prefix)
+                if folder is not None:
+                    self._dest_folder = Path(folder)
+                self._run_journal = runJournal(self._dest_folder, self.source_folder)
+                self._resumed = self._run_journal.load()
+            # destination may be inside source - never scan (and copy) it and signatures of delta copy
+            self._scan.skip_dir(self._dest_folder)
+            self._scan.skip_dir(Path(self.destination_base).joinpath(SIGNATURES_DIR))
 
         self._log_level = log_level
         if set_up_logger_on_init:
             self._setup_logger(log_file_name=log_file_name)
         self._post_work_action = lambda x: x
-        self._copy_action = copy2
+        # called when all files are done - for batched post work actions
+        self._post_work_flush = lambda: None
+        self._checksum = checksum or (MANIFEST_ALGORITHMS[0] if verify else '')
+        self._verify = verify
+        if self._checksum and not archive_format:
+            self._hash_copy = hashCopy(self._checksum)
+            self._copy_action = self._hash_copy
+        else:
+            self._copy_action = zeroCopy() if zero_copy else copy2
+        if delta_copy:
+            self._copy_action = deltaCopy(full_copy=self._copy_action, signatures_dir=self._signatures_dir(),
+                                          dest_root=self._dest_folder)
+        if self._run_journal is not None:
+            self._copy_action = resumableCopy(self._run_journal, full_copy=self._copy_action)
+        self._copy_threads = copy_threads
+        # number of files skipped as copied by resumed work
+        self._resume_skipped = 0
+        self._quick_check = quickCheck(modify_window) if skip_unchanged and not archive_format else None
+        # number of files not copied (zipped) by last work
+        self._cnt_error = 0
+        # number of files failed verify by manifest
+        self._cnt_verify_error = 0
         super().__init__()
 
     @property
@@ -191,28 +295,137 @@ class abcActionU(ABC):
 
         return self._log
 
-    def _create_dest_tree_folder(self, files: list, do_create_tree: bool = True):
+    def _create_dest_tree_folder(self, files: list, do_create_tree: bool = True) -> set:
         """
-        Create destination directory subtree
+        Create destination directory subtree: top-down, dirs of one level in threads (dest_tree.dirsTree)
 
         :param files: list of destinations files. Its made from source filtered files list by replace base source directiory name to destination directory base name
         :param do_create_tree: True - do create directory subtree on the disk; False - do nothing
-        :return: None
+        :return: set of destination dirs not created - files in them are not copied (counted in _cnt_tree_skipped)
 
-        On some OS error terminate programm
+        On OS error dir subtree is not created, error is logged once for subtree
         """
-        dest_fld = {Path(p).parent for p in files}
-
         if not do_create_tree:
+            return set()
+
+        dest_fld = {os.path.dirname(p) for p in files}
+        tree = dirsTree(self._dest_folder)
+        for top, err in tree.make_all(dest_fld, threads=self._copy_threads or DEST_TREE_THREADS).items():
+            self._log_tree_error(top, err)
+        not_created = {d for d in dest_fld if tree.failed_top(d) is not None}
+        self._cnt_tree_skipped = sum(1 for p in files if os.path.dirname(p) in not_created)
+        self._log.debug('create destination folders tree done')
+        return not_created
+
+    def _log_tree_error(self, top: str, err: OSError):
+        self._log.error('Create folders tree OSError : {0} - {1} - files of its subtree are not copied'.format(
+            top, err.strerror or err))
+
+    def _dest_path(self, src_path: str, rel_path: str = None) -> str:
+        """
+        make destination file path from source file path: replace base source dir to destination dir
+        (or to empty string - for path inside archive)
+        :param src_path: str - source file full path
+        :param rel_path: str or None - source file path relative to base source dir, if scan made it already
+                         (fileRecord.rel_to) - then source path is not searched for base source dir
+        :return: str - destination file path
+        """
+        if self._archive_format:
+            strSubDst = ''  # ''{0}'.format(self._new_fold._base_name)
+        else:
+            strSubDst = str(self._dest_folder)
+        if rel_path is not None:
+            return strSubDst + os.sep + rel_path
+        return str(src_path).replace(str(self.source_folder), strSubDst)
+
+    def _src_dst(self, f) -> tuple:
+        """
+        :param f: dict or fileRecord - scanned source file info
+        :return: tuple (src_path, dst_path)
+        """
+        rel = None if isinstance(f, dict) else f.rel_to(self.source_folder)
+        return f['path'], self._dest_path(f['path'], rel)
+
+    def _changed_pairs(self, files):
+        """
+        :param files: iterable of dict or fileRecord - scanned source files
+        :return: generator of tuples (src_path, dst_path) - with quick check (skip_unchanged) only for files new or
+                 changed in destination
+        """
+        for f in files:
+            pair = self._src_dst(f)
+            if self._resumed and self._copied_before(pair):
+                # post work action of resumed work may be not done (batched actions are flushed at the end)
+                self._resume_skipped += 1
+                self._post_work_action(pair[0])
+                continue
+            if self._quick_check is None or not self._quick_check.unchanged(f, pair[1]):
+                yield pair
+
+    def _copied_before(self, pair: tuple) -> bool:
+        """
+        :param pair: tuple (src_path, dst_path)
+        :return: bool - True if file is copied by resumed work and source is not changed since (size and change time)
+        """
+        done = self._run_journal.done.get(pair[1])
+        if done is None:
+            return False
+        try:
+            st = os.stat(pair[0])
+        except OSError:
+            return False
+        return done == (st.st_size, st.st_mtime_ns)
+
+    def _log_quick_check(self):
+        if self._resumed:
+            self._log.info('resumed work : {0} files copied before are skipped, {1} files have checkpoints'.format(
+                self._resume_skipped, len(self._run_journal.partial)))
+        if self._quick_check is None:
             return
+        qc = self._quick_check
+        self._log.info('quick check : {copied} new or changed files, {skipped} unchanged files skipped '
+                       '({size} Mb not copied)'.format(copied=qc.checked - qc.skipped, skipped=qc.skipped,
+                                                       size=file_size2mb(qc.skipped_size)))
+
+    def _log_scan_summary(self, all_cnt: int, all_size: int, flt_cnt: int, flt_size: int):
+        if self._scan.index is not None:
+            self._log.info('scan index {0} : dirs taken from index {1}, dirs listed {2}'.format(
+                self._scan.index.index_file, self._scan.index.last_hits, self._scan.index.last_misses))
+        if self._scan.pruned_dirs:
+            self._log.info('dirs excluded by filters (not scanned) : {}'.format(len(self._scan.pruned_dirs)))
+            for d in self._scan.pruned_dirs:
+                self._log.debug('    not scanned : {}'.format(d))
+        if self._scan.ignore is not None:
+            self._log.info('ignore files {0} found : {1}'.format(self._scan.ignore.file_name,
+                                                                  len(self._scan.ignore.files)))
+            for f in self._scan.ignore.files:
+                self._log.debug('    ignore file : {}'.format(f))
+        self._log.info('files in source {all_files} : after filters select {f_files} files'.format(
+            all_files=all_cnt, f_files=flt_cnt))
 
-        for dir in dest_fld:
+        if all_size is None:
+            self._log.info('filtered size {f_files} (Mb)'.format(f_files=file_size2mb(flt_size)))
+        else:
+            self._log.info('size in source {all_files} (Mb) : filtered size {f_files} (Mb)'.format(
+                all_files=file_size2mb(all_size), f_files=file_size2mb(flt_size)))
+        self._log_filter_stats()
+
+    def _log_filter_stats(self):
+        """
+        log counters of scan filters (filters_stats) after filtering and save them to json file filter_stats
+        """
+        if self._filter_stats is None or not self._scan.filters:
+            return
+        self._log.info('SCAN FILTERS STATS : evaluations, passes, rejects (% of all rejects), time (sec)')
+        for st in filters_stats(self._scan.filters):
+            self._log.info('{evaluations:>10} {passes:>10} {rejects:>10} ({share:5.1f}%) {time:9.4f} : {filter}'.format(
+                share=100 * st['reject_share'], **st))
+        if self._filter_stats:
             try:
-                os.makedirs(str(dir), exist_ok=True)
-            except OSError:
-                self._log.error('Create folders tree OSError : {}'.format(dir))
-                os._exit(-1)
-        self._log.debug('create destination folders tree done')
+                save_filters_stats(self._scan.filters, self._filter_stats)
+                self._log.debug('filters stats saved : {}'.format(self._filter_stats))
+            except OSError as e:
+                self._log.error('filters stats not saved {0} : {1}'.format(self._filter_stats, e))
 
     def _do_scan(self) -> list:
         """
@@ -227,49 +440,123 @@ class abcActionU(ABC):
         self._log.info('scan source done')
 
         _files = self._scan.files(filtered=True)
-        _cnt_files = len(_files)
 
-        self._log.info('files in source {all_files} : after filters select {f_files} files'.format(
-            all_files=self._scan.size(filtered=False), f_files=_cnt_files))
+        self._log_scan_summary(all_cnt=self._scan.size(filtered=False),
+                               all_size=None if self._scan.lazy_stat else sum(
+                                   [f['size'] for f in self._scan.files(filtered=False)]),
+                               flt_cnt=len(_files), flt_size=sum([f['size'] for f in _files]))
 
-        all_weight = file_size2mb(sum([f['size'] for f in self._scan.files(filtered=False)]))
-        flt_weight = file_size2mb(sum([f['size'] for f in _files]))
+        if self._quick_check is not None:
+            self._quick_check.reset()
+        lp = list(self._changed_pairs(_files))
+        return lp
 
-        self._log.info('size in source {all_files} (Mb) : filtered size {f_files} (Mb)'.format(
-            all_files=all_weight, f_files=flt_weight))
+    def _iter_scan(self):
+        """
+        streaming version of _do_scan: yield file pairs (src - dst) while source directory subtree is walking,
+        files are filtered one by one, no files list is made; scan summary is logged when walk is finished
+        :return: generator of tuples - (src_path, dst_path)
+        """
+        flt_cnt, flt_size = 0, 0
+        if self._quick_check is not None:
+            self._quick_check.reset()
+        for f in self._scan.iter_files(filtered=True):
+            flt_cnt += 1
+            flt_size += f['size']
+            yield from self._changed_pairs((f,))
 
-        _src_files = [f['path'] for f in _files]
+        self._log.info('scan source done')
+        all_cnt, all_size = self._scan.stream_stats
+        self._log_scan_summary(all_cnt=all_cnt, all_size=all_size, flt_cnt=flt_cnt, flt_size=flt_size)
 
-        if self._archive_format:
-            strSubDst = ''  # ''{0}'.format(self._new_fold._base_name)
-            _dest_files = list(
-                map(lambda x: str(x['path']).replace(str(self.source_folder), strSubDst), _files))
+    def _iter_dest_tree_folder(self, src_dst, do_create_tree: bool = True):
+        """
+        streaming version of _create_dest_tree_folder: create destination dir for every pair (src - dst)
+        before pass it next (if dir not created yet)
 
+        :param src_dst: iterable of tuples (src_path, dst_path)
+        :param do_create_tree: True - do create directory subtree on the disk; False - do nothing
+        :return: generator of the same tuples, without files of not created dirs (counted in _cnt_tree_skipped)
+
+        On OS error dir subtree is not created, error is logged once for subtree
+        """
+        tree = dirsTree(self._dest_folder)
+        created, reported = set(), set()
+        for nf in src_dst:
+            if do_create_tree:
+                dir = os.path.dirname(nf[1])
+                if dir not in created:
+                    top = tree.make(dir)
+                    if top is not None:
+                        if top not in reported:
+                            reported.add(top)
+                            self._log_tree_error(top, tree.failed[top])
+                        self._cnt_tree_skipped += 1
+                        continue
+                    created.add(dir)
+            yield nf
+
+    def _copy_file(self, src: str, dst: str, do_copy=True):
+        """
+        copy one file by _copy_action (or only open source file, if not do_copy); errors are raised
+        :return: result of _copy_action - copy method for zeroCopy
+        """
+        if do_copy:
+            # copy2(nf[0], nf[1])
+            return self._copy_action(src, dst)
         else:
-            _dest_files = list(
-                map(lambda x: str(x['path']).replace(str(self.source_folder), str(self._dest_folder)), _files))
-            # _dest_files = list(
-            #     map(lambda x: str(x['path']).replace(str(self._scan.base_path), str(self._dest_folder)), _files))
+            with open(src, 'rb') as flt:
+                # TODO: may be insert here self._post_work_action(nf[0])
+                pass
 
-        lp = list(zip(_src_files, _dest_files))
-        return lp
+    def _copy_pool(self, src_dst, do_copy=True):
+        """
+        copy files in threads pool (_copy_threads threads); only COPY_QUEUE_PER_THREAD files by thread are taken from
+        src_dst ahead of finished ones - pairs from generator (stream work) are not collected in memory
+        :param src_dst: iterable of tuples (src_path, dst_path)
+        :return: generator of tuples ((src_path, dst_path), future of copy) - in src_dst order
+        """
+        with ThreadPoolExecutor(max_workers=self._copy_threads) as pool:
+            pending = deque()
+            for nf in src_dst:
+                pending.append((nf, pool.submit(self._copy_file, nf[0], nf[1], do_copy)))
+                if len(pending) >= self._copy_threads * COPY_QUEUE_PER_THREAD:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
 
     def _do_copy(self, src_dst, do_copy=True):
-        cnt_files = len(src_dst)
-        step = int(cnt_files / 100) or 1
+        """
+        copy files one by one or in threads pool (if _copy_threads more then 1); errors, post work action and progress
+        are done in calling thread in src_dst order - post work action only for successfully copied file
+        :param src_dst: iterable of tuples (src_path, dst_path)
+        :param do_copy: bool - False - only open source files, don't copy
+        """
+        cnt_files = len(src_dst) if hasattr(src_dst, '__len__') else None
+        step = (int(cnt_files / 100) or 1) if cnt_files is not None else STREAM_PROGRESS_STEP
         _logDEBMess = '{f_num} from {f_cnt}: {src} --> {dst}'
         cnt_error = 0
+        counted = isinstance(self._copy_action, (zeroCopy, deltaCopy, resumableCopy))
+        if counted:
+            self._copy_action.reset_counts()
+            _logDEBMess += ' ({method})'
+
+        if self._copy_threads > 1:
+            work = self._copy_pool(src_dst, do_copy=do_copy)
+        else:
+            work = ((nf, None) for nf in src_dst)
 
-        for i, nf in enumerate(src_dst):
+        for i, (nf, copied) in enumerate(work):
+            method = None
             try:
+                if copied is None:
+                    method = self._copy_file(nf[0], nf[1], do_copy=do_copy)
+                else:
+                    method = copied.result()
                 if do_copy:
-                    # copy2(nf[0], nf[1])
-                    self._copy_action(nf[0], nf[1])
                     self._post_work_action(nf[0])
-                else:
-                    with open(nf[0], 'rb') as flt:
-                        # TODO: may be insert here self._post_work_action(nf[0])
-                        pass
+                    if self._manifest is not None:
+                        self._manifest_add(nf[1])
             except FileNotFoundError:
                 cnt_error += 1
                 self._log.error('FILE NOT FOUND - {file}'.format(file=nf[0]))
@@ -285,7 +572,8 @@ class abcActionU(ABC):
 
             if self._log_level == logging.DEBUG:
                 try:
-                    self._log.debug(_logDEBMess.format(f_num=i, f_cnt=cnt_files, src=nf[0], dst=nf[1]))
+                    self._log.debug(_logDEBMess.format(f_num=i, f_cnt=cnt_files or '?', src=nf[0], dst=nf[1],
+                                                       method=method or 'not copied'))
                 except UnicodeEncodeError:
                     self._log.error('something wrong with file name on print log')
                     try:
@@ -298,21 +586,89 @@ class abcActionU(ABC):
             elif (i % step) == 0:
                 print('*', end='', flush=True)
         print('')
+        if counted and do_copy:
+            self._log_copy_methods()
+        self._cnt_error = cnt_error
+        self._post_work_flush()
+
+    def _log_copy_methods(self):
+        backend = self._copy_action
+        if isinstance(backend, resumableCopy):
+            if backend.counts.get(COPY_RESUMED):
+                self._log.info('big files copied from checkpoint : {}'.format(backend.counts[COPY_RESUMED]))
+            if backend.counts.get(COPY_CHECKPOINTED):
+                self._log.info('big files copied with checkpoints : {}'.format(backend.counts[COPY_CHECKPOINTED]))
+            backend = backend.full_copy
+        if isinstance(backend, (zeroCopy, deltaCopy)):
+            self._log.info('copy methods : {}'.format(
+                ', '.join('{0} {1}'.format(m, c) for m, c in backend.counts.items()) or 'no files copied'))
+        if isinstance(backend, deltaCopy):
+            self._log.info('delta copy : {0} Mb written, {1} Mb of unchanged blocks not written'.format(
+                file_size2mb(backend.written), file_size2mb(backend.saved)))
+
+    def _signatures_dir(self) -> Path:
+        """
+        :return: path - sidecar dir of block signatures of delta copy for destination dir (in destination base dir)
+        """
+        return Path(self.destination_base).joinpath(SIGNATURES_DIR, Path(self._dest_folder).name)
+
+    def _manifest_path(self) -> Path:
+        """
+        :return: path - manifest file next to work log: in destination dir or (archive) in destination base dir
+        """
+        if self._archive_format:
+            return Path(self.destination_base).joinpath(
+                '{0}({1}){2}'.format(self._work_name, self._dest_folder.stem, MANIFEST_EXT))
+        return Path(self._dest_folder).joinpath('{0}{1}'.format(self._work_name, MANIFEST_EXT))
+
+    def _manifest_add(self, dst: str):
+        """
+        write copied file to manifest with checksum computed while copying; file written not by full copy (delta
+        copy, copy with checkpoints) is hashed in destination
+        :param dst: str - destination file path
+        """
+        digest = self._hash_copy.pop_digest(dst)
+        if digest is None:
+            digest = hash_file(dst, self._checksum)
+        st = os.stat(dst)
+        self._manifest.add(os.path.relpath(dst, str(self._dest_folder)), st.st_size, st.st_mtime_ns, digest)
+
+    def _do_verify(self):
+        """
+        rehash destination files (in threads) and compare them with manifest of work
+        """
+        manifest_file = self._manifest_path()
+        if not manifest_file.exists():
+            self._log.warning('nothing to verify - no manifest {}'.format(manifest_file))
+            return
+        self._log.info('VERIFY by {}'.format(manifest_file))
+        checked, errors = verify_manifest(manifest_file, self._dest_folder, threads=self._copy_threads)
+        for path, reason in errors:
+            self._log.error('VERIFY {0} - {1}'.format(reason.upper(), path))
+        self._log.info('verify : {0} files checked, {1} errors'.format(checked, len(errors)))
+        self._cnt_verify_error = len(errors)
+        # work with not verified files is not done without errors (INC backup doesn't save journal position)
+        self._cnt_error += len(errors)
 
     def _do_zip(self, src_dst):
-        cnt_files = len(src_dst)
+        cnt_files = len(src_dst) if hasattr(src_dst, '__len__') else None
         if cnt_files == 0:
             self._log.info('nothing to zip')
             return
 
-        step = int(cnt_files / 100) or 1
+        step = (int(cnt_files / 100) or 1) if cnt_files is not None else STREAM_PROGRESS_STEP
         _logDEBMess = '{f_num} from {f_cnt}: {src} --> {dst}'
         cnt_error = 0
         # TODO: russian simbols in archive in windows
         with zipfile.ZipFile(str(self._dest_folder), 'w') as myzip:
             for i, nf in enumerate(src_dst):
                 try:
-                    myzip.write(nf[0], arcname=nf[1])
+                    if self._manifest is not None:
+                        st = os.stat(nf[0])
+                        name, digest = zip_write_hashed(myzip, nf[0], nf[1], self._checksum)
+                        self._manifest.add(name, st.st_size, st.st_mtime_ns, digest)
+                    else:
+                        myzip.write(nf[0], arcname=nf[1])
                     self._post_work_action(nf[0])
 
                 except FileNotFoundError:
@@ -325,7 +681,7 @@ class abcActionU(ABC):
 
                 if self._log_level == logging.DEBUG:
                     try:
-                        self._log.debug(_logDEBMess.format(f_num=i, f_cnt=cnt_files, src=nf[0], dst=nf[1]))
+                        self._log.debug(_logDEBMess.format(f_num=i, f_cnt=cnt_files or '?', src=nf[0], dst=nf[1]))
                     except UnicodeEncodeError:
                         self._log.error('something wrong with file name on print log')
                         try:
@@ -338,12 +694,17 @@ class abcActionU(ABC):
                 elif (i % step) == 0:
                     print('+', end='', flush=True)
         print('')
+        self._cnt_error = cnt_error
+        self._post_work_flush()
 
     def close_log(self):
         hdl = self._log.handlers[:]
         for h in hdl:
             h.close()
             self._log.removeHandler(h)
+        # scan index file is closed with log - at the end of work
+        if self._scan.index is not None:
+            self._scan.index.close()
 
     @abstractmethod
     def run(self, do_action=True, do_create_dest_tree=True) -> list:
@@ -358,16 +719,21 @@ class xInfoU(abcActionU):
     def __init__(self, source_base_dir: str,
                  delimiter: str = ';', log_level=logging.DEBUG, scan_filters: list = list(),
                  new_folder_rule: abcNewFolderExistsRule = exsistOKRule(),
-                 log_file_name=None, set_up_logger_on_init=True) -> None:
+                 log_file_name=None, set_up_logger_on_init=True, scan_threads: int = 0,
+                 scan_index: str = '', ignore_file: str = '', filter_stats: str = None) -> None:
         self._work_name = 'INFO'
         super().__init__(source_base_dir=source_base_dir, destination_base_dir=source_base_dir,
                          log_level=log_level, scan_filters=scan_filters,
                          new_folder_rule=new_folder_rule, delimiter=delimiter,
-                         log_file_name=log_file_name, set_up_logger_on_init=set_up_logger_on_init)
+                         log_file_name=log_file_name, set_up_logger_on_init=set_up_logger_on_init,
+                         scan_threads=scan_threads, scan_index=scan_index, ignore_file=ignore_file,
+                         filter_stats=filter_stats)
 
     def run(self, do_action=True, do_create_dest_tree=True) -> list:
         self._do_scan()
-        return self._create_csv_list()
+        lines = self._create_csv_list()
+        self._log_filter_stats()
+        return lines
 
     def _create_csv_list(self):
         _files = self._scan.files(filtered=True)
@@ -421,7 +787,11 @@ class xCopyU(abcActionU):
     def __init__(self, source_base_dir: str, destination_base_dir: str, destination_subdir: str = '', prefix: str = '',
                  delimiter: str = '_', log_level=logging.DEBUG, scan_filters: list = list(),
                  new_folder_rule: abcNewFolderExistsRule = exsistOKRule(), archive_format: str = '',
-                 set_up_logger_on_init=True) -> None:
+                 set_up_logger_on_init=True, scan_threads: int = 0, scan_index: str = '',
+                 ignore_file: str = '', filter_stats: str = None, copy_threads: int = 0,
+                 zero_copy: bool = False, skip_unchanged: bool = False, modify_window: float = 0.,
+                 delta_copy: bool = False, resume: bool = False, checksum: str = '',
+                 verify: bool = False) -> None:
 
         self._work_name = 'COPY'
 
@@ -429,26 +799,74 @@ class xCopyU(abcActionU):
                          destination_subdir=destination_subdir, prefix=prefix,
                          delimiter=delimiter, log_level=log_level,
                          scan_filters=scan_filters, new_folder_rule=new_folder_rule,
-                         archive_format=archive_format, set_up_logger_on_init=set_up_logger_on_init)
+                         archive_format=archive_format, set_up_logger_on_init=set_up_logger_on_init,
+                         scan_threads=scan_threads, scan_index=scan_index, ignore_file=ignore_file,
+                         filter_stats=filter_stats, copy_threads=copy_threads, zero_copy=zero_copy,
+                         skip_unchanged=skip_unchanged, modify_window=modify_window, delta_copy=delta_copy,
+                         resume=resume, checksum=checksum, verify=verify)
 
-    def run(self, do_copy=True, do_create_tree=True):
-        work_pair = self._do_scan()
+    def run(self, do_copy=True, do_create_tree=True, stream=False):
+        """
+        :param do_copy: bool - False - only open source files, don't copy
+        :param do_create_tree: bool - False - don't create destination dirs tree
+        :param stream: bool - True - copy files while source is scanning (files flow from walk to filters and to
+                       destination one by one, without making files list); False - scan all, then copy
+        :return: list of tuples (src_path, dst_path) - copied files; in stream mode pairs are not kept - empty list
+        """
+        finished = False
+        if self._checksum:
+            self._manifest = copyManifest(self._manifest_path(), self._checksum)
+        try:
+            work_pair = self._copy_work(do_copy=do_copy, do_create_tree=do_create_tree, stream=stream)
+            finished = do_copy and self._cnt_error == 0
+        finally:
+            if self._manifest is not None:
+                self._manifest.close()
+            if self._run_journal is not None:
+                # journal of work, done without errors, is not needed for resume
+                self._run_journal.close(finished=finished)
+        if self._verify and do_copy:
+            self._do_verify()
+        return work_pair
+
+    def _copy_work(self, do_copy=True, do_create_tree=True, stream=False):
+        work_pair = self._iter_scan() if stream else self._do_scan()
         self._log.info('-' * 100)
         if self._archive_format:
             self._log.info('START {0} ({1}):'.format(self._work_name, self._archive_format))
         else:
             self._log.info('START {}:'.format(self._work_name))
 
-        if len(work_pair) == 0:
+        if stream:
+            first = next(work_pair, None)
+            is_empty = first is None
+            work_pair = chain([first], work_pair)
+        else:
+            is_empty = len(work_pair) == 0
+
+        # files not copied - their destination dirs are not created
+        self._cnt_tree_skipped = 0
+        if is_empty:
+            self._log_quick_check()
+            self._post_work_flush()
             self._log.warning('nothing to {} - exit'.format(self._work_name))
             self._log.info(' ' * 100)
             return list()
 
         if self._archive_format:
             self._do_zip(work_pair)
+        elif stream:
+            self._do_copy(self._iter_dest_tree_folder(work_pair, do_create_tree=do_create_tree), do_copy=do_copy)
         else:
-            self._create_dest_tree_folder([df[1] for df in work_pair], do_create_tree=do_create_tree)
+            not_created = self._create_dest_tree_folder([df[1] for df in work_pair], do_create_tree=do_create_tree)
+            if not_created:
+                work_pair = [df for df in work_pair if os.path.dirname(df[1]) not in not_created]
             self._do_copy(work_pair, do_copy=do_copy)
+        if self._cnt_tree_skipped:
+            self._log.error('{} files are not copied - their destination dirs are not created'.format(
+                self._cnt_tree_skipped))
+            self._cnt_error += self._cnt_tree_skipped
+        self._log_quick_check()
 
         if self._archive_format:
             self._log.info('{0} ({1}) DONE'.format(self._work_name, self._archive_format))
@@ -456,7 +874,7 @@ class xCopyU(abcActionU):
             self._log.info('{} DONE'.format(self._work_name))
 
         self._log.info(' ' * 100)
-        return work_pair
+        return list() if stream else work_pair
 
 
 class backup_types(Enum):
@@ -506,12 +924,17 @@ class xBackupU(xCopyU):
                  If param use_A_atrib is set to True (default) after file copy archive file attribute will be
                  switched off for all copied source files
     """
+    # INC backup select files by date and archive attribute - they must be actual, not taken from scan index
+    _index_verify_files = True
 
     def __init__(self, source_base_dir: str, destination_base_dir: str, destination_subdir: str = '', prefix: str = '',
                  delimiter: str = '_', log_level=logging.DEBUG, scan_filters: list = list(),
                  new_folder_rule: abcNewFolderExistsRule = incRule(), archive_format: str = '',
                  backup_type: backup_types = backup_types.FULL,
-                 use_A_atrib: bool = True) -> None:
+                 use_A_atrib: bool = True, scan_threads: int = 0, scan_index: str = '',
+                 use_xattr: bool = False, journal: str = '', ignore_file: str = '',
+                 filter_stats: str = None, copy_threads: int = 0, zero_copy: bool = False,
+                 resume: bool = False, checksum: str = '', verify: bool = False) -> None:
         """
 
         :param source_base_dir: str or pathlike - root of source directory subtree
@@ -525,18 +948,44 @@ class xBackupU(xCopyU):
         :param archive_format: str - empty string = no archive operation, any valid archive file extension - archive destination files
         :param backup_type: backup_types - define Full or Incremental backup
         :param use_A_atrib: bool - True = try to use archive attribute of file
+        :param scan_threads: int - more then 1 - scan source dirs in so many threads at once (for network sources)
+        :param scan_index: str or pathlike - file of persistent scan index, empty string - no index
+        :param use_xattr: bool - True = not on MS Windows use user extended attribute of file (xattrAttribProvider)
+                          as archive attribute: file is new or changed after last backup, if it is switched on
+        :param journal: str or pathlike - change journal of source (watch.inotifyWatcher): INC backup takes changed
+                        files from it without scanning all source; if journal can not be used - source is scanned.
+                        Journal position is saved after every backup without copy errors. Empty string - no journal
+        :param ignore_file: str - name of gitignore-style ignore files in source tree, empty string - no ignore files
+        :param filter_stats: str or pathlike - log counters of scan filters, not empty - save them to json file too;
+                             None - no counting
+        :param copy_threads: int - more then 1 - copy files in so many threads at once (for network destinations)
+        :param zero_copy: bool - True - copy files data in kernel (copy_backends.zeroCopy), False - by shutil.copy2
+        :param resume: bool - True - continue not finished backup into its destination dir (see abcActionU)
+        :param checksum: str - checksum algorithm of manifest of backuped files, '' - no manifest (see abcActionU)
+        :param verify: bool - True - verify destination by manifest after backup
         """
+        # provider is set as current only while run() works - global provider of other works is not changed
+        self._archive_provider = archive_provider()
+        if use_xattr and use_A_atrib and platform.system() != 'Windows' and \
+                xattrAttribProvider.supported(source_base_dir):
+            self._archive_provider = xattrAttribProvider()
 
         super().__init__(source_base_dir=source_base_dir, destination_base_dir=destination_base_dir,
                          destination_subdir=destination_subdir, prefix=prefix, delimiter=delimiter,
                          log_level=log_level, scan_filters=scan_filters, new_folder_rule=new_folder_rule,
-                         archive_format=archive_format, set_up_logger_on_init=False)
+                         archive_format=archive_format, set_up_logger_on_init=False, scan_threads=scan_threads,
+                         scan_index=scan_index, ignore_file=ignore_file, filter_stats=filter_stats,
+                         copy_threads=copy_threads, zero_copy=zero_copy, resume=resume, checksum=checksum,
+                         verify=verify)
 
         self._work_name = backup_type.value
         self._work_type = backup_type
 
-        self._use_A_atrib = (platform.system() == 'Windows') and use_A_atrib
+        # archive attribute is on MS Windows only - or from not native (fake) provider
+        self._use_A_atrib = use_A_atrib and (platform.system() == 'Windows' or
+                                             not isinstance(self._archive_provider, nativeAttribProvider))
 
+        self._journal_skip_filters = list()
         if self._work_type == backup_types.FULL:
             # full backup copy all selected files and, if OS Windows and use a-atrib, switch archive file attrib off
             pass
@@ -546,16 +995,82 @@ class xBackupU(xCopyU):
             else:
                 self._scan.filters.append(filterFileDateRange(color=filter_color.RED,
                                                               low_date=self.find_last_backup_date()))
+                # files from journal are changed after last backup - date of file is not checked
+                self._journal_skip_filters = self._scan.filters[-1:]
+
+        self._journal = changeJournal(journal) if journal else None
 
         self._setup_logger()
         if self._use_A_atrib:
-            self._post_work_action = set_archive_sttrib
+            # switch archive attribute off in batches, not by one system call for every copied file
+            self._post_work_action = self._archive_provider.clear
+            self._post_work_flush = self._flush_archive
         else:
             self._post_work_action = lambda x: x
         self._log.info('!' * 100)
         self._log.info('use Archive file attribute : {}'.format(self._use_A_atrib))
+        if self._use_A_atrib:
+            self._log.info('Archive file attribute provider : {}'.format(type(self._archive_provider).__name__))
         self._log.info('!' * 100)
 
+    def _journal_files(self):
+        """
+        for INC backup with journal: changed source files after last backup from journal, passed filters
+        :return: list of fileRecord or None - if journal is not used (no journal, FULL backup, journal can not be used)
+        """
+        if self._journal is None:
+            return None
+        # position of journal is taken for FULL backup too - next INC backup takes changes after it
+        changes = self._journal.read(self.source_folder)
+        if self._work_type != backup_types.INC:
+            return None
+        if changes is None:
+            self._log.warning('change journal is not used ({}) - scan all source'.format(self._journal.reason))
+            return None
+
+        files = list(self._scan.iter_paths(changes, skip_filters=self._journal_skip_filters))
+        self._log.info('change journal {0} : changed paths {1}, after filters select {2} files'.format(
+            self._journal.journal_file, len(changes), len(files)))
+        self._log.info('filtered size {} (Mb)'.format(file_size2mb(sum(f.size for f in files))))
+        return files
+
+    def _do_scan(self) -> list:
+        files = self._journal_files()
+        if files is None:
+            return super()._do_scan()
+        return [self._src_dst(f) for f in files]
+
+    def _iter_scan(self):
+        files = self._journal_files()
+        if files is None:
+            return super()._iter_scan()
+        return (self._src_dst(f) for f in files)
+
+    def run(self, do_copy=True, do_create_tree=True, stream=False):
+        self._cnt_error = 0
+        previous = set_archive_provider(self._archive_provider)
+        try:
+            work_pair = super().run(do_copy=do_copy, do_create_tree=do_create_tree, stream=stream)
+        finally:
+            set_archive_provider(previous)
+        if self._journal is not None and do_copy:
+            if self._cnt_error:
+                self._log.warning('change journal position is not saved - {} files not copied'.format(
+                    self._cnt_error))
+            else:
+                self._journal.commit()
+        return work_pair
+
+    def _flush_archive(self):
+        provider = self._archive_provider
+        errors, changed = provider.errors, provider.changed
+        provider.flush()
+        if provider.errors > errors:
+            self._log.error('archive attribute is not switched off for {} files'.format(provider.errors - errors))
+        if provider.changed > changed:
+            self._log.warning('archive attribute is not switched off for {} files changed after copy'.format(
+                provider.changed - changed))
+
     def find_last_backup_date(self):
         """
         for INCREMENTAL backup: find all *BACKUP*.log' files in destination base directory, and in second-level subdirs for destination base dir; select last date (with time), return it for use in date range filter as low level date
@@ -563,7 +1078,10 @@ class xBackupU(xCopyU):
         """
         lst = list(Path(self.destination_base).glob('*/*BACKUP*.log'))
         lst += list(Path(self.destination_base).glob('*BACKUP*.log'))
-        f_info = [file_info(str(f)) for f in lst]
+        if self._resumed:
+            # log of resumed backup is written by not finished backup
+            lst = [f for f in lst if f.parent != Path(self._dest_folder)]
+        f_info = [file_info(str(f), aattr=False) for f in lst]
         try:
             return max([f['change_date'] for f in f_info])
         except ValueError:
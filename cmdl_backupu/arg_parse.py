@@ -5,6 +5,9 @@ import re
 from pathlib import Path
 
 from cmdl_backupu import actions, filters, __version__, new_folder
+from cmdl_backupu.copy_backends import SIGNATURES_DIR
+from cmdl_backupu.ignore import IGNORE_FILE_NAME
+from cmdl_backupu.manifest import MANIFEST_ALGORITHMS
 
 
 class Params:
@@ -54,10 +57,68 @@ class Params:
             self._parser.add_argument('-a', '--not-archive', action='store_true',
                                       help="""don't use file archive-attribute for backup - use date of last backup
                                        insteed. Work only on Windows, on Linux always use files date""")
+            self._parser.add_argument('--journal', default='',
+                                      help="""change journal of source (written by --watch): inc backup takes changed
+                                      files from it, without scanning all source""")
+            self._parser.add_argument('--watch', action='store_true',
+                                      help="""Linux: don't backup - watch source and write changes to --journal file
+                                      until Ctrl+C""")
+            self._parser.add_argument('--xattr', action='store_true',
+                                      help="""not on Windows: use file extended attribute user.backupu.done as
+                                      archive-attribute - exact change detection for inc backup""")
         if work_type == actions.work_types.COPY:
             self._parser.add_argument('~e', '--exist_desc', help='If destination alredy exists do...',
                                       default='new',
                                       choices=['new', 'overwrite', 'error'])
+            self._parser.add_argument('--skip-unchanged', action='store_true',
+                                      help="""with --exist_desc overwrite: don't copy files, which are in destination
+                                      already with the same size and modification time""")
+            self._parser.add_argument('--modify-window', type=float, default=0.,
+                                      help="""max difference of modification times in seconds for the same file
+                                      (--skip-unchanged): 2 - for FAT destinations""")
+            self._parser.add_argument('--delta-copy', action='store_true',
+                                      help="""with --exist_desc overwrite: write only changed blocks of big files,
+                                      which are in destination already (block signatures are kept outside of
+                                      destination dir - in {}/<dir name> of destination base dir)""".format(
+                                          SIGNATURES_DIR))
+
+        if work_type != actions.work_types.INFO:
+            self._parser.add_argument('--stream', action='store_true',
+                                      help="""copy files while source is scanning, one by one, without making
+                                      files list - for very big sources""")
+            self._parser.add_argument('--resume', action='store_true',
+                                      help="""keep journal of work in destination dir and continue the last not
+                                      finished work with --resume from the same source into its destination dir:
+                                      copied and not changed files are skipped, big files are copied from the last
+                                      checkpoint""")
+            self._parser.add_argument('--checksum', nargs='?', const=MANIFEST_ALGORITHMS[0], default='',
+                                      choices=MANIFEST_ALGORITHMS, metavar='ALGORITHM',
+                                      help="""compute checksums of files while copying and write manifest (path,
+                                      size, change time, checksum) next to work log; algorithm: {}; without
+                                      value - {}""".format(', '.join(MANIFEST_ALGORITHMS), MANIFEST_ALGORITHMS[0]))
+            self._parser.add_argument('--verify', action='store_true',
+                                      help="""after work rehash destination files in threads and compare them with
+                                      manifest (--checksum is on)""")
+
+        self._parser.add_argument('--scan-threads', type=int, default=0,
+                                  help='scan source dirs in so many threads at once (for network sources)')
+        self._parser.add_argument('--copy-threads', type=int, default=0,
+                                  help='copy files in so many threads at once (for network destinations, NAS)')
+        self._parser.add_argument('--zero-copy', action='store_true',
+                                  help="""copy files data in kernel: reflink (btrfs, XFS), copy_file_range or sendfile,
+                                  by buffer if no one is supported; method of every file is logged (debug)""")
+        self._parser.add_argument('--scan-index', default='',
+                                  help="""file of persistent scan index: source dirs, not changed from last scan,
+                                  are not listed again (file is created if not exists); copyu and infou take size and
+                                  change time of files in such dirs from index too - file edited in place (dir is not
+                                  changed) is not seen, use --skip-unchanged or backupu to stat every file""")
+
+        self._parser.add_argument('--ignore-file', nargs='?', const=IGNORE_FILE_NAME, default='',
+                                  help="""use gitignore-style ignore files in source tree (name {}, if not given):
+                                  matched files and dirs are not scanned""".format(IGNORE_FILE_NAME))
+        self._parser.add_argument('--filter-stats', nargs='?', const='', default=None, metavar='JSON_FILE',
+                                  help="""log evaluations, passes, rejects and time of every filter after scan;
+                                  save them to JSON_FILE too, if it is given""")
 
         self._parser.add_argument('~l', '--log_level', help='log with log-level or none', default='info',
                                   choices=['info', 'debug', 'error', 'none', 'warn', 'critical'])
@@ -96,6 +157,70 @@ class Params:
     def zip(self):
         return vars(self._args)['zip']
 
+    @property
+    def stream(self):
+        return vars(self._args).get('stream', False)
+
+    @property
+    def resume(self):
+        return vars(self._args).get('resume', False)
+
+    @property
+    def checksum(self):
+        return vars(self._args).get('checksum', '')
+
+    @property
+    def verify(self):
+        return vars(self._args).get('verify', False)
+
+    @property
+    def skip_unchanged(self):
+        return vars(self._args).get('skip_unchanged', False)
+
+    @property
+    def modify_window(self):
+        return vars(self._args).get('modify_window', 0.)
+
+    @property
+    def delta_copy(self):
+        return vars(self._args).get('delta_copy', False)
+
+    @property
+    def scan_threads(self):
+        return vars(self._args)['scan_threads']
+
+    @property
+    def copy_threads(self):
+        return vars(self._args)['copy_threads']
+
+    @property
+    def zero_copy(self):
+        return vars(self._args)['zero_copy']
+
+    @property
+    def scan_index(self):
+        return vars(self._args)['scan_index']
+
+    @property
+    def ignore_file(self):
+        return vars(self._args)['ignore_file']
+
+    @property
+    def filter_stats(self):
+        return vars(self._args)['filter_stats']
+
+    @property
+    def journal(self):
+        return vars(self._args).get('journal', '')
+
+    @property
+    def watch(self):
+        return vars(self._args).get('watch', False)
+
+    @property
+    def xattr(self):
+        return vars(self._args).get('xattr', False)
+
     @property
     def a_attr(self):
         return not vars(self._args)['not_archive']
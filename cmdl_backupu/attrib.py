@@ -0,0 +1,344 @@
+"""
+Providers of MS Windows archive file attribute (A-attr) for scanning (xScan) and backup (xBackupU)
+
+Attribute is read and switched off not by 'attrib' subprocess for every file, but by provider:
+    nativeAttribProvider - read attribute from stat data (st_file_attributes - already taken by scan, no additional
+                           system call), switch it by Win32 API (GetFileAttributesW / SetFileAttributesW);
+                           on other OS no file has archive attribute, switching does nothing
+    xattrAttribProvider - Linux (and other OS with user extended attributes): file has "archive attribute" if its
+                          xattr user.backupu.done is not equal to its current '<mtime_ns>,<size>' - file is new or
+                          changed after last backup; switching off write the xattr with the file state at copy time
+    fakeAttribProvider - in-memory attributes for tests and benchmarks on any OS; counts backend calls
+
+Provider read attributes of all files of dir at once and cache them (if attributes are not given in stat data);
+switching off is batched: clear() put file in queue with its size and change time, flush() switch off all queued files
+(call it after work done) - except files changed after clear(), they keep attribute on for the next backup
+
+    usage:
+        set_archive_provider(fakeAttribProvider())     # for tests - before scan and backup
+        p = archive_provider()
+        p.archive(path)     # archive attribute of file
+        p.clear(path)       # switch attribute off - batched
+        p.flush()           # switch off all queued files
+"""
+import ctypes
+import errno
+import os
+import platform
+import stat
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# max number of queued files for switching attribute off - if more, flush automatically
+ATTRIB_BATCH_SIZE = 1000
+
+# user extended attribute with file state (mtime in ns, size) at last backup - for xattrAttribProvider
+XATTR_NAME = 'user.backupu.done'
+
+
+def _file_state(path: str, st: os.stat_result = None):
+    """
+    :return: tuple (size, mtime_ns) of file or None - file is gone
+    """
+    try:
+        if st is None:
+            st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class abcAttribProvider(ABC):
+    """
+    base class for archive attribute providers: cache of attributes by dirs, queue for switching attribute off;
+    counters of backend calls: dir_reads (dirs attributes reading), writes (switching calls), cleared (files),
+    changed (queued files changed before flush - attribute is not switched off), errors (files not switched)
+    """
+    # True - archive attribute is taken from stat data of file without system call (scan reads it for every file),
+    # False - it is read by provider only for file, which attribute is needed
+    stat_attribute = False
+
+    def __init__(self, batch_size: int = ATTRIB_BATCH_SIZE):
+        """
+        :param batch_size: int - max number of queued files for switching attribute off (flush automatically)
+        """
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._cache = dict()
+        self._pending = list()
+        self.dir_reads, self.writes, self.cleared, self.changed, self.errors = 0, 0, 0, 0, 0
+
+    @abstractmethod
+    def _read_dir(self, dir_path: str) -> dict:
+        """
+        read archive attribute of all files of dir
+        :param dir_path: str - dir path
+        :return: dict {file name: archive attribute}
+        """
+        pass
+
+    @abstractmethod
+    def _write(self, paths: list, archive_on: bool):
+        """
+        switch archive attribute for all files
+        :param paths: list of str - file paths
+        :param archive_on: bool - True - switch attribute on, False - off
+        :return: list of str - paths of files, which attribute is not switched (or None - all are switched)
+        """
+        pass
+
+    def _switch(self, paths: list, archive_on: bool) -> list:
+        """
+        switch attribute by backend, count failed files in errors; cache is updated for switched files only
+        :return: list of str - switched files
+        """
+        failed = set(self._write(paths, archive_on) or ())
+        self.writes += 1
+        self.errors += len(failed)
+        done = [p for p in paths if p not in failed] if failed else paths
+        self._update_cache(done, archive_on)
+        return done
+
+    def archive(self, path: str, st: os.stat_result = None) -> bool:
+        """
+        archive attribute of file
+        :param path: str - file path
+        :param st: os.stat_result or None - file stat data, if already taken
+        :return: bool - True if attribute is on
+        """
+        dir_path, name = os.path.split(os.path.abspath(path))
+        with self._lock:
+            flags = self._cache.get(dir_path)
+            if flags is None:
+                flags = self._cache[dir_path] = self._read_dir(dir_path)
+                self.dir_reads += 1
+            return flags.get(name, False)
+
+    def _update_cache(self, paths: list, archive_on: bool):
+        for p in paths:
+            dir_path, name = os.path.split(os.path.abspath(p))
+            if dir_path in self._cache:
+                self._cache[dir_path][name] = archive_on
+
+    def set_archive(self, path: str, archive_on: bool = False):
+        """
+        switch archive attribute of file at once (not batched)
+        :param path: str - file path
+        :param archive_on: bool - True - switch attribute on, False - off
+        """
+        with self._lock:
+            self._switch([path], archive_on)
+
+    def clear(self, path: str, st: os.stat_result = None):
+        """
+        put file in queue for switching archive attribute off; queue is flushed automatically when batch is full
+        :param path: str - file path
+        :param st: os.stat_result or None - file stat data of copied file state; None - taken now (right after copy)
+        """
+        state = _file_state(path, st)
+        if state is None:
+            return
+        with self._lock:
+            self._pending.append((path, state))
+            full = len(self._pending) >= self._batch_size
+        if full:
+            self.flush()
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: int - number of queued files
+        """
+        return len(self._pending)
+
+    def flush(self):
+        """
+        switch archive attribute off for all queued files
+        """
+        with self._lock:
+            queued, self._pending = self._pending, list()
+            # file changed after copy is not switched off - its change is not in backup
+            paths = [p for p, state in queued if _file_state(p) == state]
+            self.changed += len(queued) - len(paths)
+            if paths:
+                self.cleared += len(self._switch(paths, False))
+
+    def reset_cache(self):
+        with self._lock:
+            self._cache = dict()
+
+
+class nativeAttribProvider(abcAttribProvider):
+    """
+    archive attribute from stat data (st_file_attributes, MS Windows) and Win32 API for switching it;
+    on other OS archive attribute is always off and switching does nothing
+    """
+    stat_attribute = True
+
+    def __init__(self, batch_size: int = ATTRIB_BATCH_SIZE):
+        super().__init__(batch_size=batch_size)
+        self._kernel32 = ctypes.windll.kernel32 if platform.system() == 'Windows' else None
+
+    def archive(self, path: str, st: os.stat_result = None) -> bool:
+        if st is not None:
+            return bool(getattr(st, 'st_file_attributes', 0) & stat.FILE_ATTRIBUTE_ARCHIVE)
+        return super().archive(path)
+
+    def _read_dir(self, dir_path: str) -> dict:
+        flags = dict()
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    flags[entry.name] = bool(getattr(st, 'st_file_attributes', 0) & stat.FILE_ATTRIBUTE_ARCHIVE)
+        except OSError:
+            pass
+        return flags
+
+    def _write(self, paths: list, archive_on: bool):
+        if self._kernel32 is None:
+            return None
+        failed = list()
+        for p in paths:
+            attrs = self._kernel32.GetFileAttributesW(str(p))
+            if attrs == -1 or attrs == 0xFFFFFFFF:  # INVALID_FILE_ATTRIBUTES
+                failed.append(p)
+                continue
+            if archive_on:
+                attrs |= stat.FILE_ATTRIBUTE_ARCHIVE
+            else:
+                attrs &= ~stat.FILE_ATTRIBUTE_ARCHIVE
+            # zero - not switched (no write permission, file is locked)
+            if not self._kernel32.SetFileAttributesW(str(p), attrs):
+                failed.append(p)
+        return failed
+
+
+class xattrAttribProvider(abcAttribProvider):
+    """
+    "archive attribute" from user extended attribute XATTR_NAME: it is on, if xattr is absent or not equal to current
+    file state '<mtime_ns>,<size>' - so file copied in with old change time is found too; attribute is read from the
+    file only when it is needed (scan record reads it on first access). Switching off write state of file, checked by
+    flush() to be the state at clear() call (right after copy).
+    Files without xattr support (or without write permission) always have attribute on - they are copied every time;
+    number of failed writes is in errors
+    """
+
+    @staticmethod
+    def supported(path: str) -> bool:
+        """
+        check if file system of dir support user extended attributes - by reading xattr of dir, nothing is written
+        :param path: str - dir path
+        :return: bool
+        """
+        if not hasattr(os, 'getxattr'):
+            return False
+        try:
+            os.getxattr(path, XATTR_NAME)
+        except OSError as e:
+            # no such attribute - file system has xattrs
+            return e.errno == errno.ENODATA
+        return True
+
+    @staticmethod
+    def _mark(st: os.stat_result) -> bytes:
+        return '{0},{1}'.format(st.st_mtime_ns, st.st_size).encode()
+
+    def archive(self, path: str, st: os.stat_result = None) -> bool:
+        try:
+            if st is None:
+                st = os.stat(path)
+            return os.getxattr(path, XATTR_NAME) != self._mark(st)
+        except OSError:
+            return True
+
+    def _read_dir(self, dir_path: str) -> dict:
+        flags = dict()
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        flags[entry.name] = self.archive(entry.path, entry.stat())
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return flags
+
+    def _write(self, paths: list, archive_on: bool):
+        failed = list()
+        for p in paths:
+            try:
+                if archive_on:
+                    os.removexattr(p, XATTR_NAME)
+                else:
+                    os.setxattr(p, XATTR_NAME, self._mark(os.stat(p)))
+            except OSError:
+                failed.append(p)
+        return failed
+
+
+class fakeAttribProvider(abcAttribProvider):
+    """
+    in-memory archive attributes - for tests and benchmarks on any OS: files not switched yet have attribute
+    default_on; every backend call (dir reading or switching) can take delay seconds - like subprocess start
+    """
+
+    def __init__(self, default_on: bool = True, delay: float = 0, batch_size: int = ATTRIB_BATCH_SIZE):
+        """
+        :param default_on: bool - archive attribute of files, not switched by provider
+        :param delay: float - time in seconds of one backend call
+        :param batch_size: int - max number of queued files for switching attribute off
+        """
+        super().__init__(batch_size=batch_size)
+        self._default_on = default_on
+        self._delay = delay
+        self._flags = dict()
+
+    def archive(self, path: str, st: os.stat_result = None) -> bool:
+        # stat data has no fake attributes - always read them from provider
+        return super().archive(path)
+
+    def _read_dir(self, dir_path: str) -> dict:
+        if self._delay:
+            time.sleep(self._delay)
+        try:
+            names = os.listdir(dir_path)
+        except OSError:
+            names = list()
+        return {n: self._flags.get(os.path.join(dir_path, n), self._default_on) for n in names}
+
+    def _write(self, paths: list, archive_on: bool):
+        if self._delay:
+            time.sleep(self._delay)
+        for p in paths:
+            self._flags[os.path.abspath(p)] = archive_on
+
+
+_provider = None
+
+
+def archive_provider() -> abcAttribProvider:
+    """
+    :return: abcAttribProvider - current provider of archive attribute (nativeAttribProvider by default)
+    """
+    global _provider
+    if _provider is None:
+        _provider = nativeAttribProvider()
+    return _provider
+
+
+def set_archive_provider(provider: abcAttribProvider = None) -> abcAttribProvider:
+    """
+    set provider of archive attribute for scanning and backup
+    :param provider: abcAttribProvider or None - None: default provider (nativeAttribProvider)
+    :return: abcAttribProvider - previous provider
+    """
+    global _provider
+    assert provider is None or isinstance(provider, abcAttribProvider)
+    previous, _provider = _provider, provider
+    return previous
@@ -5,7 +5,7 @@ run from batch, do various backup works
 
 import datetime as dt
 
-from cmdl_backupu import actions, arg_parse, new_folder
+from cmdl_backupu import actions, arg_parse, new_folder, watch
 
 
 def main():
@@ -28,6 +28,15 @@ def main():
 
     # get params from command string
     args = xpars.parse_args()
+    if xpars.watch:
+        assert xpars.journal, 'journal file (--journal) is needed for watching'
+        print('watch {0}, journal {1} - Ctrl+C for stop'.format(xpars.source, xpars.journal))
+        try:
+            watch.inotifyWatcher(source=xpars.source, journal_file=xpars.journal).run()
+        except KeyboardInterrupt:
+            pass
+        return
+
     xBU = actions.xBackupU(source_base_dir=xpars.source,
                            destination_base_dir=xpars.destination,
                            destination_subdir='BACKUP_{}'.format(dt.datetime.now().strftime('%d_%m_%Y')),
@@ -37,8 +46,20 @@ def main():
                            archive_format=xpars.zip,
                            prefix=xpars.backup_type.name,
                            use_A_atrib=xpars.a_attr,
-                           new_folder_rule=new_folder.incRule())
-    xBU.run()
+                           use_xattr=xpars.xattr,
+                           journal=xpars.journal,
+                           new_folder_rule=new_folder.incRule(),
+                           scan_threads=xpars.scan_threads,
+                           scan_index=xpars.scan_index,
+                           ignore_file=xpars.ignore_file,
+                           filter_stats=xpars.filter_stats,
+                           copy_threads=xpars.copy_threads,
+                           zero_copy=xpars.zero_copy,
+                           resume=xpars.resume,
+                           checksum=xpars.checksum,
+                           verify=xpars.verify)
+    xBU.run(stream=xpars.stream)
+    xBU.close_log()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,430 @@
+"""
+Benchmarks for scanning source directory tree on generated (synthetic) directory tree
+
+    make_tree - create deterministic directory tree: depth, sub-dirs in every dir, files in every dir, file size
+                distribution and extensions mix (TREE_SHAPES - named shapes)
+    bench_scan - time xScan.scan() with every scan engine on the same tree, check that results are the same
+    bench_latency_scan - time SCANDIR and PARALLEL engines on tree with simulated network latency of dir listing
+    bench_memory - memory taken by scanned files list: dicts (WALK engine) and fileRecord objects (SCANDIR engine)
+    bench_attrib - archive attribute reading and switching off: by file (like 'attrib' subprocess) and batched
+    bench_filters - filtering of scanned files list: cascade of filters (list by filter) and one pass filters plan
+    bench_hot_paths - time of work hot paths: xScan.scan, _filtered_files, xCopyU._do_copy and _do_zip
+    save_results, compare_baseline - results in json file and check them against stored baseline results
+
+    usage:
+        python -m cmdl_backupu.bench
+        python -m cmdl_backupu.bench --shape large --dir /dev/shm --out bench.json --baseline bench_base.json
+"""
+import argparse
+import json
+import logging
+import math
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from shutil import rmtree
+
+from cmdl_backupu.actions import xCopyU
+from cmdl_backupu.attrib import fakeAttribProvider, set_archive_provider
+from cmdl_backupu.scan import *
+
+BENCH_EXTENSIONS = ['py', 'txt', 'xlsx', 'docx', 'pdf', 'csv', 'tmp', 'lnk', 'jpg', 'sqlite']
+
+# file size distributions of make_tree
+SIZE_UNIFORM, SIZE_LOGNORMAL, SIZE_FIXED = 'uniform', 'lognormal', 'fixed'
+
+# named tree shapes (make_tree params): files = files_in_dir * (fanout ** (depth + 1) - 1) / (fanout - 1)
+TREE_SHAPES = {
+    'small': dict(depth=3, fanout=5, files_in_dir=40),
+    'medium': dict(depth=4, fanout=6, files_in_dir=40, max_size=64 * 1024, size_dist=SIZE_LOGNORMAL),
+    'large': dict(depth=5, fanout=8, files_in_dir=25, max_size=16 * 1024, size_dist=SIZE_LOGNORMAL),
+    'huge': dict(depth=6, fanout=8, files_in_dir=7, max_size=4 * 1024, size_dist=SIZE_LOGNORMAL),
+    'wide': dict(depth=1, fanout=2000, files_in_dir=50),
+    'deep': dict(depth=40, fanout=1, files_in_dir=200),
+}
+
+# relative slowdown of result against baseline, that is regression
+BASELINE_TOLERANCE = 0.2
+
+
+def _file_size(rnd: random.Random, max_size: int, size_dist: str) -> int:
+    """
+    :return: int - random file size in bytes from 0 to max_size: uniform, fixed (always max_size) or lognormal
+             (many small files and few big ones, median - 1/32 of max_size)
+    """
+    if size_dist == SIZE_FIXED:
+        return max_size
+    if size_dist == SIZE_LOGNORMAL:
+        return min(max_size, int(rnd.lognormvariate(math.log(max_size / 32 or 1), 1.5)))
+    return rnd.randint(0, max_size)
+
+
+def make_tree(base_path: str, depth: int = 3, fanout: int = 4, files_in_dir: int = 50,
+              max_size: int = 1024, seed: int = 1, size_dist: str = SIZE_UNIFORM, extensions: dict = None,
+              random_content: bool = False) -> int:
+    """
+    create synthetic directory tree for benchmarks; tree is the same for the same params
+    :param base_path: str - existing dir, root of tree
+    :param depth: int - number of sub-dirs levels
+    :param fanout: int - number of sub-dirs in every dir
+    :param files_in_dir: int - number of files in every dir
+    :param max_size: int - max file size in bytes
+    :param seed: int - seed for random file sizes and extensions
+    :param size_dist: str - file size distribution: SIZE_UNIFORM, SIZE_LOGNORMAL or SIZE_FIXED
+    :param extensions: dict {extension: weight} - extensions mix; None - BENCH_EXTENSIONS with the same weight
+    :param random_content: bool - True: files of random (not compressible) bytes, False - of one repeated byte
+    :return: int - number of created files
+    """
+    rnd = random.Random(seed)
+    exts, weights = zip(*extensions.items()) if extensions else (BENCH_EXTENSIONS, None)
+    cnt = 0
+    level = [base_path]
+    for lvl in range(depth + 1):
+        next_level = list()
+        for d in level:
+            for i in range(files_in_dir):
+                ext = rnd.choices(exts, weights)[0] if weights else rnd.choice(exts)
+                size = _file_size(rnd, max_size, size_dist)
+                with open(os.path.join(d, 'file_{0}_{1}.{2}'.format(lvl, i, ext)), 'wb') as f:
+                    f.write(rnd.getrandbits(8 * size).to_bytes(size, 'little') if random_content else b'x' * size)
+                cnt += 1
+            if lvl < depth:
+                for i in range(fanout):
+                    sub = os.path.join(d, 'dir_{0}_{1}'.format(lvl, i))
+                    os.mkdir(sub)
+                    next_level.append(sub)
+        level = next_level
+    return cnt
+
+
+def _best_time(func, repeat: int = 3) -> float:
+    """
+    :return: float - the best (minimal) time in seconds of repeat calls of func
+    """
+    times = list()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def bench_scan(base_path: str, repeat: int = 3) -> dict:
+    """
+    time xScan.scan() with all scan engines on given dir
+    :param base_path: str - dir for scanning
+    :param repeat: int - repeat every scan and take the best time
+    :return: dict - {engine name: time in seconds}
+    """
+    results = dict()
+    scanned = dict()
+    for engine in scan_engine:
+        sc = xScan(start_path=base_path, engine=engine)
+        results[engine.name] = _best_time(sc.scan, repeat=repeat)
+        scanned[engine.name] = sc.files()
+
+    _ref = scanned[scan_engine.WALK.name]
+    for name, files in scanned.items():
+        assert files == _ref, 'engine {} scan result differs from WALK'.format(name)
+    return results
+
+
+class latencyScandir:
+    """
+    stand-in for os.scandir on network file system: wait given time before every directory listing
+    """
+
+    def __init__(self, delay: float = 0.02):
+        """
+        :param delay: float - listing latency in seconds
+        """
+        self._delay = delay
+
+    def __call__(self, path):
+        time.sleep(self._delay)
+        return os.scandir(path)
+
+
+def bench_latency_scan(base_path: str, delay: float = 0.02, threads: tuple = (4, 16)) -> dict:
+    """
+    time SCANDIR (one by one) and PARALLEL (thread pool) engines, when listing of every dir takes delay seconds
+    :param base_path: str - dir for scanning
+    :param delay: float - latency of one dir listing in seconds
+    :param threads: tuple of int - number of threads for PARALLEL engine runs
+    :return: dict - {engine name (and threads): time in seconds}
+    """
+
+    class slowScan(xScan):
+        _scandir = latencyScandir(delay=delay)
+
+    results = dict()
+    sc = slowScan(start_path=base_path, engine=scan_engine.SCANDIR)
+    results[scan_engine.SCANDIR.name] = _best_time(sc.scan, repeat=1)
+    _ref = sc.files()
+
+    for t in threads:
+        sc = slowScan(start_path=base_path, engine=scan_engine.PARALLEL, threads=t)
+        results['{0}({1})'.format(scan_engine.PARALLEL.name, t)] = _best_time(sc.scan, repeat=1)
+        assert sc.files() == _ref, 'PARALLEL scan result differs from SCANDIR'
+    return results
+
+
+def bench_memory(base_path: str) -> dict:
+    """
+    measure memory allocated for scanned files list by WALK (list of dicts) and SCANDIR (list of fileRecord) engines
+    :param base_path: str - dir for scanning
+    :return: dict - {engine name: bytes per scanned file}
+    """
+    results = dict()
+    for engine in [scan_engine.WALK, scan_engine.SCANDIR]:
+        sc = xScan(start_path=base_path, engine=engine)
+        tracemalloc.start()
+        files = sc.scan()
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results[engine.name] = mem / (len(files) or 1)
+    return results
+
+
+def bench_attrib(base_path: str, delay: float = 0.001) -> dict:
+    """
+    time reading archive attribute of all scanned files and switching it off, when every backend call takes delay
+    seconds (like 'attrib' subprocess start): one call for every file vs. one call for dir reading and batched
+    switching (fakeAttribProvider)
+    :param base_path: str - dir for scanning
+    :param delay: float - time of one backend call in seconds
+    :return: dict - {way: (time in seconds, number of backend calls)}
+    """
+    results = dict()
+    provider = fakeAttribProvider(delay=delay)
+    previous = set_archive_provider(provider)
+    try:
+        t0 = time.perf_counter()
+        files = xScan(start_path=base_path).scan()
+        for f in files:
+            provider.clear(f['path'])
+        provider.flush()
+        results['batched'] = (time.perf_counter() - t0, provider.dir_reads + provider.writes)
+    finally:
+        set_archive_provider(previous)
+
+    # by file: one call for reading and one for switching of every file
+    t0 = time.perf_counter()
+    for _ in range(2 * len(files)):
+        time.sleep(delay)
+    results['by file'] = (time.perf_counter() - t0, 2 * len(files))
+    return results
+
+
+def bench_filters(base_path: str, repeat: int = 3) -> dict:
+    """
+    time filtering of scanned files list by 20 filters: cascade (_filtered_files_cascade) and one pass plan
+    (_filtered_files) - with size and date filters by numpy columns and by files; check that results are the same
+    :param base_path: str - dir for scanning
+    :param repeat: int - repeat every filtering and take the best time
+    :return: dict - {way: time in seconds}
+    """
+    filters = [filterFileExt(color=filter_color.WHITE, rule=e) for e in BENCH_EXTENSIONS[:6]] + \
+              [filterFileExt(color=filter_color.BLACK, rule=e) for e in ['tmp', 'lnk', 'pyc']] + \
+              [filterFileName(color=filter_color.WHITE, rule=r'file_{}_'.format(i)) for i in range(3)] + \
+              [filterFileName(color=filter_color.BLACK, rule=r'_1\d$')] + \
+              [filterFilePath(color=filter_color.BLACK, rule=r'dir_0_{}'.format(i)) for i in range(2)] + \
+              [filterDirName(color=filter_color.BLACK, rule=r'dir_2_3')] + \
+              [filterFileSize(color=filter_color.WHITE, low_level=10), filterFileSize(color=filter_color.RED, low_level=1),
+               filterFileDateRange(color=filter_color.RED, high_date=dt.datetime(year=3000, month=1, day=1)),
+               filterFileSize(color=filter_color.BLACK, low_level=1e9)]
+
+    sc = xScan(start_path=base_path)
+    sc.set_filters(*filters)
+    sc.scan()
+    results = {'cascade': _best_time(sc._filtered_files_cascade, repeat=repeat),
+               'plan': _best_time(sc._filtered_files, repeat=repeat)}
+    sc._vector_min_files = len(sc.files()) + 1
+    results['plan by files'] = _best_time(sc._filtered_files, repeat=repeat)
+    assert sorted(f['path'] for f in sc._filtered_files_cascade()) == sorted(f['path'] for f in sc._filtered_files()), \
+        'filters plan result differs from cascade'
+    return results
+
+
+def bench_hot_paths(base_path: str, work_path: str, repeat: int = 3) -> dict:
+    """
+    time hot paths of COPY work on given dir: xScan.scan, _filtered_files (by filters of bench_filters without
+    dir filters), xCopyU._do_copy into dir and xCopyU._do_zip into zip file (both into work_path)
+    :param base_path: str - source dir
+    :param work_path: str - existing dir for copy and zip destinations (outside base_path)
+    :param repeat: int - repeat every step and take the best time
+    :return: dict - {step: time in seconds}
+    """
+    filters = [filterFileExt(color=filter_color.BLACK, rule=e) for e in ['tmp', 'lnk']] + \
+              [filterFileName(color=filter_color.BLACK, rule=r'_1\d$'),
+               filterFileSize(color=filter_color.WHITE, low_level=1),
+               filterFileDateRange(color=filter_color.WHITE, high_date=dt.datetime(year=3000, month=1, day=1))]
+    results = dict()
+    sc = xScan(start_path=base_path)
+    sc.set_filters(*filters)
+    results['scan'] = _best_time(sc.scan, repeat=repeat)
+    results['filtered_files'] = _best_time(sc._filtered_files, repeat=repeat)
+
+    for step, archive_format in [('copy', ''), ('zip', 'zip')]:
+        work = xCopyU(source_base_dir=base_path, destination_base_dir=work_path, destination_subdir=step,
+                      log_level=logging.ERROR, scan_filters=filters, archive_format=archive_format)
+        pairs = work._do_scan()
+        if archive_format:
+            results[step] = _best_time(lambda: work._do_zip(pairs), repeat=repeat)
+        else:
+            work._create_dest_tree_folder([p[1] for p in pairs])
+            results[step] = _best_time(lambda: work._do_copy(pairs), repeat=repeat)
+        assert work._cnt_error == 0, '{} errors'.format(step)
+    return results
+
+
+def save_results(results: dict, file_name: str, shape: dict = None, files: int = 0):
+    """
+    save benchmark results to json file
+    :param results: dict {benchmark: {way: float}} - times in seconds (memory - in bytes)
+    :param file_name: str or pathlike - json file
+    :param shape: dict - params of make_tree
+    :param files: int - number of files in tree
+    """
+    data = {'date': dt.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'system': platform.system(), 'shape': shape or dict(), 'files': files, 'results': results}
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def compare_baseline(results: dict, baseline_file: str, tolerance: float = BASELINE_TOLERANCE) -> list:
+    """
+    compare benchmark results with baseline results (saved by save_results); results missing in baseline
+    are skipped
+    :param results: dict {benchmark: {way: float}}
+    :param baseline_file: str or pathlike - json file of baseline results
+    :param tolerance: float - relative slowdown, which is regression (0.2 - 20% slower than baseline)
+    :return: list of tuples (benchmark, way, baseline value, value, ratio) - regressions
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = list()
+    for bench, ways in results.items():
+        for way, value in ways.items():
+            base = baseline.get(bench, dict()).get(way)
+            if not base or not isinstance(value, (int, float)):
+                continue
+            if value > base * (1 + tolerance):
+                regressions.append((bench, way, base, value, value / base))
+    return regressions
+
+
+def _parse_args(args=None):
+    parser = argparse.ArgumentParser(prog='python -m cmdl_backupu.bench',
+                                     description='benchmarks of backupu on synthetic source tree')
+    parser.add_argument('--shape', choices=sorted(TREE_SHAPES), default='small', help='tree shape (make_tree params)')
+    parser.add_argument('--depth', type=int, help='sub-dirs levels (instead of shape one)')
+    parser.add_argument('--fanout', type=int, help='sub-dirs in every dir (instead of shape one)')
+    parser.add_argument('--files-in-dir', type=int, help='files in every dir (instead of shape one)')
+    parser.add_argument('--max-size', type=int, help='max file size in bytes (instead of shape one)')
+    parser.add_argument('--size-dist', choices=[SIZE_UNIFORM, SIZE_LOGNORMAL, SIZE_FIXED],
+                        help='file size distribution (instead of shape one)')
+    parser.add_argument('--extensions', help='extensions mix: ext:weight, separated by comma (py:5,txt:1,jpg:2)')
+    parser.add_argument('--random-content', action='store_true', help='not compressible file content')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--dir', default=None, help='dir for tree (tmpfs - /dev/shm - for big trees), temp dir if '
+                                                    'not given')
+    parser.add_argument('--repeat', type=int, default=3, help='repeat every benchmark and take the best time')
+    parser.add_argument('--only', nargs='+', default=None,
+                        choices=['scan', 'memory', 'filters', 'hot_paths', 'attrib', 'latency_scan'],
+                        help='run only these benchmarks')
+    parser.add_argument('--out', help='save results to this json file')
+    parser.add_argument('--baseline', help='compare results with this json file (saved with --out before)')
+    parser.add_argument('--tolerance', type=float, default=BASELINE_TOLERANCE,
+                        help='relative slowdown against baseline, that is regression')
+    return parser.parse_args(args)
+
+
+def _shape(pars) -> dict:
+    shape = dict(TREE_SHAPES[pars.shape], seed=pars.seed)
+    for key in ['depth', 'fanout', 'files_in_dir', 'max_size', 'size_dist']:
+        if getattr(pars, key) is not None:
+            shape[key] = getattr(pars, key)
+    if pars.extensions:
+        shape['extensions'] = {e.split(':')[0]: float(e.split(':')[1]) if ':' in e else 1.
+                               for e in pars.extensions.split(',')}
+    if pars.random_content:
+        shape['random_content'] = True
+    return shape
+
+
+def main(args=None) -> int:
+    """
+    :return: int - exit code: 1 if there are regressions against baseline
+    """
+    pars = _parse_args(args)
+    shape = _shape(pars)
+    tmp = tempfile.mkdtemp(prefix='backupu_bench_', dir=pars.dir)
+    results = dict()
+    run = lambda name: pars.only is None or name in pars.only
+    try:
+        source, work = os.path.join(tmp, 'source'), os.path.join(tmp, 'work')
+        os.mkdir(source)
+        os.mkdir(work)
+        t0 = time.perf_counter()
+        cnt = make_tree(source, **shape)
+        print('tree: {0} files in {1} ({2:.1f} sec)'.format(cnt, source, time.perf_counter() - t0))
+
+        if run('scan'):
+            print('scan:')
+            results['scan'] = bench_scan(source, repeat=pars.repeat)
+            for engine, sec in results['scan'].items():
+                print('{0:14} : {1:.4f} sec'.format(engine, sec))
+
+        if run('memory'):
+            print('memory per scanned file:')
+            results['memory'] = bench_memory(source)
+            for engine, mem in results['memory'].items():
+                print('{0:14} : {1:.0f} bytes'.format(engine, mem))
+
+        if run('filters'):
+            print('filtering by {} filters:'.format(20))
+            results['filters'] = bench_filters(source, repeat=pars.repeat)
+            for way, sec in results['filters'].items():
+                print('{0:14} : {1:.4f} sec'.format(way, sec))
+
+        if run('hot_paths'):
+            print('hot paths of copy work:')
+            results['hot_paths'] = bench_hot_paths(source, work, repeat=pars.repeat)
+            for step, sec in results['hot_paths'].items():
+                print('{0:14} : {1:.4f} sec'.format(step, sec))
+
+        if run('attrib'):
+            print('archive attribute, backend call 0.001 sec:')
+            results['attrib'] = dict()
+            for way, (sec, calls) in bench_attrib(source).items():
+                results['attrib'][way] = sec
+                print('{0:14} : {1:.4f} sec, {2} calls'.format(way, sec, calls))
+
+        if run('latency_scan'):
+            print('dir listing latency 0.02 sec:')
+            results['latency_scan'] = bench_latency_scan(source, delay=0.02)
+            for engine, sec in results['latency_scan'].items():
+                print('{0:14} : {1:.4f} sec'.format(engine, sec))
+    finally:
+        rmtree(tmp)
+
+    if pars.out:
+        save_results(results, pars.out, shape=shape, files=cnt)
+        print('results saved : {}'.format(pars.out))
+    if pars.baseline:
+        regressions = compare_baseline(results, pars.baseline, tolerance=pars.tolerance)
+        for bench, way, base, value, ratio in regressions:
+            print('REGRESSION {0}/{1} : {2:.4f} -> {3:.4f} ({4:.2f}x)'.format(bench, way, base, value, ratio))
+        print('baseline {0} : {1} regressions'.format(pars.baseline, len(regressions)))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    code = main()
+    print('All done')
+    sys.exit(code)
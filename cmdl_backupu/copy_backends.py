@@ -0,0 +1,338 @@
+"""
+Copy backends for actions (abcActionU._copy_action) - callables (src, dst) with the same result as shutil.copy2
+(file data and stat data: mode, times, xattrs)
+
+    zeroCopy - copy file data in kernel, without reading it to user space; methods are tried in order, method
+               not supported for pair of source and destination file systems is not tried again for them:
+        COPY_REFLINK - FICLONE ioctl: destination shares data blocks with source (btrfs, XFS, other CoW file
+                       systems) - no data is copied at all
+        COPY_RANGE - os.copy_file_range: copy in kernel (server-side copy on NFS 4.2 and SMB3)
+        COPY_SENDFILE - os.sendfile from file to file: copy in kernel (Linux)
+        COPY_USER - read and write by buffer in user space (shutil.copyfileobj) - everywhere
+
+    deltaCopy - update older version of destination file in place: only changed blocks are written. Source blocks
+                are compared with block signatures of destination (weak adler32 and strong blake2b checksums, strong
+                one - only for blocks with the same weak one), cached in signatures file in sidecar dir outside of
+                destination tree (actions: SIGNATURES_DIR in destination base dir) - destination is read only if there
+                is no valid signatures file.
+                New and small files are copied by full copy backend (copy2 or zeroCopy)
+
+Method used for every file is returned by call and counted in counts of backend
+
+    usage:
+        backend = zeroCopy()
+        method = backend(src_path, dst_path)     # COPY_REFLINK, COPY_RANGE, COPY_SENDFILE or COPY_USER
+        backend.counts                           # {method: number of files}
+
+        backend = deltaCopy(full_copy=zeroCopy())
+        method = backend(src_path, dst_path)     # COPY_DELTA or method of full copy
+        backend.written, backend.saved          # bytes written and not written by delta copy
+"""
+import errno
+import hashlib
+import os
+import platform
+import shutil
+import struct
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # MS Windows
+    fcntl = None
+
+COPY_REFLINK, COPY_RANGE, COPY_SENDFILE, COPY_USER = 'reflink', 'copy_file_range', 'sendfile', 'user space'
+COPY_DELTA, COPY_FULL = 'delta', 'full'
+
+# ioctl FICLONE (linux/fs.h): _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# max bytes by one copy_file_range / sendfile call
+ZERO_COPY_CHUNK = 1024 ** 3
+
+# errors of method, which is not supported for file systems of source and destination (or by OS) - next method
+# is tried and the method is not tried again for this pair of file systems
+_UNSUPPORTED_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+# errors of method for one file (not regular file, append-only or swap file, file opened for write) - next method
+# is tried for this file only; other errors (no space, IO error) are raised
+_FILE_ERRORS = {errno.EINVAL, errno.EBADF, errno.ETXTBSY, errno.EPERM, errno.ENOTSOCK}
+
+
+def zero_copy_methods() -> list:
+    """
+    :return: list of copy methods of zeroCopy, supported by this OS (COPY_USER - always)
+    """
+    methods = list()
+    if platform.system() == 'Linux' and fcntl is not None:
+        methods.append(COPY_REFLINK)
+    if hasattr(os, 'copy_file_range'):
+        methods.append(COPY_RANGE)
+    if platform.system() == 'Linux' and hasattr(os, 'sendfile'):
+        methods.append(COPY_SENDFILE)
+    return methods + [COPY_USER]
+
+
+class zeroCopy:
+    """
+    copy file (as shutil.copy2) in kernel: reflink, copy_file_range or sendfile - the first supported for source and
+    destination file systems; in user space, if no one is supported. Thread safe
+    """
+
+    def __init__(self, methods: list = None):
+        """
+        :param methods: list of copy methods for trying in given order (COPY_USER is always the last);
+                        None - all supported by OS (zero_copy_methods)
+        """
+        supported = zero_copy_methods()
+        self._methods = [m for m in (methods or supported) if m in supported and m != COPY_USER] + [COPY_USER]
+        # (source st_dev, destination st_dev) -> index of first method to try
+        self._start = dict()
+        self._lock = threading.Lock()
+        self.counts = dict()
+
+    @property
+    def methods(self) -> list:
+        return self._methods
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = dict()
+
+    def __call__(self, src: str, dst: str) -> str:
+        """
+        copy file data and stat data (shutil.copystat)
+        :param src: str or pathlike - source file
+        :param dst: str or pathlike - destination file (not dir)
+        :return: str - method of data copy
+        """
+        with open(src, 'rb') as fsrc:
+            with open(dst, 'wb') as fdst:
+                method = self._copy_data(fsrc, fdst)
+        shutil.copystat(src, dst)
+        with self._lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
+        return method
+
+    def _copy_data(self, fsrc, fdst) -> str:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(src_fd).st_size
+        key = (os.fstat(src_fd).st_dev, os.fstat(dst_fd).st_dev)
+
+        for i in range(self._start.get(key, 0), len(self._methods) - 1):
+            try:
+                # copy ended before file size (file system gives no data in kernel, source is truncated) - try next
+                if self._copy_by(self._methods[i], src_fd, dst_fd, size) >= size:
+                    return self._methods[i]
+            except OSError as e:
+                if e.errno in _UNSUPPORTED_ERRORS:
+                    with self._lock:
+                        self._start[key] = max(self._start.get(key, 0), i + 1)
+                elif e.errno not in _FILE_ERRORS:
+                    raise
+            # next method copies from the beginning
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+
+        shutil.copyfileobj(fsrc, fdst)
+        return COPY_USER
+
+    @staticmethod
+    def _copy_by(method: str, src_fd: int, dst_fd: int, size: int) -> int:
+        """
+        :return: int - number of copied bytes
+        """
+        if method == COPY_REFLINK:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return size
+        chunk = min(max(size, 8 * 1024 ** 2), ZERO_COPY_CHUNK)
+        offset = 0
+        while True:
+            if method == COPY_RANGE:
+                sent = os.copy_file_range(src_fd, dst_fd, chunk)
+            else:
+                sent = os.sendfile(dst_fd, src_fd, offset, chunk)
+            if sent == 0:
+                return offset
+            offset += sent
+
+
+# block size of delta copy and its signatures
+DELTA_BLOCK_SIZE = 64 * 1024
+
+# min file size for delta copy, smaller files are copied in full
+DELTA_MIN_SIZE = 1024 ** 2
+
+# extension of block signatures file of destination file
+SIGNATURE_EXT = '.bsig'
+
+# sidecar dir of signatures files (in destination base dir): <SIGNATURES_DIR>/<destination dir name>/<file path>.bsig
+SIGNATURES_DIR = '.backupu_signatures'
+
+# signatures file: magic, block size, destination size and change time (ns) at signatures making; blocks signatures -
+# adler32 and blake2b digest (NO_STRONG - not computed for written block)
+_SIG_HEADER = struct.Struct('<8sIQq')
+_SIG_BLOCK = struct.Struct('<I16s')
+_SIG_MAGIC = b'BUBSIG01'
+
+# strong digest of block, written by delta copy: it is not computed - block is compared by data at next delta copy
+NO_STRONG = bytes(_SIG_BLOCK.size - 4)
+
+
+def _strong(block: bytes) -> bytes:
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def signatures_file(dst: str, signatures_dir: str = None, dest_root: str = None) -> str:
+    """
+    :param dst: str - destination file
+    :param signatures_dir: str or pathlike - sidecar dir of signatures files or None - signatures file is next to dst
+    :param dest_root: str or pathlike - destination dir, which tree is in signatures_dir
+    :return: str - signatures file of destination file
+    """
+    if signatures_dir is None:
+        return dst + SIGNATURE_EXT
+    return os.path.join(str(signatures_dir), os.path.relpath(dst, str(dest_root))) + SIGNATURE_EXT
+
+
+def load_signatures(dst: str, block_size: int = DELTA_BLOCK_SIZE, sig_file: str = None):
+    """
+    :param dst: str - destination file
+    :param block_size: int - block size
+    :param sig_file: str - signatures file (signatures_file()), None - <dst>.bsig
+    :return: list of tuples (adler32, blake2b digest or NO_STRONG) - signatures of destination blocks from signatures
+             file or None, if there is no file or it is not valid for current destination (size, change time or block
+             size differ)
+    """
+    sig_file = sig_file or dst + SIGNATURE_EXT
+    try:
+        st = os.stat(dst)
+        with open(sig_file, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _SIG_HEADER.size:
+        return None
+    magic, size, dst_size, dst_mtime = _SIG_HEADER.unpack_from(data)
+    body = memoryview(data)[_SIG_HEADER.size:]
+    if magic != _SIG_MAGIC or size != block_size or dst_size != st.st_size or dst_mtime != st.st_mtime_ns or \
+            len(body) != -(-dst_size // block_size) * _SIG_BLOCK.size:
+        return None
+    return list(_SIG_BLOCK.iter_unpack(body))
+
+
+def save_signatures(dst: str, signatures: list, block_size: int = DELTA_BLOCK_SIZE, sig_file: str = None):
+    """
+    write signatures of destination blocks with current destination size and change time to signatures file
+    :param dst: str - destination file
+    :param signatures: list of tuples (adler32, blake2b digest or NO_STRONG)
+    :param block_size: int - block size
+    :param sig_file: str - signatures file (signatures_file(), its dir is created), None - <dst>.bsig
+    """
+    sig_file = sig_file or dst + SIGNATURE_EXT
+    st = os.stat(dst)
+    os.makedirs(os.path.dirname(sig_file), exist_ok=True)
+    with open(sig_file + '.tmp', 'wb') as f:
+        f.write(_SIG_HEADER.pack(_SIG_MAGIC, block_size, st.st_size, st.st_mtime_ns))
+        f.write(b''.join(_SIG_BLOCK.pack(*sig) for sig in signatures))
+    os.replace(sig_file + '.tmp', sig_file)
+
+
+def file_signatures(path: str, block_size: int = DELTA_BLOCK_SIZE) -> list:
+    """
+    :return: list of tuples (adler32, blake2b digest) - signatures of file blocks
+    """
+    signatures = list()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            signatures.append((zlib.adler32(block), _strong(block)))
+    return signatures
+
+
+class deltaCopy:
+    """
+    copy file (as shutil.copy2): if destination exists and source is big enough - write only changed blocks of
+    destination in place and update its signatures file; otherwise copy by full_copy backend. Thread safe
+    """
+
+    def __init__(self, full_copy=shutil.copy2, block_size: int = DELTA_BLOCK_SIZE, min_size: int = DELTA_MIN_SIZE,
+                 signatures_dir: str = None, dest_root: str = None):
+        """
+        :param full_copy: callable (src, dst) - backend for new and small files (shutil.copy2 or zeroCopy)
+        :param block_size: int - block size in bytes
+        :param min_size: int - min source size in bytes for delta copy
+        :param signatures_dir: str or pathlike - sidecar dir of signatures files, outside of destination tree;
+                               None - signatures file <dst>.bsig is next to destination file
+        :param dest_root: str or pathlike - destination dir: signatures file path in signatures_dir is destination
+                          file path relative to it
+        """
+        self._full_copy = full_copy
+        self._block_size = block_size
+        self._min_size = min_size
+        self._signatures_dir = signatures_dir
+        self._dest_root = dest_root
+        self._lock = threading.Lock()
+        self.reset_counts()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = dict()
+            self.written, self.saved = 0, 0
+
+    def __call__(self, src: str, dst: str) -> str:
+        """
+        :param src: str or pathlike - source file
+        :param dst: str or pathlike - destination file (not dir)
+        :return: str - COPY_DELTA or method of full copy (COPY_FULL - if full copy backend doesn't return it)
+        """
+        src, dst = str(src), str(dst)
+        if os.path.getsize(src) >= self._min_size and os.path.isfile(dst):
+            written, saved = self._delta(src, dst)
+            method = COPY_DELTA
+        else:
+            method = self._full_copy(src, dst)
+            method = method if isinstance(self._full_copy, zeroCopy) else COPY_FULL
+            written, saved = 0, 0
+        with self._lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
+            self.written += written
+            self.saved += saved
+        return method
+
+    def _delta(self, src: str, dst: str) -> tuple:
+        """
+        write changed blocks of source into destination at the same offsets, cut destination to source size;
+        strong digest is computed only for block with the same weak checksum
+        :return: tuple (bytes written, bytes not written)
+        """
+        sig_file = signatures_file(dst, self._signatures_dir, self._dest_root)
+        old = load_signatures(dst, self._block_size, sig_file)
+        if old is None:
+            old = file_signatures(dst, self._block_size)
+        new = list()
+        written, saved = 0, 0
+        with open(src, 'rb') as fsrc, open(dst, 'r+b') as fdst:
+            for i, block in enumerate(iter(lambda: fsrc.read(self._block_size), b'')):
+                weak = zlib.adler32(block)
+                if i < len(old) and old[i][0] == weak:
+                    if old[i][1] == NO_STRONG:
+                        # block written by last delta copy - compare with destination data
+                        fdst.seek(i * self._block_size)
+                        same, strong = fdst.read(len(block)) == block, NO_STRONG
+                    else:
+                        strong = _strong(block)
+                        same = old[i][1] == strong
+                    if same:
+                        new.append((weak, strong))
+                        saved += len(block)
+                        continue
+                new.append((weak, NO_STRONG))
+                fdst.seek(i * self._block_size)
+                fdst.write(block)
+                written += len(block)
+            fdst.truncate(fsrc.tell())
+        shutil.copystat(src, dst)
+        save_signatures(dst, new, self._block_size, sig_file)
+        return written, saved
@@ -32,11 +32,24 @@ def copyu():
                          destination_subdir=xpars.name,
                          scan_filters=xpars.filters,
                          new_folder_rule=xpars.exist_destination,
-                         archive_format=xpars.zip)
+                         archive_format=xpars.zip,
+                         scan_threads=xpars.scan_threads,
+                         scan_index=xpars.scan_index,
+                         ignore_file=xpars.ignore_file,
+                         filter_stats=xpars.filter_stats,
+                         copy_threads=xpars.copy_threads,
+                         zero_copy=xpars.zero_copy,
+                         skip_unchanged=xpars.skip_unchanged,
+                         modify_window=xpars.modify_window,
+                         delta_copy=xpars.delta_copy,
+                         resume=xpars.resume,
+                         checksum=xpars.checksum,
+                         verify=xpars.verify)
 
     # destination_subdir='BACKUP_{}'.format(dt.datetime.now().strftime('%d_%m_%Y')),
 
-    xCU.run()
+    xCU.run(stream=xpars.stream)
+    xCU.close_log()
 
 if __name__ == "__main__":
     # main()
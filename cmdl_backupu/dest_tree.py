@@ -0,0 +1,147 @@
+"""
+Destination dirs tree creation: every dir is created once, top-down (os.mkdir, not os.makedirs for every file dir),
+known dirs are cached. Dirs of one tree level are created in threads pool - creation time grows with tree depth, not
+with dirs number (for network destinations). Dir not created doesn't stop work: its subtree is not tried and is
+reported as failed, files of other subtrees are copied
+
+    usage:
+        tree = dirsTree(destination_root)
+        tree.make_all(dirs_list)                 # all dirs at once, by levels in threads
+        top = tree.make(dir_path)                # one dir (stream work), None if created (or exists)
+        tree.failed                              # {top dir of not created subtree: OSError}
+        tree.failed_top(dir_path)                # top dir of not created subtree with dir_path or None
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# threads for creation of dirs of one tree level
+DEST_TREE_THREADS = 16
+
+
+def _mkdir(path: str):
+    """
+    :return: None - dir is created or exists; OSError - if dir is not created
+    """
+    try:
+        os.mkdir(path)
+    except FileExistsError as e:
+        if not os.path.isdir(path):
+            return e
+    except OSError as e:
+        return e
+    return None
+
+
+class dirsTree:
+    """
+    create dirs in root dir top-down with cache of created dirs; failed dirs are kept with error
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: str or pathlike - root dir of tree (it and its parents are created by os.makedirs at first make)
+        """
+        self._root = os.path.normpath(str(root))
+        self._known = set()
+        # dir in failed subtree -> top dir of subtree
+        self._bad = dict()
+        self.failed = dict()
+
+    def _make_root(self) -> bool:
+        if self._root in self._known:
+            return True
+        if self._root in self._bad:
+            return False
+        try:
+            os.makedirs(self._root, exist_ok=True)
+        except OSError as e:
+            self.failed[self._root] = e
+            self._bad[self._root] = self._root
+            return False
+        self._known.add(self._root)
+        return True
+
+    def _missing(self, path: str) -> list:
+        """
+        :return: list of dirs from path up to the first known (or failed) dir, not including it
+        """
+        missing = list()
+        while path not in self._known and path not in self._bad:
+            missing.append(path)
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return missing
+
+    def failed_top(self, path: str):
+        """
+        :param path: str or pathlike - dir
+        :return: str - top dir of not created subtree, which contains dir; None - dir is not in failed subtree
+        """
+        path = os.path.normpath(str(path))
+        return self._stop_top(path, self._missing(path))
+
+    def _stop_top(self, path: str, missing: list):
+        # walk from path up is stopped by known or failed dir
+        return self._bad.get(os.path.dirname(missing[-1]) if missing else path)
+
+    def make(self, path: str):
+        """
+        create dir and its not known parents top-down
+        :param path: str or pathlike - dir
+        :return: str - top dir of not created subtree with dir; None - dir is created or exists
+        """
+        if not self._make_root():
+            return self._root
+        path = os.path.normpath(str(path))
+        missing = self._missing(path)
+        top = self._stop_top(path, missing)
+        if top is None:
+            for i in range(len(missing) - 1, -1, -1):
+                err = _mkdir(missing[i])
+                if err is not None:
+                    top = missing[i]
+                    self.failed[top] = err
+                    break
+                self._known.add(missing[i])
+            else:
+                return None
+        for d in missing:
+            if d not in self._known:
+                self._bad[d] = top
+        return top
+
+    def make_all(self, dirs, threads: int = DEST_TREE_THREADS) -> dict:
+        """
+        create dirs and their not known parents level by level, dirs of one level - in threads pool
+        :param dirs: iterable of str or pathlike - dirs
+        :param threads: int - threads number
+        :return: dict {top dir of not created subtree: OSError} - new failed subtrees
+        """
+        if not self._make_root():
+            return {self._root: self.failed[self._root]}
+        levels, seen = dict(), set()
+        for path in dirs:
+            for d in self._missing(os.path.normpath(str(path))):
+                if d in seen:
+                    break
+                seen.add(d)
+                levels.setdefault(d.count(os.sep), list()).append(d)
+        failed = dict()
+        with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+            for depth in sorted(levels):
+                level = list()
+                for d in levels[depth]:
+                    top = self._bad.get(os.path.dirname(d))
+                    if top is not None:
+                        self._bad[d] = top
+                    else:
+                        level.append(d)
+                for d, err in zip(level, pool.map(_mkdir, level)):
+                    if err is None:
+                        self._known.add(d)
+                    else:
+                        self._bad[d] = d
+                        self.failed[d] = failed[d] = err
+        return failed
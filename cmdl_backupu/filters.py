@@ -29,17 +29,41 @@ this class - a list of dictionaries with file attributes (name, full path, date,
 
     usage filter object on list of some items like this:
         result_filtering = list(filter(x_filter.check, items_list))
+
+    re filters of the same class, color and case can be fused in one filter with one re-expression (fuse_filters) -
+    xScan checks files by fused filters
+
+    filters on dir path (BLACK filterFilePath and filterDirName) can tell xScan that no file in some dir subtree
+    can pass them (function 'prunes_dir') - such subtree is not walked at all
+
+    every filter tells what file info keys it checks (attribute 'fields'): filters on path, name and extension need
+    no file stat data - xScan applies them first and reads stat data only for files passed them
 """
 import datetime as dt
+import json
 import operator as op
 import os
 import pathlib
 import re
 import subprocess
+import time
 from abc import ABC, abstractmethod
+from itertools import compress, islice
 from enum import Enum  # , auto
 from pathlib import Path
 
+from cmdl_backupu.attrib import archive_provider
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from re import _parser as sre_parse  # python 3.11 ->
+except ImportError:
+    import sre_parse
+
 
 class filter_type(Enum):
     PATH = 1  # auto()
@@ -69,12 +93,116 @@ class filter_color(Enum):
     RED = 3
 
 
+def _re_nodes(parsed):
+    """
+    :param parsed: sre_parse.SubPattern - parsed re-expression
+    :return: generator of all (opcode, argument) pairs of parsed re-expression, include nested
+    """
+    for op, av in parsed:
+        yield op, av
+        for x in (av if isinstance(av, (list, tuple)) else (av,)):
+            if isinstance(x, sre_parse.SubPattern):
+                yield from _re_nodes(x)
+            elif isinstance(x, (list, tuple)):
+                for y in x:
+                    if isinstance(y, sre_parse.SubPattern):
+                        yield from _re_nodes(y)
+
+
+def re_prefix_stable(pattern: str) -> bool:
+    """
+    check re-expression: if it found in some string, will it be found in any string made by appending path separator
+    and anything to this string (so if it found in dir path, it found in path of any file in dir subtree)?
+    It is so if re-expression don't look at string end or forward (no $, \\Z, lookahead) and have no atomic groups
+    or possessive repeats (they can lose match on longer string)
+    :param pattern: str - re-expression
+    :return: bool - True if re-expression is prefix-stable, False if it is not or can't be parsed
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return False
+
+    for op, av in _re_nodes(parsed):
+        if op.name == 'AT' and av.name in ('AT_END', 'AT_END_LINE', 'AT_END_STRING'):
+            return False
+        if op.name in ('ASSERT', 'ASSERT_NOT') and av[0] == 1:
+            return False
+        if op.name in ('ATOMIC_GROUP', 'POSSESSIVE_REPEAT'):
+            return False
+    return True
+
+
+# max number of memorized check results of filter by dirs (see filterFilePath) - memory is freed when it is full
+DIR_MEMO_SIZE = 100000
+
+
+def _dir_of(path: str) -> str:
+    """
+    :return: str - dir part of file path (without trailing separator) as it is written in path, not normalized
+    """
+    i = path.rfind(os.sep)
+    if os.altsep:
+        i = max(i, path.rfind(os.altsep))
+    return path[:max(i, 0)]
+
+
 class abcFilter(ABC):
     """  base class for all filters  """
 
+    # keys of file info (xScan) used by s_check - xScan reads file stat data only for files it needed for
+    fields = ('path', 'change_date', 'create_date', 'size', 'mode', 'ext', 'A-attr', 'name')
+
+    # keys of columns used by mask (see FILE_COLUMNS) - empty if filter can't check columns; filter with
+    # vector_fields defines mask(columns: dict) -> numpy.ndarray of bool - filtering of many items at once (numpy)
+    vector_fields = ()
+
     def __init__(self, color: filter_color = filter_color.WHITE):
         assert isinstance(color, filter_color)
         self._color = color
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        set to zero counters of counted checks (counted_check, counted_mask): number of checked items (evaluations),
+        passed and rejected items, time of checks in seconds
+        """
+        self.evaluations, self.passes, self.rejects, self.time = 0, 0, 0, 0.0
+
+    def counted_check(self, item: dict) -> bool:
+        """
+        s_check with counting of evaluations, passes, rejects and time
+        """
+        t0 = time.perf_counter()
+        res = self.s_check(item)
+        self.time += time.perf_counter() - t0
+        self.evaluations += 1
+        if res:
+            self.passes += 1
+        else:
+            self.rejects += 1
+        return res
+
+    def counted_mask(self, columns: dict):
+        """
+        mask (filters with vector_fields only) with counting of evaluations, passes, rejects and time
+        """
+        t0 = time.perf_counter()
+        res = self.mask(columns)
+        self.time += time.perf_counter() - t0
+        passes = int(res.sum())
+        self.evaluations += len(res)
+        self.passes += passes
+        self.rejects += len(res) - passes
+        return res
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: dict - filter (str) and counters of counted checks
+        """
+        return {'filter': str(self), 'evaluations': self.evaluations, 'passes': self.passes,
+                'rejects': self.rejects, 'time': self.time}
 
     @property
     def type(self) -> filter_type:
@@ -117,6 +245,14 @@ class abcFilter(ABC):
     def rule(self):
         return self._rule
 
+    def prunes_dir(self, dir_path: str) -> bool:
+        """
+        check if no file in dir subtree can pass filter - so this subtree needn't be walked at all
+        :param dir_path: str - full dir path
+        :return: bool - True only if it is sure that all files in dir subtree will be rejected by filter
+        """
+        return False
+
     def __str__(self):
         # for python 3.10 ->
         # return f'{self.color.name} filter on {self.type.name} ({self.subtype.name}); rule = {self.rule}'
@@ -142,6 +278,7 @@ class filterFilePath(abcFilter):
     class for filter on full file path, working on item['path'] scanned file list, for rule use re-expressions
     base class for filtering on name, dirs and extension classes
     """
+    fields = ('path',)
 
     def __init__(self, color=filter_color.BLACK, case=string_case.STRICT, rule: str = '', strBasePath=''):
         """
@@ -167,9 +304,10 @@ class filterFilePath(abcFilter):
         self._compile()
 
         if self.color == filter_color.BLACK:
-            self._check_func = lambda item: self._search.search(self._path_transform(item)) is None
+            self._str_check = lambda s: self._search.search(s) is None
         else:
-            self._check_func = lambda item: self._search.search(self._path_transform(item)) is not None
+            self._str_check = lambda s: self._search.search(s) is not None
+        self._check_func = lambda item: self._str_check(self._path_transform(item))
 
     def _path_transform(self, file_path):
         """
@@ -193,15 +331,84 @@ class filterFilePath(abcFilter):
         _s = '; string case: {case}, exclude path {base_path}'
         return super().__str__() + _s.format(case=self.case.name, base_path=self.BasePath)
 
+    @property
+    def BasePath(self) -> str:
+        return self._base_path
+
+    @BasePath.setter
+    def BasePath(self, value: str):
+        abcFilter.BasePath.fset(self, value)
+        self._dir_memo = dict()
+
     def check(self, item):
         return self._check_func(item)
 
     def s_check(self, item):
-        return self._check_func(item['path'])
+        """
+        rule, found in dir path, is found in path of every file in dir (if rule is prefix-stable) - so it is searched
+        in dir path once for every dir; file path is searched only for files in dirs, where it is not found.
+        For fileRecord of scan of filter base path, working part of path is taken from record (fileRecord.rel_to)
+        """
+        if isinstance(item, dict):
+            key = _dir_of(item['path'])
+            rel = None
+        else:
+            # dir prefix of record is the same object for all files of dir - memo key without slicing
+            key = item.dir_prefix
+            rel = item.rel_to(self._base_path)
+        found = self._dir_memo.get(key)
+        if found is None:
+            found = self._dir_found(key if isinstance(item, dict) else _dir_of(key))
+            self._memorize(key, found)
+        if found:
+            return self.color != filter_color.BLACK
+        return self._check_func(item['path']) if rel is None else self._str_check(rel)
+
+    def _memorize(self, dir_path: str, result: bool):
+        if len(self._dir_memo) >= DIR_MEMO_SIZE:
+            self._dir_memo = dict()
+        self._dir_memo[dir_path] = result
+
+    def _dir_found(self, dir_path: str) -> bool:
+        """
+        :param dir_path: str - full dir path
+        :return: bool - True if rule is found in dir path and so in path of any file in dir
+        """
+        if self._prefix_stable is None:
+            self._prefix_stable = re_prefix_stable(self._search.pattern)
+        if not self._prefix_stable:
+            return False
+        _dir = self._dir_transform(dir_path)
+        # in files of base dir (empty working part of dir path) next char is not separator: \b, \B can differ
+        return bool(_dir) and self._search.search(_dir) is not None
+
+    def _dir_transform(self, dir_path: str) -> str:
+        """
+        get working part of dir path - the same as _path_transform get for files in this dir
+        :param dir_path: str - full dir path
+        :return: str - working part of dir path; None - if dir path can't be transformed the same way as file path
+        """
+        return dir_path[len(self._base_path) + 1:]
+
+    def prunes_dir(self, dir_path: str) -> bool:
+        """
+        BLACK filter on file path (or dir path) rejects all files in dir subtree, if its rule found in dir path and rule
+        will be found in any longer path too (see re_prefix_stable)
+        """
+        if self.color != filter_color.BLACK or self.type not in (filter_type.PATH, filter_type.DIR):
+            return False
+        if self._prefix_stable is None:
+            self._prefix_stable = re_prefix_stable(self._search.pattern)
+        if not self._prefix_stable:
+            return False
+        _dir = self._dir_transform(dir_path)
+        return _dir is not None and self._search.search(_dir) is not None
 
     def _compile(self):
         strF = self._str_pre + self._rule
         self._search = re.compile(strF)
+        self._prefix_stable = None
+        self._dir_memo = dict()  # check results by dirs: {dir path: result}
         return self._search
 
 
@@ -209,6 +416,7 @@ class filterFileName(filterFilePath):
     """
     class for filter on file name only
     """
+    fields = ('name',)
 
     def __init__(self, color=filter_color.BLACK, case=string_case.STRICT, rule=''):
         super().__init__(color=color, case=case, rule=rule)
@@ -216,14 +424,16 @@ class filterFileName(filterFilePath):
         self._type = filter_type.FILE
         self._subtype = filter_subtype.NAME
 
+    def s_check(self, item):
+        # file name without extension is in file info already (scan made it once, without path parsing)
+        return self._str_check(item['name'])
+
     def _path_transform(self, path_string: str) -> str:
         """
         get file name without extension from full path
         :param path_string: string - full file path
         :return: string - file name
         """
-        # print(os.path.splitext(os.path.split(path_string)[-1])[0], Path(path_string).stem, Path(path_string).name)
-        _x = Path(path_string).stem
         return Path(path_string).stem
 
 
@@ -231,6 +441,7 @@ class filterFileExt(filterFilePath):
     """
     class for filter on file extension only
     """
+    fields = ('ext',)
 
     def s_check(self, item):
         return self._check_func(item['ext'])
@@ -241,10 +452,29 @@ class filterFileExt(filterFilePath):
         self._type = filter_type.FILE
         self._subtype = filter_subtype.EXT
 
-        if self.color == filter_color.BLACK:
-            self._check_func = lambda item: self._search.search(item) is None
-        else:
-            self._check_func = lambda item: self._search.search(item) is not None
+        # scanned files have few different extensions - check every extension once
+        self._memo = dict()
+        self._literals = None
+        self._check_func = self._memo_check
+
+    def _memo_check(self, ext: str) -> bool:
+        res = self._memo.get(ext)
+        if res is None:
+            if self._literals is not None:
+                # '$' matches before line end at string end too
+                res = ext in self._literals or (ext[-1:] == '\n' and ext[:-1] in self._literals)
+            else:
+                res = self._search.search(ext) is not None
+            res = res != (self.color == filter_color.BLACK)
+            if len(self._memo) < EXT_MEMO_SIZE:
+                self._memo[ext] = res
+        return res
+
+    def _compile(self):
+        super()._compile()
+        self._memo = dict()
+        self._literals = None
+        return self._search
 
 
 class filterDirName(filterFilePath):
@@ -258,6 +488,17 @@ class filterDirName(filterFilePath):
         self._subtype = filter_subtype.NAME
         self._type = filter_type.DIR
 
+    def s_check(self, item):
+        """
+        result is the same for all files in dir - check first file of every dir, take result for others
+        """
+        key = _dir_of(item['path']) if isinstance(item, dict) else item.dir_prefix
+        res = self._dir_memo.get(key)
+        if res is None:
+            res = self._check_func(item['path'])
+            self._memorize(key, res)
+        return res
+
     def _path_transform(self, path_string: str) -> str:
         """
         get file path exclude name and ext
@@ -266,6 +507,12 @@ class filterDirName(filterFilePath):
         """
         return str(pathlib.Path(path_string).parent)[len(self.BasePath) + 1:]
 
+    def _dir_transform(self, dir_path: str) -> str:
+        # _path_transform normalize path by pathlib - prune only dirs with already normalized path
+        if str(pathlib.Path(dir_path)) != dir_path:
+            return None
+        return dir_path[len(self.BasePath) + 1:]
+
 
 # =================== end file path-names filters - using re =========================
 
@@ -277,10 +524,22 @@ class fAbcRange(abcFilter):
             opl = op.ge if self.left_margin else op.gt
             opr = op.le if self.right_margin else op.lt
             self._check_func = lambda x: opl(x, self.low_level) & opr(x, self.hight_level)
+            self._range_func = lambda x, low, high: opl(x, low) & opr(x, high)
         else:
             opl = op.le if self.left_margin else op.lt
             opr = op.ge if self.right_margin else op.gt
             self._check_func = lambda x: (opl(x, self.low_level) | opr(x, self.hight_level))
+            self._range_func = lambda x, low, high: opl(x, low) | opr(x, high)
+
+    def _column_level(self, level):
+        """
+        for re-define in child classes - get range margin in units of column
+        """
+        return level
+
+    def mask(self, columns: dict):
+        return self._range_func(columns[self.vector_fields[0]],
+                                self._column_level(self.low_level), self._column_level(self.hight_level))
 
     def __init__(self, color: filter_color = filter_color.WHITE,
                  low_level: int = None, high_level: int = None,
@@ -341,6 +600,8 @@ class filterFileSize(fAbcRange):
     """
     filter for file size in bytes
     """
+    fields = ('size',)
+    vector_fields = ('size',)
 
     def check(self, item) -> bool:
         st = os.stat(item)
@@ -391,6 +652,8 @@ class filterFileDateRange(fAbcRange):
     """
     filter for file change datetime
     """
+    fields = ('change_date',)
+    vector_fields = ('mtime_us',)
 
     def check(self, item) -> bool:
         st = os.stat(item)
@@ -437,6 +700,15 @@ class filterFileDateRange(fAbcRange):
         self.hight_level = hdate
         self._compile()
 
+    def _column_level(self, level):
+        # change_date is local time made from epoch time (datetime.fromtimestamp) - the same way back
+        if not isinstance(level, dt.datetime):
+            level = dt.datetime.combine(level, dt.time())
+        try:
+            return int(level.replace(microsecond=0).timestamp()) * 10 ** 6 + level.microsecond
+        except (OverflowError, ValueError, OSError):
+            return np.iinfo(np.int64).max if level > dt.datetime.now() else np.iinfo(np.int64).min
+
     @property
     def rule(self):
         return {'low_date': self.low_date.strftime('%Y-%m-%d %H:%M'),
@@ -448,6 +720,7 @@ class filterFileDateExact(filterFileDateRange):
     """
     filter of file change date exactly
     """
+    vector_fields = ()
 
     def _compile(self):
         if self.color in [filter_color.WHITE, filter_color.RED]:
@@ -487,6 +760,7 @@ class filterArchAttrib(abcFilter):
     filter for archive file attribute - WORK ONLY FOR Windows OS!
     for linux return actual a-atrib value (False for WHITE and True for BLACK - a-atrib not setting up)
     """
+    fields = ('A-attr',)
 
     def __init__(self, color: filter_color = filter_color.WHITE):
         super().__init__(color=color)
@@ -497,11 +771,7 @@ class filterArchAttrib(abcFilter):
         self._check_func = op.eq if self.color in [filter_color.WHITE, filter_color.RED] else op.ne
 
     def check(self, strPath: str) -> bool:
-        xr = subprocess.check_output(['attrib', strPath])
-        try:
-            return self._check_func(chr(xr[0]), 'A')
-        except IndexError:
-            return False
+        return self._check_func(archive_provider().archive(strPath), True)
 
     def s_check(self, item):
         _d = {filter_color.WHITE: item['A-attr'],
@@ -521,3 +791,332 @@ class filterArchAttrib(abcFilter):
         return _s.format(color=self.color.name, type=self.type.name, rule=self.rule)
 
 # =================== end file attributes filters (windows, A-attr) =============================
+
+
+# =================== filters stats =============================
+
+def filters_stats(filters: list) -> list:
+    """
+    :param filters: list of abcFilter
+    :return: list of dicts - stats of every filter (abcFilter.stats) and its part of all rejects and time
+    """
+    stats = [f.stats for f in filters]
+    rejects = sum(st['rejects'] for st in stats) or 1
+    time_all = sum(st['time'] for st in stats) or 1
+    for st in stats:
+        st['reject_share'] = st['rejects'] / rejects
+        st['time_share'] = st['time'] / time_all
+    return stats
+
+
+def save_filters_stats(filters: list, file_name: str):
+    """
+    save stats of filters (filters_stats) to json file
+    :param filters: list of abcFilter
+    :param file_name: str or pathlike - json file
+    """
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(filters_stats(filters), f, indent=2, ensure_ascii=False)
+
+# =================== end filters stats =============================
+
+
+# =================== fused filters - rules of many re filters in one re-expression =============================
+
+# max number of memorized check results (by extension) of filter on file extension
+EXT_MEMO_SIZE = 4096
+
+# re filters classes, which rules (of the same color and case) can be fused in one re-expression
+FUSABLE_FILTERS = (filterFilePath, filterFileName, filterFileExt, filterDirName)
+
+_RE_GLOBAL_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE | re.ASCII
+
+
+def re_fusable(pattern: str) -> bool:
+    """
+    check re-expression: will it be found in the same strings, if it is one alternative (named group) of bigger
+    re-expression? It is so if it has no back references and named groups (numbers and names of groups are changed
+    in alternation) and no global inline flags (they act on all alternation)
+    :param pattern: str - re-expression
+    :return: bool - True if re-expression can be fused, False if it can't or can't be parsed
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return False
+    if parsed.state.groupdict or parsed.state.flags & _RE_GLOBAL_FLAGS:
+        return False
+    return not any(code.name in ('GROUPREF', 'GROUPREF_EXISTS') for code, av in _re_nodes(parsed))
+
+
+def re_literal(pattern: str):
+    """
+    :param pattern: str - re-expression
+    :return: str - the only string, re-expression is found in, if it is ^literal$; None for other re-expressions
+    """
+    try:
+        parsed = list(sre_parse.parse(pattern))
+    except Exception:
+        return None
+    if len(parsed) < 2 or parsed[0] != (sre_parse.AT, sre_parse.AT_BEGINNING) or \
+            parsed[-1] != (sre_parse.AT, sre_parse.AT_END):
+        return None
+    if not all(code == sre_parse.LITERAL for code, av in parsed[1:-1]):
+        return None
+    return ''.join(chr(av) for code, av in parsed[1:-1])
+
+
+def fuse_filters(filters: list) -> list:
+    """
+    replace re filters of the same class, color (WHITE or BLACK), case and base path by one filter with all their
+    rules in one re-expression - alternation of named groups (?P<r0>rule0)|(?P<r1>rule1)...; file pass the fused
+    filter exactly as it pass the filters one by one (WHITE: any rule is found, BLACK: no rule is found);
+    RED filters (all rules must be found) and rules, that can't be alternatives (see re_fusable) are kept as is.
+    Fused filter on extension with ^literal$ rules only (and STRICT case) looks extension up in frozenset
+    (rules without ^$ are found inside extension: rule 'py' is found in 'pyc' - so they can't be a set)
+    :param filters: list of abcFilter
+    :return: list of abcFilter - fused filters (in place of the first of their filters) and not fused filters;
+             fused filter has list of source filters in attribute 'fused'
+    """
+    same = dict()
+    for f in filters:
+        if type(f) in FUSABLE_FILTERS and f.color in [filter_color.WHITE, filter_color.BLACK] and \
+                re_fusable(f.rule):
+            same.setdefault((type(f), f.color, f.case, f.BasePath), list()).append(f)
+
+    fused = dict()
+    for (cls, color, case, base_path), group in same.items():
+        if len(group) < 2:
+            continue
+        rule = '|'.join('(?P<r{0}>{1})'.format(i, f.rule) for i, f in enumerate(group))
+        f_fused = cls(color=color, case=case, rule=rule)
+        f_fused._base_path = base_path
+        f_fused.fused = group
+        if cls == filterFileExt and case == string_case.STRICT:
+            literals = [re_literal(f.rule) for f in group]
+            if None not in literals:
+                f_fused._literals = frozenset(literals)
+        for f in group:
+            fused[id(f)] = f_fused
+
+    res = list()
+    for f in filters:
+        f = fused.get(id(f), f)
+        if f not in res:
+            res.append(f)
+    return res
+
+# =================== end fused filters =============================
+
+
+# =================== filters plan - all filters in one pass =============================
+
+# file info keys known from dir listing, without file stat
+STAT_FREE_FIELDS = {'path', 'ext', 'name'}
+
+# number of checked items, after which plan order checks by their time and rejection rate
+PLAN_SAMPLE_SIZE = 1000
+# plan samples PLAN_SAMPLE_SIZE items of every PLAN_RESAMPLE_STEP items
+PLAN_RESAMPLE_STEP = 10000
+
+# columns of file info for mask of filters (abcFilter.mask): int64 size in bytes, change time in microseconds
+FILE_COLUMNS = ('size', 'mtime_us')
+
+_NO_ITEM = object()
+
+
+def stat_free(f: abcFilter) -> bool:
+    """
+    :return: bool - True if filter check no file stat data (only path, name, extension)
+    """
+    return set(f.fields) <= STAT_FREE_FIELDS
+
+
+class filterPlan:
+    """
+    compiled plan of filters list: check every item once, with the same rules as filtering by filters one by one
+    (WHITE filters first, BLACK, RED last): item must pass at least one WHITE filter of every filter class and all
+    BLACK and RED filters. So plan is AND of checks (groups): one group for every class of WHITE filters (OR of them)
+    and for every BLACK and RED filter. Checks stop on the first failed group. re filters of the same class, color
+    and case are fused in one filter first (fuse_filters).
+
+    Groups without file stat data go first. On PLAN_SAMPLE_SIZE items of every PLAN_RESAMPLE_STEP items plan
+    measures time and rejection rate of every group, then orders groups (stat free first) by time / rejection rate -
+    cheap and selective checks first (scanned files go dir by dir, so selectivity of checks changes on the way)
+
+    If numpy is installed and columns of file info are given, groups of filters with columns check (size and date
+    ranges) are checked for all items at once (mask), other groups - item by item for items passed the mask
+
+    With stats=True every filter counts its evaluations, passes, rejects and time (abcFilter.counted_check) -
+    filters are not fused then; file rejected by one check is not checked by next ones, so counters depend on order
+
+        usage:
+            plan = filterPlan(filters)
+            passed = plan.filter(items)    # or list(filter(plan, items))
+            passed = plan.filter(items, columns={'size': ..., 'mtime_us': ...})
+    """
+
+    def __init__(self, filters: list, stats: bool = False):
+        """
+        :param filters: list of abcFilter objects
+        :param stats: bool - True: count checks of every filter (abcFilter.stats)
+        """
+        self._count = stats
+        if not stats:
+            filters = fuse_filters(filters)
+        white = dict()
+        for f in filter(lambda x: x.color == filter_color.WHITE, filters):
+            white.setdefault(type(f), list()).append(f)
+        groups = list(white.values())
+        groups += [[f] for f in filters if f.color in [filter_color.BLACK, filter_color.RED]]
+        groups.sort(key=lambda g: not all(stat_free(f) for f in g))
+
+        self._groups = groups
+        self._checks = [self._group_check(g, stats) for g in groups]
+        self._stat_free = [all(stat_free(f) for f in g) for g in groups]
+        self._seen = 0
+        # no sampling for one check - nothing to order
+        self._step = PLAN_RESAMPLE_STEP if len(groups) > 1 else -1
+
+        self._vector_groups = [g for g in groups if np is not None and all(f.vector_fields for f in g)]
+        self._rest = None
+        self._free, self._rest_stat = None, None
+
+    @staticmethod
+    def _group_check(group: list, stats: bool = False):
+        checks = [f.counted_check if stats else f.s_check for f in group]
+        if len(group) == 1:
+            return checks[0]
+
+        def check(item):
+            for c in checks:
+                if c(item):
+                    return True
+            return False
+
+        return check
+
+    @property
+    def groups(self) -> list:
+        """
+        :return: list of lists of abcFilter - groups of filters in check order
+        """
+        return self._groups
+
+    @property
+    def vectorized(self) -> bool:
+        """
+        :return: bool - True if plan has groups of filters, checked by columns of file info (see filter)
+        """
+        return len(self._vector_groups) > 0
+
+    def mask(self, columns: dict):
+        """
+        check columns of file info by groups of filters with columns check (WHITE filters of one class - OR)
+        :param columns: dict {FILE_COLUMNS key: numpy.ndarray} - columns of file info, the same length
+        :return: numpy.ndarray of bool - True for items passed all these groups
+        """
+        res = np.ones(len(columns[FILE_COLUMNS[0]]), dtype=bool)
+        for group in self._vector_groups:
+            masks = [f.counted_mask(columns) if self._count else f.mask(columns) for f in group]
+            res &= np.logical_or.reduce(masks)
+        return res
+
+    def _sampling(self) -> bool:
+        return self._step > 0 and self._seen % self._step < PLAN_SAMPLE_SIZE
+
+    def _sample_check(self, item) -> bool:
+        if self._seen % self._step == 0:
+            self._rejected = [0] * len(self._groups)
+            self._time = [0.0] * len(self._groups)
+        self._seen += 1
+
+        result = True
+        for i, check in enumerate(self._checks):
+            t0 = time.perf_counter()
+            passed = check(item)
+            self._time[i] += time.perf_counter() - t0
+            if not passed:
+                self._rejected[i] += 1
+                result = False
+                break
+
+        if self._seen % self._step == PLAN_SAMPLE_SIZE:
+            self._reorder()
+        return result
+
+    def _reorder(self):
+        # expected time of AND checks is minimal if they are ordered by time / rejection rate
+        cost = [t / r if r else float('inf') for t, r in zip(self._time, self._rejected)]
+        order = sorted(range(len(self._groups)), key=lambda i: (not self._stat_free[i], cost[i]))
+        self._groups = [self._groups[i] for i in order]
+        self._checks = [self._checks[i] for i in order]
+        self._stat_free = [self._stat_free[i] for i in order]
+
+    def __call__(self, item) -> bool:
+        """
+        :param item: dict (fileRecord) with file info
+        :return: bool - True if item passed all filters
+        """
+        if self._sampling():
+            return self._sample_check(item)
+        self._seen += 1
+        for check in self._checks:
+            if not check(item):
+                return False
+        return True
+
+    def _sub_plan(self, groups: list):
+        return filterPlan([f for g in groups for f in g], stats=self._count)
+
+    def filter(self, items, columns=None) -> list:
+        """
+        :param items: iterable of dicts (fileRecords) with file info
+        :param columns: dict {FILE_COLUMNS key: numpy.ndarray} or None - columns of file info of items; or
+                        function (list of items) -> columns or None - then groups without file stat data are checked
+                        item by item first and columns are made only for items passed them (stat data of rejected
+                        items is not read)
+        :return: list of items passed all filters
+        """
+        if callable(columns) and self.vectorized:
+            if self._free is None:
+                free = [g for g, is_free in zip(self._groups, self._stat_free) if is_free]
+                self._free = self._sub_plan(free)
+                self._rest_stat = self._sub_plan([g for g in self._groups
+                                                  if g not in free and g not in self._vector_groups])
+            items = self._free.filter(items) if self._free.groups else list(items)
+            columns = columns(items)
+            if columns is None:
+                return self._sub_plan([g for g, is_free in zip(self._groups, self._stat_free)
+                                       if not is_free]).filter(items)
+            return self._rest_stat.filter(compress(items, self.mask(columns)))
+
+        if columns is not None and self.vectorized:
+            if self._rest is None:
+                self._rest = filterPlan([f for g in self._groups if g not in self._vector_groups for f in g],
+                                        stats=self._count)
+            return self._rest.filter(compress(items, self.mask(columns)))
+
+        res = list()
+        items = iter(items)
+        while True:
+            while self._sampling():
+                item = next(items, _NO_ITEM)
+                if item is _NO_ITEM:
+                    return res
+                if self._sample_check(item):
+                    res.append(item)
+
+            # till next sample - without measuring
+            checks = self._checks
+            for item in islice(items, self._step - self._seen % self._step if self._step > 0 else None):
+                self._seen += 1
+                for check in checks:
+                    if not check(item):
+                        break
+                else:
+                    res.append(item)
+            if self._step < 0 or self._seen % self._step:
+                return res
+
+# =================== end filters plan =============================
@@ -84,9 +84,9 @@ class xCopyGCS(xCopyU):
         destination - goggle cloud storage bucket, so do nothing - pass
         :param files:
         :param do_create_tree:
-        :return:
+        :return: empty set - all dirs are "created"
         """
-        pass
+        return set()
 
     def _upload_blob(self, src, dst):
         """
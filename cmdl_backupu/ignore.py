@@ -0,0 +1,260 @@
+"""
+gitignore-style ignore files (.backupignore) for xScan: files and dirs matched by them are not scanned -
+ignored dirs are not listed at all
+
+Ignore file can be placed in any dir of source tree, its patterns are relative to its dir. Syntax (as .gitignore):
+    blank lines and lines starting with # are skipped; \\# and \\! escape first char; trailing spaces are stripped
+    !pattern - negation: re-include file (or dir) excluded by previous patterns; file in excluded dir can't be
+               re-included (dir is not walked)
+    pattern/ - matches dirs only
+    /pattern, dir/pattern - pattern with separator (not only at end) is anchored to ignore file dir, pattern without
+               separator matches name at any level below ignore file dir
+    * - anything except separator, ? - any one char except separator, [a-z], [!a-z] - char classes
+    **/pattern - in any dir, pattern/** - everything inside, a/**/b - zero or more dirs between
+Last matched pattern wins; patterns of ignore file in deeper dir win over patterns of ignore files above it
+
+Patterns of one ignore file are compiled once: plain names (no wildcards, no separator) - to sets of names,
+other patterns - to one re-expression (alternation), checked by one match call; ignore files with negations keep
+patterns list, checked from the last one
+
+    usage:
+        ignore = backupIgnore('/home/egor/source')
+        xScan(start_path='/home/egor/source', ignore=ignore)
+"""
+import os
+import re
+
+# name of ignore files
+IGNORE_FILE_NAME = '.backupignore'
+
+_NAME, _RE = 1, 2
+
+
+def _translate(pattern: str) -> str:
+    """
+    translate gitignore glob (without leading !, / and trailing /) to re-expression for whole relative path
+    (separator '/') from ignore file dir
+    :param pattern: str - glob
+    :return: str - re-expression
+    """
+    res = ''
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            res += '(?:.*/)?'
+            i += 3
+            continue
+        if pattern.startswith('**', i) and i + 2 == n and (i == 0 or pattern[i - 1] == '/'):
+            res += '.*'
+            i += 2
+            continue
+        if c == '*':
+            res += '[^/]*'
+        elif c == '?':
+            res += '[^/]'
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            res += re.escape(pattern[i])
+        elif c == '[':
+            # ']' right after '[' (or '[!') is a char of class
+            j = pattern.find(']', i + 3 if pattern[i + 1:i + 2] in ['!', '^'] else i + 2)
+            if j < 0:
+                res += re.escape(c)
+            else:
+                body = pattern[i + 1:j]
+                neg = body[:1] in ['!', '^']
+                body = body[1:] if neg else body
+                res += '(?!/)[{0}{1}]'.format('^' if neg else '', body.replace('\\', '\\\\'))
+                i = j
+        else:
+            res += re.escape(c)
+        i += 1
+    return res
+
+
+def parse_pattern(line: str):
+    """
+    parse line of ignore file
+    :param line: str - line of ignore file
+    :return: tuple (kind, value, negate, dir_only) - kind _NAME (value - plain name at any level) or _RE (value -
+             re-expression for relative path); None for blank and comment lines
+    """
+    line = line.rstrip('\n').rstrip('\r')
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    anchored = '/' in line
+    line = line.lstrip('/')
+    if not anchored and not any(c in line for c in '*?[\\'):
+        return _NAME, line, negate, dir_only
+    return _RE, ('' if anchored else '(?:.*/)?') + _translate(line), negate, dir_only
+
+
+class ignoreRules:
+    """
+    compiled patterns of one ignore file
+    """
+
+    def __init__(self, dir_path: str, lines: list):
+        """
+        :param dir_path: str - dir of ignore file (patterns are relative to it)
+        :param lines: list of str - lines of ignore file
+        """
+        self._dir = dir_path
+        self._cut = len(os.path.join(dir_path, ''))
+        self._rules = [r for r in map(parse_pattern, lines) if r is not None]
+        self._negated = any(r[2] for r in self._rules)
+
+        if self._negated:
+            self._rules = [(kind, re.compile(value) if kind == _RE else value, negate, dir_only)
+                           for kind, value, negate, dir_only in reversed(self._rules)]
+        else:
+            self._names = frozenset(r[1] for r in self._rules if r[0] == _NAME and not r[3])
+            self._dir_names = frozenset(r[1] for r in self._rules if r[0] == _NAME and r[3])
+            self._re = self._alternation([r[1] for r in self._rules if r[0] == _RE and not r[3]])
+            self._dir_re = self._alternation([r[1] for r in self._rules if r[0] == _RE and r[3]])
+
+    @staticmethod
+    def _alternation(patterns: list):
+        return re.compile('|'.join('(?:{})'.format(p) for p in patterns)) if patterns else None
+
+    @property
+    def dir_path(self) -> str:
+        return self._dir
+
+    def __len__(self):
+        return len(self._rules)
+
+    def match(self, path: str, is_dir: bool):
+        """
+        :param path: str - full path of file or dir inside ignore file dir
+        :param is_dir: bool - True for dir
+        :return: True - path is ignored, False - re-included by negation, None - no pattern matches
+        """
+        rel = path[self._cut:]
+        if os.sep != '/':
+            rel = rel.replace(os.sep, '/')
+        name = rel[rel.rfind('/') + 1:]
+
+        if not self._negated:
+            if name in self._names or (is_dir and name in self._dir_names):
+                return True
+            if self._re is not None and self._re.fullmatch(rel):
+                return True
+            if is_dir and self._dir_re is not None and self._dir_re.fullmatch(rel):
+                return True
+            return None
+
+        for kind, value, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if (name == value) if kind == _NAME else value.fullmatch(rel):
+                return not negate
+        return None
+
+
+class backupIgnore:
+    """
+    ignore files of source tree: load ignore file of every walked dir (once) and check files and sub-dirs by ignore
+    files of their dir and all dirs above (up to source base path)
+    """
+
+    def __init__(self, base_path: str, file_name: str = IGNORE_FILE_NAME):
+        """
+        :param base_path: str - source base path (ignore files above it are not read)
+        :param file_name: str - name of ignore files
+        """
+        self._base = os.path.abspath(str(base_path))
+        self._file_name = file_name
+        self._chains = dict()
+        self.files = list()
+
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    def reset(self):
+        """
+        forget loaded ignore files - they are read again on next scan
+        """
+        self._chains = dict()
+        self.files = list()
+
+    def _load(self, dir_path: str):
+        try:
+            with open(os.path.join(dir_path, self._file_name), 'r', encoding='utf-8', errors='replace') as f:
+                rules = ignoreRules(dir_path, f.readlines())
+        except OSError:
+            return None
+        self.files.append(os.path.join(dir_path, self._file_name))
+        return rules if len(rules) else None
+
+    def chain(self, dir_path: str, has_file: bool = None) -> tuple:
+        """
+        ignore rules for files and sub-dirs of dir: of its ignore file and of ignore files above, deepest first
+        :param dir_path: str - dir path inside base path
+        :param has_file: bool or None - True/False if it is known (from dir listing), that dir has ignore file
+        :return: tuple of ignoreRules
+        """
+        res = self._chains.get(dir_path)
+        if res is not None:
+            return res
+        parent = os.path.dirname(dir_path)
+        above = () if parent == dir_path or os.path.abspath(dir_path) == self._base else self.chain(parent)
+        rules = self._load(dir_path) if has_file is not False else None
+        res = self._chains[dir_path] = above if rules is None else (rules,) + above
+        return res
+
+    @staticmethod
+    def match(chain: tuple, path: str, is_dir: bool) -> bool:
+        """
+        :param chain: tuple of ignoreRules - rules of path dir (see chain())
+        :param path: str - file or dir path
+        :param is_dir: bool - True for dir
+        :return: bool - True if path is ignored
+        """
+        for rules in chain:
+            res = rules.match(path, is_dir)
+            if res is not None:
+                return res
+        return False
+
+    def ignored(self, path: str, is_dir: bool = False) -> bool:
+        """
+        check path and all dirs above it (up to base path) - for path, not found by walk
+        :param path: str - file or dir path inside base path
+        :param is_dir: bool - True for dir
+        :return: bool - True if path (or dir above it) is ignored
+        """
+        if not os.path.abspath(path).startswith(os.path.join(self._base, '')):
+            return False
+        parent = os.path.dirname(path)
+        return self.ignored(parent, is_dir=True) or self.match(self.chain(parent), path, is_dir)
+
+    def read_dir(self, read):
+        """
+        wrap function of dir reading for walking (read_dir or compatible): skip ignored files and sub-dirs
+        :param read: function(path: str) -> (list of fileRecord, list of sub-dirs paths)
+        :return: function(path: str) -> (list of fileRecord, list of sub-dirs paths)
+        """
+
+        def ignore_read(path: str):
+            records, sub_dirs = read(path)
+            chain = self.chain(path, has_file=any(r.fname == self._file_name for r in records))
+            if not chain:
+                return records, sub_dirs
+            return [r for r in records if not self.match(chain, r.path, False)], \
+                   [d for d in sub_dirs if not self.match(chain, d, True)]
+
+        return ignore_read
@@ -32,11 +32,16 @@ def infou():
 
     xIF = actions.xInfoU(source_base_dir=xpars.source,
                          log_level=xpars.log_level,
-                         scan_filters=xpars.filters)
+                         scan_filters=xpars.filters,
+                         scan_threads=xpars.scan_threads,
+                         scan_index=xpars.scan_index,
+                         ignore_file=xpars.ignore_file,
+                         filter_stats=xpars.filter_stats)
 
     # destination_subdir='BACKUP_{}'.format(dt.datetime.now().strftime('%d_%m_%Y')),
 
     files = xIF.run()
+    xIF.close_log()
     # pdf = pd.read_csv(StringIO('\n'.join(files)), sep=';')
     # print(pdf)
     # print('f'*50)
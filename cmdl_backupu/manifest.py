@@ -0,0 +1,227 @@
+"""
+Manifest of copy and backup works: checksum of every copied file is computed while the file is copied (source is read
+once - for copy and for checksum) and written with file size and change time to manifest file next to work log.
+Destination can be verified by manifest later - without reading the source again
+
+    hashCopy - copy backend (abcActionU._copy_action): copy file as shutil.copy2 by buffer in user space and compute
+               checksum of its data
+    zip_write_hashed - write file into zip archive and compute checksum of its data
+    copyManifest - manifest file writer
+    read_manifest - read manifest file
+    verify_manifest - rehash destination files (dir or zip archive) in threads and compare with manifest
+
+manifest is text file:
+    # backupu manifest <algorithm> - first line
+    <checksum> <size> <mtime_ns> <path> - line for every file, path is relative to destination dir (or name in archive)
+
+    usage:
+        backend = hashCopy('sha256')
+        backend(src_path, dst_path)
+        digest = backend.pop_digest(dst_path)
+"""
+import hashlib
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# checksum algorithms of manifest (hashlib names), the first - default
+MANIFEST_ALGORITHMS = ['blake2b', 'sha256', 'sha1', 'md5']
+
+# extension of manifest file (instead of .log of work log)
+MANIFEST_EXT = '.manifest'
+
+# read buffer for copy with checksum and for verify
+HASH_BUFFER = 1024 ** 2
+
+_MANIFEST_HEADER = '# backupu manifest '
+
+VERIFY_MISSING, VERIFY_SIZE, VERIFY_CHECKSUM = 'missing', 'size differs', 'checksum differs'
+
+
+def _hash_stream(f, algorithm: str) -> str:
+    h = hashlib.new(algorithm)
+    for block in iter(lambda: f.read(HASH_BUFFER), b''):
+        h.update(block)
+    return h.hexdigest()
+
+
+def hash_file(path: str, algorithm: str = MANIFEST_ALGORITHMS[0]) -> str:
+    """
+    :return: str - hex checksum of file data
+    """
+    with open(path, 'rb') as f:
+        return _hash_stream(f, algorithm)
+
+
+def _copy_hashed(fsrc, fdst, algorithm: str) -> str:
+    h = hashlib.new(algorithm)
+    for block in iter(lambda: fsrc.read(HASH_BUFFER), b''):
+        h.update(block)
+        fdst.write(block)
+    return h.hexdigest()
+
+
+def zip_write_hashed(zf: zipfile.ZipFile, src: str, arcname: str, algorithm: str = MANIFEST_ALGORITHMS[0]) -> tuple:
+    """
+    write file into archive as ZipFile.write does
+    :param zf: ZipFile - archive opened for write
+    :param src: str - source file
+    :param arcname: str - name in archive
+    :param algorithm: str - checksum algorithm
+    :return: tuple (str - name in archive, str - hex checksum of file data)
+    """
+    zinfo = zipfile.ZipInfo.from_file(src, arcname)
+    zinfo.compress_type = zf.compression
+    with open(src, 'rb') as fsrc, zf.open(zinfo, 'w') as fdst:
+        return zinfo.filename, _copy_hashed(fsrc, fdst, algorithm)
+
+
+class hashCopy:
+    """
+    copy file (as shutil.copy2) by buffer in user space and compute checksum of copied data; checksums are kept until
+    pop_digest. Thread safe
+    """
+
+    def __init__(self, algorithm: str = MANIFEST_ALGORITHMS[0]):
+        """
+        :param algorithm: str - checksum algorithm (hashlib name)
+        """
+        hashlib.new(algorithm)
+        self._algorithm = algorithm
+        self._lock = threading.Lock()
+        self._digests = dict()
+
+    @property
+    def algorithm(self) -> str:
+        return self._algorithm
+
+    def __call__(self, src: str, dst: str):
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            digest = _copy_hashed(fsrc, fdst, self._algorithm)
+        shutil.copystat(src, dst)
+        with self._lock:
+            self._digests[str(dst)] = digest
+
+    def pop_digest(self, dst: str):
+        """
+        :return: str - checksum of file copied to dst or None - if file is not copied by this backend (delta copy,
+                 copy from checkpoint)
+        """
+        with self._lock:
+            return self._digests.pop(str(dst), None)
+
+
+class copyManifest:
+    """
+    manifest file writer: lines are appended to manifest (of resumed work too)
+    """
+
+    def __init__(self, manifest_file: str, algorithm: str = MANIFEST_ALGORITHMS[0]):
+        """
+        :param manifest_file: str or pathlike - manifest file
+        :param algorithm: str - checksum algorithm
+        """
+        self._file = str(manifest_file)
+        self._algorithm = algorithm
+        self._manifest = None
+        self.count = 0
+
+    @property
+    def manifest_file(self) -> str:
+        return self._file
+
+    @property
+    def algorithm(self) -> str:
+        return self._algorithm
+
+    def add(self, path: str, size: int, mtime_ns: int, digest: str):
+        """
+        :param path: str - file path relative to destination dir or name in archive
+        :param size: int - file size
+        :param mtime_ns: int - file change time
+        :param digest: str - hex checksum of file data
+        """
+        if '\n' in path:
+            return
+        if self._manifest is None:
+            new = not os.path.exists(self._file)
+            self._manifest = open(self._file, 'a', encoding='utf-8', errors='surrogateescape')
+            if new:
+                self._manifest.write('{0}{1}\n'.format(_MANIFEST_HEADER, self._algorithm))
+        self._manifest.write('{0} {1} {2} {3}\n'.format(digest, size, mtime_ns, path))
+        self.count += 1
+
+    def close(self):
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+
+
+def read_manifest(manifest_file: str) -> tuple:
+    """
+    :param manifest_file: str or pathlike - manifest file
+    :return: tuple (algorithm, list of tuples (path, size, mtime_ns, checksum)); the last record of path is kept
+    """
+    with open(str(manifest_file), 'r', encoding='utf-8', errors='surrogateescape') as f:
+        lines = f.read().split('\n')
+    if not lines[0].startswith(_MANIFEST_HEADER):
+        raise ValueError('not a manifest file: {}'.format(manifest_file))
+    algorithm = lines[0][len(_MANIFEST_HEADER):].strip()
+    entries = dict()
+    for line in lines[1:]:
+        fields = line.split(' ', 3)
+        if len(fields) == 4:
+            entries[fields[3]] = (fields[3], int(fields[1]), int(fields[2]), fields[0])
+    return algorithm, list(entries.values())
+
+
+def _verify_files(root: str, entries: list, algorithm: str) -> list:
+    errors = list()
+    for path, size, _, digest in entries:
+        full = os.path.join(root, path)
+        try:
+            if os.path.getsize(full) != size:
+                errors.append((path, VERIFY_SIZE))
+            elif hash_file(full, algorithm) != digest:
+                errors.append((path, VERIFY_CHECKSUM))
+        except OSError:
+            errors.append((path, VERIFY_MISSING))
+    return errors
+
+
+def _verify_zip(archive: str, entries: list, algorithm: str) -> list:
+    errors = list()
+    with zipfile.ZipFile(archive) as zf:
+        for path, size, _, digest in entries:
+            try:
+                zinfo = zf.getinfo(path)
+            except KeyError:
+                errors.append((path, VERIFY_MISSING))
+                continue
+            if zinfo.file_size != size:
+                errors.append((path, VERIFY_SIZE))
+                continue
+            with zf.open(zinfo) as f:
+                if _hash_stream(f, algorithm) != digest:
+                    errors.append((path, VERIFY_CHECKSUM))
+    return errors
+
+
+def verify_manifest(manifest_file: str, root: str, threads: int = 0) -> tuple:
+    """
+    rehash destination files and compare them with manifest
+    :param manifest_file: str or pathlike - manifest file
+    :param root: str or pathlike - destination dir or zip archive
+    :param threads: int - number of threads for rehash, 0 - number of CPUs
+    :return: tuple (number of checked files, list of tuples (path, VERIFY_MISSING, VERIFY_SIZE or VERIFY_CHECKSUM))
+    """
+    algorithm, entries = read_manifest(manifest_file)
+    threads = threads or os.cpu_count() or 1
+    verify = _verify_zip if zipfile.is_zipfile(str(root)) else _verify_files
+    # every thread checks its part of files (and opens archive once)
+    parts = [entries[i::threads] for i in range(threads) if entries[i::threads]]
+    with ThreadPoolExecutor(max_workers=max(len(parts), 1)) as pool:
+        results = pool.map(lambda part: verify(str(root), part, algorithm), parts)
+    return len(entries), sorted(err for part in results for err in part)
@@ -0,0 +1,101 @@
+"""
+Quick check of destination files (as rsync does) for repeated copy into existing destination: destination file is
+unchanged, if it has the same size and change time as source file (copy2 keeps source change time) - such files are
+not copied again
+
+Every destination dir is listed once (os.scandir) for all its files: files, not found in listing, are new without
+any stat call; stat data of found files is taken from listing entry (on MS Windows - without stat call too).
+Listings of last QUICK_CHECK_DIRS dirs are kept - files of one dir go together in scan result
+
+Source stat data is taken from scan record - it must be fresh: with scan index, files of unchanged dirs are stat'ed
+again (scanIndex verify_files=True), file changed in place keeps dir modification time
+
+    usage:
+        qc = quickCheck()
+        if qc.unchanged(src_record, dst_path):
+            ...     # don't copy
+        qc.checked, qc.skipped, qc.skipped_size
+"""
+import os
+from collections import OrderedDict
+
+# number of destination dir listings kept in memory
+QUICK_CHECK_DIRS = 256
+
+# change time precision of scan data (datetime of file_info - microseconds), seconds
+_MTIME_EPS = 1e-6
+
+
+def _src_stat(f) -> tuple:
+    """
+    :param f: dict or fileRecord - scanned source file info
+    :return: tuple (size, change time in epoch seconds or None)
+    """
+    if isinstance(f, dict):
+        return f['size'], f['change_date'].timestamp() if f['change_date'] is not None else None
+    return f.size, f.mtime
+
+
+class quickCheck:
+    """
+    check that destination file is the same as source by size and change time; count skipped files
+    """
+
+    def __init__(self, modify_window: float = 0.):
+        """
+        :param modify_window: float - max difference of source and destination change times in seconds for the same
+                              file (2 - for FAT destinations)
+        """
+        self._window = modify_window + _MTIME_EPS
+        self._dirs = OrderedDict()
+        self.checked, self.skipped, self.skipped_size = 0, 0, 0
+
+    def reset(self):
+        """
+        forget destination listings and counters
+        """
+        self._dirs = OrderedDict()
+        self.checked, self.skipped, self.skipped_size = 0, 0, 0
+
+    def _listing(self, dir_path: str) -> dict:
+        """
+        :return: dict {file name: os.DirEntry} of destination dir, empty dict if dir not exists
+        """
+        entries = self._dirs.get(dir_path)
+        if entries is not None:
+            self._dirs.move_to_end(dir_path)
+            return entries
+        try:
+            with os.scandir(dir_path) as it:
+                entries = {e.name: e for e in it}
+        except OSError:
+            entries = dict()
+        self._dirs[dir_path] = entries
+        if len(self._dirs) > QUICK_CHECK_DIRS:
+            self._dirs.popitem(last=False)
+        return entries
+
+    def unchanged(self, f, dst: str) -> bool:
+        """
+        :param f: dict or fileRecord - scanned source file info
+        :param dst: str - destination file path
+        :return: bool - True if destination file exists and has the same size and change time (skipped file is
+                 counted)
+        """
+        self.checked += 1
+        dir_path, name = os.path.split(dst)
+        entry = self._listing(dir_path).get(name)
+        if entry is None:
+            return False
+        size, mtime = _src_stat(f)
+        try:
+            if not entry.is_file(follow_symlinks=False):
+                return False
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            return False
+        if mtime is None or st.st_size != size or abs(st.st_mtime - mtime) > self._window:
+            return False
+        self.skipped += 1
+        self.skipped_size += size
+        return True
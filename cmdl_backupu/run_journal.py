@@ -0,0 +1,296 @@
+"""
+Run journal of copy and backup works into destination dir (with --resume only): work, stopped halfway (reboot, lost
+network, Ctrl+C), can be resumed into the same destination dir (--resume) - copied files, not changed in source since,
+are not copied again, big files are copied from the last checkpoint
+
+    runJournal - journal file RUN_JOURNAL_NAME in destination dir: copied files and checkpoints of big files;
+                 journal is deleted when work is done without errors
+    resumableCopy - copy backend (abcActionU._copy_action): file with checkpoint is copied from it by chunks with new
+                    checkpoints; new big file - by chunks with checkpoints from the beginning; other files - by full
+                    copy backend
+    find_resumable - find destination dir of last not finished work
+
+journal is text file, one line for every record:
+    S <time_ns> <source> - start mark: first line, source dir of work
+    D <size> <mtime_ns> <dst> - file is copied from source file of given size and change time
+    P <offset> <size> <mtime_ns> <dst> - checkpoint: first offset bytes of destination file are written (and synced)
+              from source file of given size and change time
+
+Copied files are written to journal in batches: files of batch are synced (os.fsync) before batch, so file in journal
+is really on disk. Files of lost batch are copied again
+"""
+import os
+import shutil
+import threading
+import time
+
+from cmdl_backupu.copy_backends import COPY_FULL
+
+# journal file name in destination dir
+RUN_JOURNAL_NAME = '.backupu_run.journal'
+
+# copied files in one journal batch; seconds between batches
+RUN_JOURNAL_BATCH = 1000
+RUN_JOURNAL_BATCH_SEC = 10.
+
+# min size of new file for copy with checkpoints; bytes between checkpoints
+RESUME_MIN_SIZE = 64 * 1024 ** 2
+RESUME_CHECKPOINT = 64 * 1024 ** 2
+
+# read buffer of copy with checkpoints
+RESUME_BUFFER = 1024 ** 2
+
+RUN_START, RUN_DONE, RUN_CHECKPOINT = 'S', 'D', 'P'
+
+COPY_RESUMED, COPY_CHECKPOINTED = 'resumed', 'checkpointed'
+
+
+def _fsync_file(path: str) -> bool:
+    """
+    :return: bool - True if file data is synced to disk
+    """
+    try:
+        fd = os.open(path, os.O_RDWR if os.name == 'nt' else os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        os.fsync(fd)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def read_journal(journal_file: str):
+    """
+    :param journal_file: str - journal file
+    :return: tuple (source, dict {dst: (size, mtime_ns)} - copied files, dict {dst: (offset, size, mtime_ns)} -
+             checkpoints of not copied files) or None - if there is no journal or no start mark in it
+    """
+    try:
+        with open(journal_file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            lines = f.read().split('\n')
+    except OSError:
+        return None
+    parts = lines[0].split(' ', 2)
+    if parts[0] != RUN_START or len(parts) < 3:
+        return None
+    done, partial = dict(), dict()
+    # last line may be not finished
+    for line in lines[1:-1]:
+        op = line[:1]
+        if op == RUN_DONE:
+            fields = line[2:].split(' ', 2)
+            if len(fields) == 3:
+                done[fields[2]] = (int(fields[0]), int(fields[1]))
+                partial.pop(fields[2], None)
+        elif op == RUN_CHECKPOINT:
+            fields = line[2:].split(' ', 3)
+            if len(fields) == 4:
+                partial[fields[3]] = tuple(int(x) for x in fields[:3])
+    return parts[2], done, partial
+
+
+def find_resumable(base_path: str, source: str, name_prefix: str = ''):
+    """
+    :param base_path: str or pathlike - destination base dir
+    :param source: str or pathlike - source dir of work
+    :param name_prefix: str - start of destination dir name
+    :return: str - destination dir (in base_path) with journal of work from source, the last started; None - if
+             there is no such dir
+    """
+    found = list()
+    try:
+        with os.scandir(str(base_path)) as it:
+            dirs = [e.path for e in it if e.is_dir() and e.name.startswith(name_prefix)]
+    except OSError:
+        return None
+    for d in dirs:
+        journal = read_journal(os.path.join(d, RUN_JOURNAL_NAME))
+        if journal is not None and journal[0] == os.path.abspath(str(source)):
+            found.append((os.path.getmtime(os.path.join(d, RUN_JOURNAL_NAME)), d))
+    return max(found)[1] if found else None
+
+
+class runJournal:
+    """
+    journal of copied files and checkpoints of work into destination dir. Thread safe
+    """
+
+    def __init__(self, dest_folder: str, source: str):
+        """
+        :param dest_folder: str or pathlike - destination dir (journal is in it)
+        :param source: str or pathlike - source dir of work
+        """
+        self._file = os.path.join(str(dest_folder), RUN_JOURNAL_NAME)
+        self._source = os.path.abspath(str(source))
+        self._lock = threading.Lock()
+        self._journal = None
+        self._pending = list()
+        self._last_sync = time.monotonic()
+        self.done, self.partial = dict(), dict()
+
+    @property
+    def journal_file(self) -> str:
+        return self._file
+
+    def load(self) -> bool:
+        """
+        read journal of previous work (for resume)
+        :return: bool - True if journal is found and it is journal of work from the same source
+        """
+        journal = read_journal(self._file)
+        if journal is None or journal[0] != self._source:
+            return False
+        self.done, self.partial = journal[1], journal[2]
+        return True
+
+    def _open(self):
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self._file), exist_ok=True)
+            new = not os.path.exists(self._file)
+            self._journal = open(self._file, 'a', encoding='utf-8', errors='surrogateescape')
+            if new:
+                self._journal.write('{0} {1} {2}\n'.format(RUN_START, time.time_ns(), self._source))
+
+    def _write_pending(self, sync: bool = True):
+        """
+        write batch of copied files: sync copied files (not synced are not written - they are copied again), then
+        journal
+        """
+        self._open()
+        pending = [p for p in self._pending if _fsync_file(p[0])] if sync else self._pending
+        self._journal.write(''.join('{0} {1} {2} {3}\n'.format(RUN_DONE, size, mtime_ns, dst)
+                                    for dst, size, mtime_ns in pending))
+        self._journal.flush()
+        if sync:
+            os.fsync(self._journal.fileno())
+        self._pending = list()
+        self._last_sync = time.monotonic()
+
+    def copied(self, dst: str, size: int, mtime_ns: int):
+        """
+        file is copied - it is written to journal with next batch
+        :param dst: str - destination file path
+        :param size: int - source file size
+        :param mtime_ns: int - source file change time
+        """
+        if '\n' in dst:
+            return
+        with self._lock:
+            self._pending.append((dst, size, mtime_ns))
+            if len(self._pending) >= RUN_JOURNAL_BATCH or time.monotonic() - self._last_sync > RUN_JOURNAL_BATCH_SEC:
+                self._write_pending()
+
+    def checkpoint(self, dst: str, offset: int, size: int, mtime_ns: int):
+        """
+        first offset bytes of destination file are written and synced
+        :param dst: str - destination file path
+        :param offset: int - bytes written
+        :param size: int - source file size
+        :param mtime_ns: int - source file change time
+        """
+        if '\n' in dst:
+            return
+        with self._lock:
+            self._open()
+            self._journal.write('{0} {1} {2} {3} {4}\n'.format(RUN_CHECKPOINT, offset, size, mtime_ns, dst))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def close(self, finished: bool = False):
+        """
+        write not written copied files (without sync - the work process is stopped, not OS) and close journal
+        :param finished: bool - True - work is done without errors: delete journal
+        """
+        with self._lock:
+            if self._pending and not finished:
+                self._write_pending(sync=False)
+            self._pending = list()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if finished and os.path.exists(self._file):
+                os.remove(self._file)
+
+
+class resumableCopy:
+    """
+    copy backend: file with checkpoint (of not changed source) is copied from checkpoint offset by chunks with new
+    checkpoints in run journal; new file of RESUME_MIN_SIZE bytes and more - by chunks with checkpoints from the
+    beginning (copy stopped by any reason - error, Ctrl+C, killed process, reboot - is continued from the last one);
+    other files - by full copy backend. Copied files are written to run journal
+    """
+
+    def __init__(self, journal: runJournal, full_copy=shutil.copy2, min_size: int = RESUME_MIN_SIZE,
+                 checkpoint: int = RESUME_CHECKPOINT):
+        """
+        :param journal: runJournal - journal of work
+        :param full_copy: callable (src, dst) - backend for files without checkpoint
+        :param min_size: int - min size in bytes of new file for copy with checkpoints
+        :param checkpoint: int - bytes between checkpoints
+        """
+        self._journal = journal
+        self._full_copy = full_copy
+        self._min_size = min_size
+        self._checkpoint = checkpoint
+        self._lock = threading.Lock()
+        self.counts = dict()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = dict()
+        if hasattr(self._full_copy, 'reset_counts'):
+            self._full_copy.reset_counts()
+
+    @property
+    def full_copy(self):
+        return self._full_copy
+
+    def __call__(self, src: str, dst: str):
+        """
+        :return: COPY_RESUMED, COPY_CHECKPOINTED or method of full copy backend (COPY_FULL - if it doesn't return it)
+        """
+        src, dst = str(src), str(dst)
+        st = os.stat(src)
+        mark = self._journal.partial.get(dst)
+        if mark is not None and mark[1:] == (st.st_size, st.st_mtime_ns) and os.path.isfile(dst) and \
+                os.path.getsize(dst) >= mark[0]:
+            method = self._copy_chunks(src, dst, st, mark[0])
+        elif st.st_size >= self._min_size and not os.path.exists(dst):
+            # only new file is written from the beginning (delta copy updates existing file in place)
+            method = self._copy_chunks(src, dst, st, 0)
+        else:
+            method = self._full_copy(src, dst)
+            method = method if hasattr(self._full_copy, 'counts') else COPY_FULL
+        self._copied(method, dst, st)
+        return method
+
+    def _copy_chunks(self, src: str, dst: str, st: os.stat_result, offset: int) -> str:
+        """
+        copy file from offset by chunks, written part is synced and checkpointed every _checkpoint bytes
+        :return: COPY_RESUMED - copy from checkpoint, COPY_CHECKPOINTED - from the beginning
+        """
+        method = COPY_RESUMED if offset else COPY_CHECKPOINTED
+        with open(src, 'rb') as fsrc, open(dst, 'r+b' if offset else 'wb') as fdst:
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            next_mark = offset + self._checkpoint
+            for block in iter(lambda: fsrc.read(min(RESUME_BUFFER, self._checkpoint)), b''):
+                fdst.write(block)
+                offset += len(block)
+                if offset >= next_mark:
+                    fdst.flush()
+                    os.fsync(fdst.fileno())
+                    self._journal.checkpoint(dst, offset, st.st_size, st.st_mtime_ns)
+                    next_mark = offset + self._checkpoint
+            fdst.truncate(offset)
+        shutil.copystat(src, dst)
+        return method
+
+    def _copied(self, method: str, dst: str, st: os.stat_result):
+        # source stat before copy - file changed while copying is not skipped by resumed work
+        self._journal.copied(dst, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
@@ -1,6 +1,7 @@
 """
 The module contains class for scanning the selected operating system directory (including shared network)
-Files are scanned into a list of dictionary with full name (including paths) and file's attribs:
+Files are scanned into a list of dictionary (or dictionary-like fileRecord objects) with full name (including paths)
+and file's attribs:
     path - full path
     change_date
     create_date
@@ -8,19 +9,65 @@ Files are scanned into a list of dictionary with full name (including paths) and
     mode
     ext - file extension
     A-attr - MS Windows specific archive attribute
+
+Scan engines are available (scan_engine):
+    WALK - os.walk, then file_info() for every found path (separate os.stat for every file)
+    SCANDIR - os.scandir, file info is made from os.DirEntry objects (entry_record()): file type is taken from
+              directory listing, stat data reused from DirEntry (on MS Windows - without any additional system call)
+    PARALLEL - as SCANDIR, but many directories are listed at once in threads pool (for network sources)
+SCANDIR and PARALLEL engines can use persistent scan index (scan_index.scanIndex) - unchanged dirs are not listed
+All engines can skip files and dirs by gitignore-style ignore files in source tree (ignore.backupIgnore)
+
+WALK engine make list of dicts (file_info()), SCANDIR and PARALLEL - list of fileRecord objects: read-only mappings
+with the same keys, but compact - with __slots__, dir path shared by all files of dir, dates kept as epoch seconds
+(datetime made on request), interned extensions. If caller needs no stat data of all files (xScan need_fields),
+SCANDIR and PARALLEL engines make lazyRecord objects - file is stat-ed only if filters (or caller) read its stat data
 """
 
 import errno
 import platform
+import stat
+import sys
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 
+from cmdl_backupu.attrib import archive_provider, set_archive_provider, nativeAttribProvider, xattrAttribProvider
 from cmdl_backupu.filters import *
+from cmdl_backupu.ignore import backupIgnore
+from cmdl_backupu.scan_index import scanIndex
 
 FILE_INFO = ['path', 'change_date', 'create_date', 'size', 'mode', 'ext', 'A-attr', 'name']
 
-def file_info(item: str) -> dict:
+# dirs given to PARALLEL engine threads pool ahead of yielded ones - by thread
+SCAN_QUEUE_PER_THREAD = 4
+
+
+class scan_engine(Enum):
+    WALK = 1
+    SCANDIR = 2
+    PARALLEL = 3
+
+
+def _split_name(item: str, name: str) -> tuple:
+    """
+    split file name once - return file stem and extension exactly as file_info() do it
+    (Path(item).stem and item.split('.')[-1])
+    :param item: str - full file path
+    :param name: str - file name (last part of item)
+    :return: tuple (stem, ext)
+    """
+    i = name.rfind('.')
+    stem = name[:i] if 0 < i < len(name) - 1 else name
+    ext = name[i + 1:] if i >= 0 else item.split('.')[-1]
+    return stem, ext
+
+
+def file_info(item: str, aattr: bool = True) -> dict:
     """
     return dict() with file metadata
     :param item: str or pathlike - path to file; file must exists
+    :param aattr: bool - False - archive attribute is not read (False in file info)
     :return: dict with file info: path, change date, create date, size in bytes, mode, extension, file name, arhive attrubute
     :raise - errors from os.stat
     """
@@ -33,14 +80,7 @@ def file_info(item: str) -> dict:
                 FILE_INFO[6]: False,
                 FILE_INFO[7]: Path(item).stem}
     # x = dt.datetime.fromtimestamp(st.st_mtime).date()
-    try:
-        if platform.system() == 'Windows':
-            xr = subprocess.check_output(['attrib', item])
-            isA = chr(xr[0]) == 'A'
-        else:
-            isA = False
-    except IndexError:
-        isA = False
+    isA = archive_provider().archive(item, st) if aattr else False
 
     return {FILE_INFO[0]: item, FILE_INFO[1]: dt.datetime.fromtimestamp(st.st_mtime),
             FILE_INFO[2]: dt.datetime.fromtimestamp(st.st_ctime),
@@ -48,6 +88,362 @@ def file_info(item: str) -> dict:
             FILE_INFO[7]: Path(item).stem}
 
 
+class fileRecord(Mapping):
+    """
+    compact scanned file info: read-only mapping with FILE_INFO keys (the same as file_info() dict has)
+    record keep dir path prefix and dir path relative to scan base path (shared by all files in one dir), file name,
+    interned extension, stat data as numbers; path, dates and stem are made on request (without path parsing).
+    Properties path, size, ext, stem, mtime, ctime, mode, aattr give fast access without key lookup; archive
+    attribute, which is not in stat data (not nativeAttribProvider), is read on first access to it
+    """
+    __slots__ = ('_prefix', '_fname', '_rel', 'ext', 'size', 'mtime', 'ctime', 'mode', '_aattr')
+
+    def __init__(self, prefix: str, fname: str, ext: str, size: int = 0, mtime: float = None, ctime: float = None,
+                 mode: int = None, aattr=False, rel: tuple = None):
+        """
+        :param prefix: str - dir path with trailing separator (os.path.join(dir, ''))
+        :param fname: str - file name
+        :param ext: str - file extension (as file_info() make it)
+        :param size: int - size in bytes
+        :param mtime: float - change time (epoch seconds) or None
+        :param ctime: float - create time (epoch seconds) or None
+        :param mode: int - st_mode or None
+        :param aattr: bool - archive attribute; abcAttribProvider - provider for reading it on first access;
+                      None - not read yet (by current provider)
+        :param rel: tuple (scan base path, relative dir prefix) or None - see dir_rel()
+        """
+        self._prefix = prefix
+        self._fname = fname
+        self._rel = rel
+        self.ext = ext
+        self.size = size
+        self.mtime = mtime
+        self.ctime = ctime
+        self.mode = mode
+        self._aattr = aattr
+
+    @property
+    def aattr(self) -> bool:
+        value = self._aattr
+        if not isinstance(value, bool):
+            value = self._aattr = (value or archive_provider()).archive(self.path)
+        return value
+
+    @aattr.setter
+    def aattr(self, value):
+        self._aattr = value
+
+    @property
+    def aattr_read(self):
+        """
+        :return: bool - archive attribute, if it is read already; None - if not
+        """
+        return self._aattr if isinstance(self._aattr, bool) else None
+
+    @property
+    def path(self) -> str:
+        return self._prefix + self._fname
+
+    @property
+    def dir_prefix(self) -> str:
+        return self._prefix
+
+    @property
+    def fname(self) -> str:
+        return self._fname
+
+    def rel_to(self, base_path: str):
+        """
+        :param base_path: str - scan base path
+        :return: str - file path relative to base_path (path[len(base_path) + 1:]) or None - if record is not made by
+                 scan of base_path
+        """
+        if self._rel is None or self._rel[0] != base_path:
+            return None
+        return self._rel[1] + self._fname
+
+    @property
+    def stem(self) -> str:
+        return _split_name(self._fname, self._fname)[0]
+
+    @property
+    def change_date(self):
+        return None if self.mtime is None else dt.datetime.fromtimestamp(self.mtime)
+
+    @property
+    def create_date(self):
+        return None if self.ctime is None else dt.datetime.fromtimestamp(self.ctime)
+
+    _GETTERS = {FILE_INFO[0]: lambda r: r.path, FILE_INFO[1]: lambda r: r.change_date,
+                FILE_INFO[2]: lambda r: r.create_date, FILE_INFO[3]: lambda r: r.size,
+                FILE_INFO[4]: lambda r: r.mode, FILE_INFO[5]: lambda r: r.ext,
+                FILE_INFO[6]: lambda r: r.aattr, FILE_INFO[7]: lambda r: r.stem}
+
+    def __getitem__(self, key):
+        return self._GETTERS[key](self)
+
+    def __iter__(self):
+        return iter(FILE_INFO)
+
+    def __len__(self):
+        return len(FILE_INFO)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _lazy_field(name: str) -> property:
+    """
+    property for lazyRecord: read file stat data on first access to the field, keep value in fileRecord slot
+    """
+    slot = fileRecord.__dict__[name]
+
+    def fget(self):
+        if not self._loaded:
+            self._load()
+        return slot.__get__(self)
+
+    return property(fget, slot.__set__)
+
+
+class lazyRecord(fileRecord):
+    """
+    fileRecord without stat data at creation - only path, name and extension (from dir listing);
+    file is stat-ed on first access to size, dates, mode or archive attribute. So files rejected by filters on
+    path, name and extension are never stat-ed
+    """
+    __slots__ = ('_loaded',)
+
+    def __init__(self, prefix: str, fname: str, ext: str, rel: tuple = None):
+        """
+        :param prefix: str - dir path with trailing separator (os.path.join(dir, ''))
+        :param fname: str - file name
+        :param ext: str - file extension (as file_info() make it)
+        :param rel: tuple (scan base path, relative dir prefix) or None - see dir_rel()
+        """
+        self._loaded = True
+        super().__init__(prefix, fname, ext, rel=rel)
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        self.size, self.mtime, self.ctime, self.mode = st.st_size, st.st_mtime, st.st_ctime, st.st_mode
+        self.aattr = _stat_aattr(self.path, st)
+
+    @property
+    def loaded(self) -> bool:
+        """
+        :return: bool - True if file stat data is already read
+        """
+        return self._loaded
+
+    size = _lazy_field('size')
+    mtime = _lazy_field('mtime')
+    ctime = _lazy_field('ctime')
+    mode = _lazy_field('mode')
+    aattr = _lazy_field('aattr')
+
+
+def dir_rel(prefix: str, base_path: str):
+    """
+    make relative dir info of scanned dir for its fileRecords: file path relative to base_path is made from it
+    without path parsing (the same as path[len(base_path) + 1:] - as filters and destination paths take it)
+    :param prefix: str - dir path with trailing separator
+    :param base_path: str or None - scan base path
+    :return: tuple (base_path, interned prefix relative to base_path) or None - if base_path is not given (or not str)
+             or prefix is not base_path + separator + ...
+    """
+    if not isinstance(base_path, str) or not prefix.startswith(base_path) or \
+            prefix[len(base_path):len(base_path) + 1] not in (os.sep, os.altsep or os.sep) or \
+            base_path.endswith(os.sep) or (os.altsep and base_path.endswith(os.altsep)):
+        return None
+    return base_path, sys.intern(prefix[len(base_path) + 1:])
+
+
+def _stat_aattr(path: str, st: os.stat_result):
+    """
+    :return: bool - archive attribute from stat data (nativeAttribProvider); or current provider - attribute is read by
+             it on first access (one more system call for file - only if attribute is needed)
+    """
+    provider = archive_provider()
+    return provider.archive(path, st) if provider.stat_attribute else provider
+
+
+def entry_record(entry: os.DirEntry, prefix: str, rel: tuple = None) -> fileRecord:
+    """
+    make fileRecord (the same file info as file_info() return) from os.DirEntry object (os.scandir result):
+    stat data is taken from entry (cached in it), archive attribute on MS Windows is taken from stat data too
+    (st_file_attributes, by archive_provider()) - no 'attrib' subprocess
+    :param entry: os.DirEntry - scanned file
+    :param prefix: str - entry dir path with trailing separator, the same object for all files of dir
+    :param rel: tuple or None - relative dir info (dir_rel()), the same object for all files of dir
+    :return: fileRecord
+    """
+    name = entry.name
+    ext = sys.intern(_split_name(prefix + name, name)[1])
+    try:
+        st = entry.stat()
+    except OSError:
+        return fileRecord(prefix, name, ext, rel=rel)
+
+    isA = _stat_aattr(prefix + name, st)
+
+    return fileRecord(prefix, name, ext, st.st_size, st.st_mtime, st.st_ctime, st.st_mode, isA, rel)
+
+
+def path_record(prefix: str, name: str, rel: tuple = None) -> fileRecord:
+    """
+    make fileRecord for file by its path with os.stat (archive attribute - by archive_provider())
+    :param prefix: str - file dir path with trailing separator
+    :param name: str - file name
+    :param rel: tuple or None - relative dir info (dir_rel())
+    :return: fileRecord
+    """
+    ext = sys.intern(_split_name(prefix + name, name)[1])
+    try:
+        st = os.stat(prefix + name)
+    except OSError:
+        return fileRecord(prefix, name, ext, rel=rel)
+
+    isA = _stat_aattr(prefix + name, st)
+
+    return fileRecord(prefix, name, ext, st.st_size, st.st_mtime, st.st_ctime, st.st_mode, isA, rel)
+
+
+def file_columns(records: list):
+    """
+    make int64 columns of file info (FILE_COLUMNS) for filters checking all files at once (filterPlan, numpy):
+    size in bytes and change time in microseconds from epoch - rounded the same way as datetime.fromtimestamp()
+    :param records: list of fileRecord
+    :return: dict {column name: numpy.ndarray} or None - if numpy is not installed, records are dicts (WALK engine)
+             or some file has no stat data
+    """
+    if np is None:
+        return None
+    try:
+        size = np.fromiter((r.size for r in records), dtype=np.int64, count=len(records))
+        mtime = np.fromiter((r.mtime for r in records), dtype=np.float64, count=len(records))
+    except (AttributeError, TypeError):
+        return None
+    sec = np.floor(mtime)
+    mtime_us = sec.astype(np.int64) * 10 ** 6 + np.round((mtime - sec) * 1e6).astype(np.int64)
+    return dict(zip(FILE_COLUMNS, [size, mtime_us]))
+
+
+def list_dir(top: str, keep_dir=None, scandir=os.scandir):
+    """
+    list one directory with os.scandir - like os.walk do it: unreadable dir gives nothing,
+    symlinks to dirs are not returned as sub-dirs for walking
+    :param top: str - dir path
+    :param keep_dir: function(path: str) -> bool or None - if given, sub-dirs for which it return False are skipped
+    :param scandir: function for listing dir - os.scandir or compatible
+    :return: tuple (list of os.DirEntry for files (not dirs), list of sub-dirs paths for walking)
+    """
+    dirs, files = list(), list()
+    try:
+        with scandir(top) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry)
+                else:
+                    files.append(entry)
+    except OSError:
+        return list(), list()
+
+    sub_dirs = list()
+    for d in dirs:
+        try:
+            is_link = d.is_symlink()
+        except OSError:
+            is_link = False
+        if not is_link and (keep_dir is None or keep_dir(d.path)):
+            sub_dirs.append(d.path)
+    return files, sub_dirs
+
+
+def read_dir(top: str, keep_dir=None, scandir=os.scandir, lazy: bool = False, base_path: str = None):
+    """
+    list one directory (list_dir) and make fileRecord for every file
+    :param top: str - dir path
+    :param keep_dir: function(path: str) -> bool or None - if given, sub-dirs for which it return False are skipped
+    :param scandir: function for listing dir - os.scandir or compatible
+    :param lazy: bool - True: make lazyRecord - files are not stat-ed while listing
+    :param base_path: str or None - scan base path: records keep file path relative to it (fileRecord.rel_to)
+    :return: tuple (list of fileRecord, list of sub-dirs paths for walking)
+    """
+    files, sub_dirs = list_dir(top, keep_dir=keep_dir, scandir=scandir)
+    prefix = os.path.join(top, '')
+    rel = dir_rel(prefix, base_path)
+    if lazy:
+        return [lazyRecord(prefix, e.name, sys.intern(_split_name(prefix + e.name, e.name)[1]), rel)
+                for e in files], sub_dirs
+    return [entry_record(e, prefix, rel) for e in files], sub_dirs
+
+
+def records_walk(top: str, read=read_dir):
+    """
+    walk directory tree like os.walk (top-down, symlinks to dirs are not followed, unreadable dirs are skipped)
+    but yield fileRecord objects, made from os.DirEntry - so stat data of listing can be reused
+    :param top: str - root of directory tree
+    :param read: function(path: str) -> (list of fileRecord, list of sub-dirs paths) - read_dir or compatible
+    :return: generator of lists of fileRecord - files (not dirs) of every scanned directory
+    """
+    stack = [top]
+    while stack:
+        records, sub_dirs = read(stack.pop())
+        yield records
+        stack.extend(reversed(sub_dirs))
+
+
+def parallel_records_walk(top: str, read=read_dir, threads: int = 8):
+    """
+    walk directory tree like records_walk, but list many directories (and stat its files) at once in thread pool -
+    for high-latency (network) sources. Only SCAN_QUEUE_PER_THREAD dirs by thread, the next to be yielded, are listed
+    ahead - listings of not consumed part of tree are not kept in memory; results are yielded in the same order as
+    records_walk (and os.walk) do
+    :param top: str - root of directory tree
+    :param read: function(path: str) -> (list of fileRecord, list of sub-dirs paths) - read_dir or compatible
+    :param threads: int - number of threads in pool
+    :return: generator of lists of fileRecord - files (not dirs) of every scanned directory
+    """
+    pool = ThreadPoolExecutor(max_workers=threads)
+    stop = threading.Event()
+    limit = threads * SCAN_QUEUE_PER_THREAD
+
+    def task(path):
+        if stop.is_set():
+            return list(), list()
+        return read(path)
+
+    try:
+        # stack of [dir path, future of its listing or None - not submitted yet]; top of stack is yielded first
+        stack = [[top, None]]
+        submitted = 0
+        while stack:
+            for item in reversed(stack):
+                if submitted >= limit:
+                    break
+                if item[1] is None:
+                    item[1] = pool.submit(task, item[0])
+                    submitted += 1
+            _, future = stack.pop()
+            submitted -= 1
+            records, sub_dirs = future.result()
+            yield records
+            stack.extend([d, None] for d in reversed(sub_dirs))
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+
+
 class xScan():
     """
     class for scanning source dir with sub-dirs;
@@ -56,10 +452,49 @@ class xScan():
     return filtered or un-listered list of files attribs;
     """
 
-    def __init__(self, start_path: str = os.getcwd()):
+    # function for listing dirs (SCANDIR and PARALLEL engines)
+    _scandir = staticmethod(os.scandir)
+
+    # min number of scanned files for checking size and date filters by numpy columns (see _filtered_files)
+    _vector_min_files = 1000
+
+    def __init__(self, start_path: str = os.getcwd(), engine: scan_engine = scan_engine.SCANDIR, threads: int = 8,
+                 prune: bool = True, index: scanIndex = None, need_fields: tuple = tuple(FILE_INFO),
+                 ignore: backupIgnore = None, filter_stats: bool = False):
+        """
+        :param start_path: str - source dir for scanning
+        :param engine: scan_engine - WALK (os.walk + os.stat for every file), SCANDIR (os.scandir, reuse DirEntry data)
+                       or PARALLEL (SCANDIR in threads pool)
+        :param threads: int - number of threads for PARALLEL engine
+        :param prune: bool - True: don't walk dir subtrees, excluded by BLACK path (dir) filters set before scan;
+                      files from such subtrees are not in scanned (un-filtered) list too
+        :param index: scanIndex - persistent scan index: unchanged dirs are not listed again (SCANDIR and PARALLEL
+                      engines only)
+        :param need_fields: tuple of FILE_INFO keys, which caller reads for every scanned (not only filtered) file;
+                      if no stat data (size, dates, mode, A-attr) is needed so, files are stat-ed only when filters
+                      or caller read it (SCANDIR and PARALLEL engines only, see lazy_stat)
+        :param ignore: backupIgnore - gitignore-style ignore files in source tree: ignored files are not scanned,
+                      ignored dirs are not listed
+        :param filter_stats: bool - True: count evaluations, passes, rejects and time of every filter (abcFilter.stats)
+                      in every filtering; counters are reset before filtering
+        """
+        assert isinstance(engine, scan_engine)
+        assert threads > 0
         if os.path.isdir(start_path):
             self._base_path = start_path
             self._filters = list()
+            self._engine = engine
+            self._threads = threads
+            self._stream_cnt, self._stream_size = 0, 0
+            self._skip_dirs = set()
+            self._prune = prune
+            self._pruned_dirs = list()
+            self._index = index
+            self._need_fields = tuple(need_fields)
+            self._lazy = False
+            self._columns = None
+            self._ignore = ignore
+            self._filter_stats = filter_stats
         else:
             raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), start_path)
 
@@ -70,10 +505,41 @@ class xScan():
         """
         return self._base_path
 
+    @property
+    def engine(self) -> scan_engine:
+        return self._engine
+
+    @property
+    def threads(self) -> int:
+        return self._threads
+
     def _filtered_files(self) -> list:
+        """
+        apply all class filters on saved all-files list in one pass (filterPlan) - the same files as
+        _filtered_files_cascade make, in scan order; size and date ranges are checked by numpy columns of file info
+        (file_columns, made once for scanned list), if there are _vector_min_files files at least; with lazy stat -
+        columns only of files passed filters without stat data (other files are not stat'ed)
+        :return: filtered list of files
+        """
+        plan = self._record_check()
+        columns = None
+        if plan.vectorized and len(self._lst_files) >= self._vector_min_files:
+            if self._lazy:
+                columns = file_columns
+            else:
+                if self._columns is None:
+                    self._columns = file_columns(self._lst_files)
+                columns = self._columns
+        res = plan.filter(self._lst_files, columns=columns)
+
+        _ = {f['path']: f for f in res}  # for drop path duplicates
+        return list(_.values())
+
+    def _filtered_files_cascade(self) -> list:
         """
         self.scan scanning given path, make class-internal file list, un-filterd, all-files (without empty dirs)
         htis function apply all class filter (WHITEs first) on saved all-files list and return filtered list
+        - list by list, filter by filter; kept as reference for _filtered_files (filterPlan)
         :return: filtered list of files
         """
 
@@ -118,25 +584,233 @@ class xScan():
 
     def files(self, filtered: bool = False) -> list:
         """
-        return list of scanned files (list of dict with file attr)
+        return list of scanned files (list of dict or fileRecord with file attr)
         :param filtered: True - return filtered list, False - scanned
-        :return: list of dicts with file attrib
+        :return: list of dicts (fileRecords) with file attrib
         """
         if filtered:
             return self._filtered_files()
         else:
             return self._lst_files
 
+    def skip_dir(self, path: str):
+        """
+        exclude dir subtree from walking (for ex. destination dir inside source dir)
+        :param path: str or pathlike - dir path
+        """
+        self._skip_dirs.add(os.path.abspath(str(path)))
+
+    def _keep_dir(self, path: str) -> bool:
+        if self._skip_dirs and os.path.abspath(path) in self._skip_dirs:
+            return False
+        for f in self._prune_filters:
+            if f.prunes_dir(path):
+                self._pruned_dirs.append(path)
+                return False
+        return True
+
+    @property
+    def lazy_stat(self) -> bool:
+        """
+        True if files are stat-ed not while walking, but on first access to stat data (size, dates, mode, A-attr):
+        caller needs no stat data of all files, and filters on path, name and extension can reject files before
+        filters on stat data. Set up on every scan
+        :return: bool
+        """
+        return self._lazy
+
+    def _need_stat(self) -> bool:
+        if self._engine == scan_engine.WALK or not set(self._need_fields) <= STAT_FREE_FIELDS:
+            return True
+        stat_filters = [f for f in self._filters if not stat_free(f)]
+        return len(stat_filters) > 0 and len(stat_filters) == len(self._filters)
+
+    @property
+    def index(self) -> scanIndex:
+        return self._index
+
+    @property
+    def ignore(self) -> backupIgnore:
+        return self._ignore
+
+    @property
+    def pruned_dirs(self) -> list:
+        """
+        :return: list of dirs (full paths), not walked by last scan - excluded by filters
+        """
+        return self._pruned_dirs
+
+    def _scan_iter(self):
+        """
+        walk source base path with selected engine
+        :return: generator of file info dicts
+        """
+        self._prune_filters = [f for f in self._filters if f.color == filter_color.BLACK] if self._prune else list()
+        self._pruned_dirs = list()
+        keep_dir = self._keep_dir if (self._skip_dirs or self._prune_filters) else None
+        self._lazy = not self._need_stat()
+
+        if self._ignore is not None:
+            self._ignore.reset()
+
+        if self._engine == scan_engine.WALK:
+            # file info dicts are not lazy - archive attribute is read only if caller or filters need it
+            need_aattr = FILE_INFO[6] in self._need_fields or any(FILE_INFO[6] in f.fields for f in self._filters)
+            for i in os.walk(self.base_path):
+                if keep_dir is not None:
+                    i[1][:] = [d for d in i[1] if keep_dir(os.path.join(i[0], d))]
+                files = [os.path.join(i[0], f) for f in i[2]]
+                if self._ignore is not None:
+                    chain = self._ignore.chain(i[0], has_file=self._ignore.file_name in i[2])
+                    i[1][:] = [d for d in i[1] if not self._ignore.match(chain, os.path.join(i[0], d), True)]
+                    files = [f for f in files if not self._ignore.match(chain, f, False)]
+                for f in files:
+                    yield file_info(f, aattr=need_aattr)
+            return
+
+        if self._index is None:
+            read = lambda path: read_dir(path, keep_dir=keep_dir, scandir=self._scandir, lazy=self._lazy,
+                                         base_path=self._base_path)
+        else:
+            read = lambda path: self._read_dir_indexed(path, keep_dir=keep_dir)
+
+        if self._ignore is not None:
+            read = self._ignore.read_dir(read)
+
+        if self._engine == scan_engine.PARALLEL:
+            walk = parallel_records_walk(self.base_path, read=read, threads=self._threads)
+        else:
+            walk = records_walk(self.base_path, read=read)
+
+        for records in walk:
+            yield from records
+
+        if self._index is not None:
+            self._index.commit(complete=not self._pruned_dirs, root=os.path.abspath(self.base_path))
+
+    def _read_dir_indexed(self, path: str, keep_dir=None):
+        """
+        read_dir with persistent index: if dir is not changed from last scan - take its listing from index
+        :param path: str - dir path
+        :param keep_dir: function(path: str) -> bool or None - if given, sub-dirs for which it return False are skipped
+        :return: tuple (list of fileRecord, list of sub-dirs paths for walking)
+        """
+        key = os.path.abspath(path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return read_dir(path, keep_dir=keep_dir, scandir=self._scandir, base_path=self._base_path)
+
+        prefix = os.path.join(path, '')
+        rel = dir_rel(prefix, self._base_path)
+        cached = self._index.get(key, mtime)
+        if cached is None:
+            records, sub_dirs = read_dir(path, scandir=self._scandir, base_path=self._base_path)
+            self._index.put(key, mtime, [os.path.basename(d) for d in sub_dirs],
+                            [[r.fname, r.size, r.mtime, r.ctime, r.mode, r.aattr_read] for r in records])
+        else:
+            sub_dirs = [os.path.join(path, n) for n in cached[0]]
+            if self._index.verify_files and self._lazy:
+                records = [lazyRecord(prefix, f[0], sys.intern(_split_name(prefix + f[0], f[0])[1]), rel)
+                           for f in cached[1]]
+            elif self._index.verify_files:
+                records = [path_record(prefix, f[0], rel) for f in cached[1]]
+            else:
+                records = [fileRecord(prefix, f[0], sys.intern(_split_name(prefix + f[0], f[0])[1]), *f[1:], rel=rel)
+                           for f in cached[1]]
+
+        if keep_dir is not None:
+            sub_dirs = [d for d in sub_dirs if keep_dir(d)]
+        return records, sub_dirs
+
     def scan(self) -> list:
         """
         scan source base path and making list of files
         :return: list of files with file info (full name + attribs)
         """
-        lstd = [[os.path.join(i[0], f) for f in i[2]] for i in os.walk(self.base_path)]
-        self._lst_files = [file_info(item) for sublist in lstd for item in sublist]
+        self._lst_files = list(self._scan_iter())
+        self._columns = None
 
         return self._lst_files
 
+    def _record_check(self, filters: list = None) -> filterPlan:
+        """
+        make function for check one file info dict with all class filters - with the same rules as _filtered_files
+        :param filters: list of abcFilter or None - filters for check (all class filters by default)
+        :return: filterPlan - function(item: dict) -> bool
+        """
+        filters = self._filters if filters is None else filters
+        if self._filter_stats:
+            for f in filters:
+                f.reset_stats()
+        return filterPlan(filters, stats=self._filter_stats)
+
+    def iter_files(self, filtered: bool = True):
+        """
+        scan source base path and yield files one by one while walking - without making files list in memory;
+        filters are applied to every file right after it found. Files list for files() is not changed;
+        number and size of all walked files are in stream_stats after generator is exhausted (size - only if files
+        are not lazy stat-ed)
+        :param filtered: True - yield only files passed filters, False - all files
+        :return: generator of dicts with file attrib
+        """
+        check = self._record_check() if filtered else lambda x: True
+        self._stream_cnt, self._stream_size = 0, 0
+
+        for item in self._scan_iter():
+            self._stream_cnt += 1
+            if not self._lazy:
+                self._stream_size += item['size']
+            if check(item):
+                yield item
+
+    def iter_paths(self, paths, filtered: bool = True, skip_filters: list = list()):
+        """
+        file info for given paths (for ex. changed files from journal) - without walking all source base path:
+        not existing paths are skipped, dir paths are walked; paths out of source base path and in skipped dirs
+        (skip_dir) are skipped too
+        :param paths: iterable of str - file or dir paths
+        :param filtered: True - yield only files passed filters, False - all files
+        :param skip_filters: list of abcFilter - class filters not applied to files
+        :return: generator of fileRecord
+        """
+        check = self._record_check([f for f in self._filters if f not in skip_filters]) if filtered \
+            else lambda x: True
+        base = os.path.join(os.path.abspath(self.base_path), '')
+        skip = [os.path.join(d, '') for d in self._skip_dirs]
+
+        read = lambda d: read_dir(d, keep_dir=self._keep_skip)
+        if self._ignore is not None:
+            self._ignore.reset()
+            read = self._ignore.read_dir(read)
+
+        for p in paths:
+            p = os.path.abspath(p)
+            if not p.startswith(base) or any(p.startswith(d) or p + os.sep == d for d in skip):
+                continue
+            is_dir = os.path.isdir(p) and not os.path.islink(p)
+            if self._ignore is not None and self._ignore.ignored(p, is_dir):
+                continue
+            if is_dir:
+                records = (r for rs in records_walk(p, read=read) for r in rs)
+            else:
+                prefix, name = os.path.split(p)
+                records = [path_record(os.path.join(prefix, ''), name)]
+            for r in records:
+                if r.mode is not None and stat.S_ISREG(r.mode) and check(r):
+                    yield r
+
+    def _keep_skip(self, path: str) -> bool:
+        return os.path.abspath(path) not in self._skip_dirs
+
+    @property
+    def stream_stats(self) -> tuple:
+        """
+        :return: tuple (number of files, size of files in bytes or None if files are lazy stat-ed) - all files walked
+                 by last iter_files
+        """
+        return self._stream_cnt, None if self._lazy else self._stream_size
+
     @property
     def filters(self) -> list:
         """
@@ -0,0 +1,116 @@
+"""
+Persistent (on-disk, SQLite) index of scanned directories for xScan
+
+For every scanned dir index keeps dir modification time, names of sub-dirs and files with stat data.
+On the next scan dir with the same modification time is not listed and its files are not stat'ed - files info is
+taken from index; only changed (and new) dirs are listed again.
+
+    Dir modification time changes when files are created, deleted or renamed in dir, but NOT when file content is
+    changed in place (and not when file attributes are changed) - so, by default, such files in unchanged dirs keep
+    old size, dates and archive attribute. Use verify_files=True to stat files of unchanged dirs again (then only
+    dir listing is saved)
+
+    Dir listed in the same 2 seconds as it was changed is not trusted on the next scan (modification time resolution
+    of some file systems is 1-2 seconds - next change in this time will not change dir modification time)
+
+    usage:
+        index = scanIndex('/home/egor/source.index')
+        sc = xScan(start_path='/home/egor/source', index=index)
+        sc.scan()   # first scan - list all dirs, save index
+        sc.scan()   # next scans - list only changed dirs
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# dir changed closer then this (seconds) before listing is not trusted on next scan
+RACY_SECONDS = 2
+
+
+class scanIndex:
+    """
+    SQLite file with table of scanned dirs: path (absolute), modification time (ns), listing time,
+    sub-dirs names (json list), files (json list of [name, size, mtime, ctime, mode, A-attr])
+    """
+
+    def __init__(self, index_file: str, verify_files: bool = False):
+        """
+        :param index_file: str or pathlike - index file path (created if not exists)
+        :param verify_files: bool - True: stat files of unchanged dirs again (only dir listing is taken from index)
+        """
+        self._index_file = str(index_file)
+        self._verify_files = verify_files
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self._index_file, check_same_thread=False)
+        self._con.execute('CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime INTEGER, listed REAL, '
+                          'sub_dirs TEXT, files TEXT)')
+        self._con.commit()
+        self._start()
+
+    def _start(self):
+        self._updates = list()
+        self._visited = set()
+        self.hits, self.misses = 0, 0
+        self.last_hits, self.last_misses = 0, 0
+
+    @property
+    def index_file(self) -> str:
+        return self._index_file
+
+    @property
+    def verify_files(self) -> bool:
+        return self._verify_files
+
+    def get(self, path: str, mtime_ns: int):
+        """
+        get saved dir listing, if dir is not changed from last scan
+        :param path: str - absolute dir path
+        :param mtime_ns: int - current dir modification time (st_mtime_ns)
+        :return: tuple (list of sub-dirs names, list of files [name, size, mtime, ctime, mode, A-attr]) or None
+        """
+        self._visited.add(path)
+        with self._lock:
+            row = self._con.execute('SELECT mtime, listed, sub_dirs, files FROM dirs WHERE path = ?',
+                                    (path,)).fetchone()
+            if row is None or row[0] != mtime_ns or row[0] / 1e9 >= row[1] - RACY_SECONDS:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[2]), json.loads(row[3])
+
+    def put(self, path: str, mtime_ns: int, sub_dirs: list, files: list):
+        """
+        save dir listing (saved to disk by commit)
+        :param path: str - absolute dir path
+        :param mtime_ns: int - dir modification time (st_mtime_ns) before listing
+        :param sub_dirs: list of str - sub-dirs names
+        :param files: list of lists [name, size, mtime, ctime, mode, A-attr]
+        """
+        self._visited.add(path)
+        self._updates.append((path, mtime_ns, time.time(), json.dumps(sub_dirs), json.dumps(files)))
+
+    def commit(self, complete: bool = True, root: str = None):
+        """
+        save new listings to index file
+        :param complete: bool - True if all tree was walked: dirs of tree not visited by this scan are deleted from
+                         index
+        :param root: str - absolute root dir of walked tree (dirs of other trees in the same index file are kept);
+                     None - all dirs of index are of walked tree
+        """
+        prefix = None if root is None else os.path.join(root, '')
+        with self._lock:
+            self._con.executemany('INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)', self._updates)
+            if complete:
+                gone = [(p,) for (p,) in self._con.execute('SELECT path FROM dirs') if p not in self._visited and
+                        (prefix is None or p == root or p.startswith(prefix))]
+                self._con.executemany('DELETE FROM dirs WHERE path = ?', gone)
+            self._con.commit()
+        hits, misses = self.hits, self.misses
+        self._start()
+        self.last_hits, self.last_misses = hits, misses
+
+    def close(self):
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,127 @@
+import logging
+import tempfile
+from shutil import rmtree
+from unittest import TestCase
+
+from cmdl_backupu.actions import xBackupU, backup_types
+from cmdl_backupu.attrib import *
+from cmdl_backupu.new_folder import *
+from cmdl_backupu.scan import xScan, filterArchAttrib, filter_color
+
+
+class TestAttribProvider(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, 'src')
+        self.dst = os.path.join(self.tmp, 'dst')
+        os.mkdir(self.dst)
+        for d in ['', 'a', 'b']:
+            os.makedirs(os.path.join(self.src, d), exist_ok=True)
+            for i in range(5):
+                with open(os.path.join(self.src, d, 'f{}.txt'.format(i)), 'w') as f:
+                    f.write(str(i))
+        self.provider = fakeAttribProvider(default_on=True)
+        self._previous = set_archive_provider(self.provider)
+
+    def tearDown(self):
+        set_archive_provider(self._previous)
+        rmtree(self.tmp)
+
+    def test_fake_provider_batches(self):
+        """ test attributes are read once for every dir and switched off in batches  """
+        sc = xScan(start_path=self.src)
+        files = sc.scan()
+        self.assertEqual(len(files), 15)
+        # attribute is not in stat data - it is read only for files, which need it
+        self.assertEqual(self.provider.dir_reads, 0)
+        self.assertTrue(all(f['A-attr'] for f in files))
+        self.assertEqual(self.provider.dir_reads, 3)
+
+        self.provider._batch_size = 4
+        for f in files[:10]:
+            self.provider.clear(f['path'])
+        self.assertEqual(self.provider.pending, 2)
+        # file changed after copy, before flush - attribute stays on
+        with open(files[9]['path'], 'a') as f:
+            f.write('changed')
+        self.provider.flush()
+        self.assertEqual((self.provider.writes, self.provider.cleared, self.provider.pending), (3, 9, 0))
+        self.assertEqual(self.provider.changed, 1)
+
+        sc.set_filters(filterArchAttrib(color=filter_color.WHITE))
+        sc.scan()
+        self.assertEqual([f['path'] for f in sc.files(filtered=True)], [f['path'] for f in files[9:]])
+        self.assertTrue(filterArchAttrib(color=filter_color.BLACK).check(files[0]['path']))
+
+    def test_native_write_errors(self):
+        """ test failed SetFileAttributesW is counted in errors and file is not cached as switched """
+        class kernel32:
+            @staticmethod
+            def GetFileAttributesW(path):
+                return stat.FILE_ATTRIBUTE_ARCHIVE
+
+            @staticmethod
+            def SetFileAttributesW(path, attrs):
+                return 0 if path.endswith('f1.txt') else 1
+
+        provider = nativeAttribProvider()
+        provider._kernel32 = kernel32
+        paths = [os.path.join(self.src, 'a', 'f{}.txt'.format(i)) for i in range(3)]
+        provider._cache[os.path.join(self.src, 'a')] = {os.path.basename(p): True for p in paths}
+        for p in paths:
+            provider.clear(p)
+        provider.flush()
+        self.assertEqual((provider.cleared, provider.errors), (2, 1))
+        self.assertEqual([provider.archive(p) for p in paths], [False, True, False])
+
+    def test_inc_backup_with_fake_provider(self):
+        """ test FULL backup switch archive attribute off by one batch, next INC backup copy only new files  """
+        cw = xBackupU(source_base_dir=self.src, log_level=logging.INFO, prefix='FULL',
+                      destination_base_dir=self.dst, destination_subdir='BACKUP', backup_type=backup_types.FULL,
+                      new_folder_rule=incRule())
+        cw.run()
+        cw.close_log()
+        self.assertEqual((self.provider.cleared, self.provider.writes), (15, 1))
+
+        with open(os.path.join(self.src, 'a', 'new.txt'), 'w') as f:
+            f.write('new')
+        self.provider.reset_cache()
+
+        cw = xBackupU(source_base_dir=self.src, log_level=logging.INFO, prefix='INC',
+                      destination_base_dir=self.dst, destination_subdir='BACKUP', backup_type=backup_types.INC,
+                      new_folder_rule=incRule())
+        self.assertEqual([os.path.basename(f[0]) for f in cw.run()], ['new.txt'])
+        cw.close_log()
+
+    def test_inc_backup_with_xattr(self):
+        """ test xattr "archive attribute": INC backup copy new files and files changed with old change date  """
+        if platform.system() == 'Windows' or not xattrAttribProvider.supported(self.src):
+            self.skipTest('no user extended attributes')
+
+        set_archive_provider(None)
+        names = sorted(os.listdir(self.src))
+        cw = xBackupU(source_base_dir=self.src, log_level=logging.INFO, prefix='FULL',
+                      destination_base_dir=self.dst, destination_subdir='BACKUP', backup_type=backup_types.FULL,
+                      new_folder_rule=incRule(), use_xattr=True)
+        self.assertIsInstance(cw._archive_provider, xattrAttribProvider)
+        # support check writes nothing into source
+        self.assertEqual(sorted(os.listdir(self.src)), names)
+        self.assertEqual(len(cw.run()), 15)
+        cw.close_log()
+        # provider of work is current only while it runs
+        self.assertIsInstance(archive_provider(), nativeAttribProvider)
+
+        changed = os.path.join(self.src, 'b', 'f1.txt')
+        st = os.stat(changed)
+        with open(changed, 'w') as f:
+            f.write('changed')
+        os.utime(changed, ns=(st.st_atime_ns, st.st_mtime_ns))
+        with open(os.path.join(self.src, 'a', 'new.txt'), 'w') as f:
+            f.write('new')
+
+        cw = xBackupU(source_base_dir=self.src, log_level=logging.INFO, prefix='INC',
+                      destination_base_dir=self.dst, destination_subdir='BACKUP', backup_type=backup_types.INC,
+                      new_folder_rule=incRule(), use_xattr=True)
+        self.assertEqual(sorted(os.path.basename(f[0]) for f in cw.run()), ['f1.txt', 'new.txt'])
+        cw.close_log()
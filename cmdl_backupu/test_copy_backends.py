@@ -0,0 +1,161 @@
+import errno
+import filecmp
+import logging
+
+from cmdl_backupu.actions import xCopyU
+from cmdl_backupu.copy_backends import *
+from cmdl_backupu.new_folder import *
+from cmdl_backupu.tree_case import sourceTreeCase
+
+
+class TestZeroCopy(sourceTreeCase):
+    tree_files = [('empty.bin', 0), ('one.bin', 1), ('sub/mid.bin', 100000), ('big.bin', 9 * 1024 ** 2)]
+
+    def test_methods(self):
+        """ test every method copies data and stat data as copy2 """
+        for method in zero_copy_methods():
+            backend = zeroCopy(methods=[method])
+            for name in self._files():
+                src, dst = os.path.join(self.src, name), os.path.join(self.dst, name.replace(os.sep, '_'))
+                used = backend(src, dst)
+                self.assertIn(used, [method, COPY_USER], name)
+                self.assertTrue(filecmp.cmp(src, dst, shallow=False), name)
+                self.assertEqual(os.stat(src).st_mtime_ns, os.stat(dst).st_mtime_ns, name)
+                self.assertEqual(os.stat(src).st_mode, os.stat(dst).st_mode, name)
+            self.assertEqual(sum(backend.counts.values()), len(self._files()))
+
+    def test_fallback(self):
+        """ test not supported method is tried once for pair of file systems, other errors are raised """
+        calls = list()
+
+        class noReflink(zeroCopy):
+            @staticmethod
+            def _copy_by(method, src_fd, dst_fd, size):
+                calls.append(method)
+                if method == COPY_REFLINK:
+                    raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+                return zeroCopy._copy_by(method, src_fd, dst_fd, size)
+
+        backend = noReflink(methods=[COPY_REFLINK, COPY_RANGE, COPY_SENDFILE])
+        for name in self._files():
+            backend(os.path.join(self.src, name), os.path.join(self.dst, name.replace(os.sep, '_')))
+            self.assertTrue(filecmp.cmp(os.path.join(self.src, name), os.path.join(self.dst, name.replace(os.sep, '_')),
+                                        shallow=False), name)
+        self.assertLessEqual(calls.count(COPY_REFLINK), 1)
+        self.assertNotIn(COPY_REFLINK, backend.counts)
+
+        class noSpace(zeroCopy):
+            @staticmethod
+            def _copy_by(method, src_fd, dst_fd, size):
+                raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+        if len(zero_copy_methods()) > 1:
+            with self.assertRaises(OSError):
+                noSpace()(os.path.join(self.src, 'one.bin'), os.path.join(self.dst, 'one.bin'))
+
+    def test_file_fallback(self):
+        """ test error of one file and early end of copy fall back to next method for this file only """
+        methods = zero_copy_methods()
+        if len(methods) < 2:
+            self.skipTest('no zero copy methods')
+        first = methods[-2]
+        calls = list()
+
+        class flaky(zeroCopy):
+            @staticmethod
+            def _copy_by(method, src_fd, dst_fd, size):
+                if method == first:
+                    calls.append(size)
+                    if size == 1:
+                        raise OSError(errno.EPERM, os.strerror(errno.EPERM))
+                    if size == 100000:
+                        # file system gives no data - copy ends at once
+                        return 0
+                return zeroCopy._copy_by(method, src_fd, dst_fd, size)
+
+        backend = flaky(methods=[first])
+        for _ in range(2):
+            for name in self._files():
+                src, dst = os.path.join(self.src, name), os.path.join(self.dst, name.replace(os.sep, '_'))
+                backend(src, dst)
+                self.assertTrue(filecmp.cmp(src, dst, shallow=False), name)
+        self.assertEqual(len(calls), 2 * len(self._files()))
+        self.assertEqual(backend.counts, {first: 4, COPY_USER: 4})
+
+    def test_copy_work(self):
+        """ test COPY work with zero copy backend in threads """
+        cw = xCopyU(source_base_dir=self.src, log_level=logging.ERROR, destination_base_dir=self.dst,
+                    destination_subdir='TEST', new_folder_rule=incRule(), zero_copy=True, copy_threads=2)
+        cw.run()
+        cw.close_log()
+        self.assertEqual(cw._cnt_error, 0)
+        self.assertEqual(sum(cw._copy_action.counts.values()), len(self._files()))
+        for name in self._files():
+            self.assertTrue(filecmp.cmp(os.path.join(self.src, name), os.path.join(str(cw.destination_folder), name),
+                                        shallow=False), name)
+
+    def test_delta_copy_work(self):
+        """ test COPY work with delta copy keeps signatures outside of destination dir """
+        def copy_work():
+            cw = xCopyU(source_base_dir=self.src, log_level=logging.ERROR, destination_base_dir=self.dst,
+                        destination_subdir='TEST', new_folder_rule=exsistOKRule(), delta_copy=True)
+            cw.run()
+            cw.close_log()
+            self.assertEqual(cw._cnt_error, 0)
+            return cw
+
+        copy_work()
+        with open(os.path.join(self.src, 'big.bin'), 'r+b') as f:
+            f.write(b'changed')
+        cw = copy_work()
+        dest = str(cw.destination_folder)
+        self.assertEqual(cw._copy_action.counts.get(COPY_DELTA), 1)
+        self.assertTrue(filecmp.cmp(os.path.join(self.src, 'big.bin'), os.path.join(dest, 'big.bin'), shallow=False))
+        self.assertEqual([f for _, _, files in os.walk(dest) for f in files if SIGNATURE_EXT in f], [])
+        sig_file = os.path.join(self.dst, SIGNATURES_DIR, os.path.basename(dest), 'big.bin' + SIGNATURE_EXT)
+        self.assertIsNotNone(load_signatures(os.path.join(dest, 'big.bin'), sig_file=sig_file))
+
+    def test_delta_copy(self):
+        """ test delta copy writes only changed blocks and gives the same file as full copy """
+        src, dst = os.path.join(self.src, 'big.bin'), os.path.join(self.dst, 'big.bin')
+        backend = deltaCopy(block_size=4096, min_size=1024)
+        self.assertEqual(backend(src, dst), COPY_FULL)
+        self.assertFalse(os.path.exists(dst + SIGNATURE_EXT))
+
+        # no signatures - destination is read, the same file - nothing is written
+        self.assertEqual(backend(src, dst), COPY_DELTA)
+        self.assertEqual((backend.written, backend.saved), (0, os.path.getsize(src)))
+        self.assertEqual(load_signatures(dst, 4096), file_signatures(dst, 4096))
+
+        size = os.path.getsize(src)
+        for change, new_size in [(b'x' * 10, size), (b'y' * 5000, size + 3000), (b'z', size // 2 + 1)]:
+            with open(src, 'r+b') as f:
+                f.seek(size // 2)
+                f.write(change)
+                f.truncate(new_size)
+            backend.reset_counts()
+            self.assertEqual(backend(src, dst), COPY_DELTA)
+            self.assertTrue(filecmp.cmp(src, dst, shallow=False))
+            self.assertEqual(os.stat(src).st_mtime_ns, os.stat(dst).st_mtime_ns)
+            self.assertLessEqual(backend.written, len(change) + abs(new_size - size) + 2 * 4096)
+            self.assertEqual(backend.written + backend.saved, new_size)
+            # strong digests of written blocks are not computed
+            signatures = load_signatures(dst, 4096)
+            self.assertEqual([sig[0] for sig in signatures], [sig[0] for sig in file_signatures(dst, 4096)])
+            self.assertEqual(sum(sig[1] == NO_STRONG for sig in signatures), -(-backend.written // 4096))
+            self.assertTrue(all(sig in [new, (new[0], NO_STRONG)]
+                                for sig, new in zip(signatures, file_signatures(dst, 4096))))
+            size = new_size
+
+        # blocks without strong digest are compared by data
+        backend.reset_counts()
+        self.assertEqual(backend(src, dst), COPY_DELTA)
+        self.assertEqual((backend.written, backend.saved), (0, size))
+
+        # destination changed after delta copy - signatures are not valid
+        with open(dst, 'ab') as f:
+            f.write(b'0')
+        self.assertIsNone(load_signatures(dst, 4096))
+        self.assertIsNone(load_signatures(dst, 1024))
+        backend(src, dst)
+        self.assertTrue(filecmp.cmp(src, dst, shallow=False))
@@ -0,0 +1,65 @@
+import filecmp
+import logging
+import tempfile
+from shutil import rmtree
+from unittest import TestCase
+
+from cmdl_backupu.actions import xCopyU
+from cmdl_backupu.dest_tree import *
+from cmdl_backupu.new_folder import *
+
+
+class TestDestTree(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, 'src')
+        self.dst = os.path.join(self.tmp, 'dst')
+        for name in ['a.txt', 'ok/b.txt', 'ok/deep/c.txt', 'bad/d.txt', 'bad/x/e.txt', 'bad/x/y/f.txt']:
+            path = os.path.join(self.src, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(name)
+        os.mkdir(self.dst)
+
+    def tearDown(self):
+        rmtree(self.tmp)
+
+    def _dirs(self, root: str) -> list:
+        return [os.path.join(root, *d.split('/')) for d in ['a/b/c', 'a/b/d', 'a/e', 'f', 'g/h/i/j', 'g/h/k']]
+
+    def test_make(self):
+        """ test tree is created by make_all and by make one by one, file in place of dir fails its subtree only """
+        for way in ['all', 'one']:
+            root = os.path.join(self.dst, way)
+            os.makedirs(os.path.join(root, 'g'))
+            with open(os.path.join(root, 'g', 'h'), 'w') as f:
+                f.write('not dir')
+            tree = dirsTree(root)
+            if way == 'all':
+                failed = tree.make_all(self._dirs(root), threads=3)
+                self.assertEqual(list(failed), [os.path.join(root, 'g', 'h')])
+            else:
+                tops = [tree.make(d) for d in self._dirs(root)]
+                self.assertEqual(tops, [None] * 4 + [os.path.join(root, 'g', 'h')] * 2)
+            self.assertEqual(list(tree.failed), [os.path.join(root, 'g', 'h')])
+            for d in self._dirs(root)[:4]:
+                self.assertTrue(os.path.isdir(d), d)
+                self.assertIsNone(tree.failed_top(d))
+            self.assertEqual(tree.failed_top(os.path.join(root, 'g', 'h', 'i', 'j')), os.path.join(root, 'g', 'h'))
+            self.assertIsNone(tree.make(os.path.join(root, 'a', 'b', 'c')))
+
+    def test_copy_work(self):
+        """ test COPY work copies files of created dirs and counts files of not created subtree as errors """
+        for stream in [False, True]:
+            cw = xCopyU(source_base_dir=self.src, log_level=logging.CRITICAL, destination_base_dir=self.dst,
+                        destination_subdir='TEST', new_folder_rule=incRule())
+            dest = str(cw.destination_folder)
+            with open(os.path.join(dest, 'bad'), 'w') as f:
+                f.write('not dir')
+            cw.run(stream=stream)
+            cw.close_log()
+            self.assertEqual((cw._cnt_error, cw._cnt_tree_skipped), (3, 3), stream)
+            for name in ['a.txt', 'ok/b.txt', 'ok/deep/c.txt']:
+                self.assertTrue(filecmp.cmp(os.path.join(self.src, *name.split('/')),
+                                            os.path.join(dest, *name.split('/')), shallow=False), name)
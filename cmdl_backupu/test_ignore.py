@@ -0,0 +1,63 @@
+import os
+import tempfile
+from shutil import rmtree
+from unittest import TestCase
+
+from cmdl_backupu.ignore import *
+from cmdl_backupu.scan import xScan, scan_engine
+
+
+class TestIgnore(TestCase):
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        for f in ['a.py', 'a.tmp', 'keep.tmp', 'build/out.o', 'src/b.py', 'src/build/c.py', 'src/deep/x/d.log',
+                  'src/deep/x/e.py', 'doc/n.txt', 'doc/sub/m.txt', 'logs/1.log', 'logs/important.log',
+                  'lib/.backupignore', 'lib/p.py', 'lib/p.pyc', 'lib/q.tmp']:
+            path = os.path.join(self.source, *f.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as fl:
+                fl.write(f)
+        with open(os.path.join(self.source, IGNORE_FILE_NAME), 'w') as f:
+            f.write('# comment\n\n*.tmp\n!keep.tmp\nbuild/\n/doc/sub\n**/x/*.log\nlogs/*\n!logs/important.log\n')
+        with open(os.path.join(self.source, 'lib', IGNORE_FILE_NAME), 'w') as f:
+            f.write('*.pyc\n!q.tmp\n')
+
+    def tearDown(self):
+        rmtree(self.source)
+
+    def _rel(self, files) -> list:
+        return sorted(os.path.relpath(f['path'], self.source).replace(os.sep, '/') for f in files)
+
+    def test_patterns(self):
+        rules = ignoreRules('/s', ['*.tmp', 'build/', '/doc/sub', 'a/**/b', 'abc/**', '[!x]y?', r'\#hash', 'name '])
+        cases = [('/s/q.tmp', False, True), ('/s/d/q.tmp', False, True), ('/s/build', True, True),
+                 ('/s/build', False, None), ('/s/x/build', True, True), ('/s/doc/sub', True, True),
+                 ('/s/x/doc/sub', True, None), ('/s/a/b', False, True), ('/s/a/x/y/b', False, True),
+                 ('/s/abc/x/y', False, True), ('/s/abc', True, None), ('/s/ayz', False, True),
+                 ('/s/xyz', False, None), ('/s/#hash', False, True), ('/s/name', False, True)]
+        for path, is_dir, res in cases:
+            self.assertEqual(rules.match(path.replace('/', os.sep), is_dir), res, path)
+
+    def test_scan(self):
+        expected = ['.backupignore', 'a.py', 'keep.tmp', 'lib/.backupignore', 'lib/p.py', 'lib/q.tmp',
+                    'logs/important.log', 'doc/n.txt', 'src/b.py', 'src/deep/x/e.py']
+        listed = list()
+
+        def count_scandir(path):
+            listed.append(os.path.relpath(path, self.source).replace(os.sep, '/'))
+            return os.scandir(path)
+
+        class countScan(xScan):
+            _scandir = staticmethod(count_scandir)
+
+        for engine in scan_engine:
+            sc = countScan(start_path=self.source, engine=engine, ignore=backupIgnore(self.source))
+            self.assertEqual(self._rel(sc.scan()), sorted(expected), engine.name)
+            self.assertEqual(len(sc.ignore.files), 2)
+        # ignored dirs are not listed
+        self.assertFalse(any(d.endswith('build') or d == 'doc/sub' for d in listed))
+
+        sc = xScan(start_path=self.source, ignore=backupIgnore(self.source))
+        paths = [os.path.join(self.source, *p.split('/')) for p in ['src/build/c.py', 'src/b.py', 'a.tmp', 'doc']]
+        self.assertEqual(self._rel(sc.iter_paths(paths, filtered=False)), ['doc/n.txt', 'src/b.py'])
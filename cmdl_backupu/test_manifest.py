@@ -0,0 +1,68 @@
+import filecmp
+import logging
+
+from cmdl_backupu.actions import xCopyU
+from cmdl_backupu.manifest import *
+from cmdl_backupu.new_folder import *
+from cmdl_backupu.tree_case import sourceTreeCase
+
+
+class TestManifest(sourceTreeCase):
+    tree_files = [('empty.bin', 0), ('a.txt', 10), ('sub dir/b c.txt', 20), ('big.bin', 3 * HASH_BUFFER + 7)]
+
+    def _copy_work(self, **kwargs) -> xCopyU:
+        cw = xCopyU(source_base_dir=self.src, log_level=logging.ERROR, destination_base_dir=self.dst,
+                    destination_subdir='TEST', new_folder_rule=incRule(), **kwargs)
+        cw.run()
+        cw.close_log()
+        return cw
+
+    def test_hash_copy(self):
+        """ test hashed copy gives the same file as copy2 and checksum of source """
+        backend = hashCopy('sha256')
+        for name in self._files():
+            src, dst = os.path.join(self.src, name), os.path.join(self.dst, name.replace(os.sep, '_'))
+            backend(src, dst)
+            self.assertTrue(filecmp.cmp(src, dst, shallow=False), name)
+            self.assertEqual(os.stat(src).st_mtime_ns, os.stat(dst).st_mtime_ns, name)
+            self.assertEqual(backend.pop_digest(dst), hash_file(src, 'sha256'), name)
+            self.assertIsNone(backend.pop_digest(dst))
+
+    def test_copy_verify(self):
+        """ test manifest of COPY work and verify of destination """
+        cw = self._copy_work(checksum='sha256', verify=True, copy_threads=2)
+        dest = str(cw.destination_folder)
+        self.assertEqual((cw._cnt_error, cw._cnt_verify_error), (0, 0))
+        algorithm, entries = read_manifest(os.path.join(dest, 'COPY' + MANIFEST_EXT))
+        self.assertEqual(algorithm, 'sha256')
+        self.assertEqual(sorted(e[0] for e in entries), sorted(self._files()))
+        for path, size, mtime_ns, digest in entries:
+            src = os.path.join(self.src, path)
+            self.assertEqual((size, mtime_ns, digest),
+                             (os.path.getsize(src), os.stat(src).st_mtime_ns, hash_file(src, 'sha256')), path)
+
+        with open(os.path.join(dest, 'a.txt'), 'ab') as f:
+            f.write(b'!')
+        with open(os.path.join(dest, 'big.bin'), 'r+b') as f:
+            f.write(b'!')
+        os.remove(os.path.join(dest, 'sub dir', 'b c.txt'))
+        checked, errors = verify_manifest(os.path.join(dest, 'COPY' + MANIFEST_EXT), dest, threads=3)
+        self.assertEqual(checked, len(self._files()))
+        self.assertEqual(errors, [('a.txt', VERIFY_SIZE), ('big.bin', VERIFY_CHECKSUM),
+                                  (os.path.join('sub dir', 'b c.txt'), VERIFY_MISSING)])
+        # verify errors are errors of work
+        cw._do_verify()
+        self.assertEqual((cw._cnt_error, cw._cnt_verify_error), (3, 3))
+
+    def test_zip_verify(self):
+        """ test manifest of COPY work into zip archive """
+        cw = self._copy_work(archive_format='zip', verify=True)
+        self.assertEqual((cw._cnt_error, cw._cnt_verify_error), (0, 0))
+        manifest_file = cw._manifest_path()
+        algorithm, entries = read_manifest(manifest_file)
+        self.assertEqual(algorithm, MANIFEST_ALGORITHMS[0])
+        self.assertEqual(len(entries), len(self._files()))
+        with zipfile.ZipFile(str(cw.destination_folder)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(sorted(zf.namelist()), sorted(e[0] for e in entries))
+        self.assertEqual(verify_manifest(manifest_file, cw.destination_folder), (len(entries), []))
@@ -0,0 +1,123 @@
+import filecmp
+import logging
+
+from cmdl_backupu.actions import xCopyU
+from cmdl_backupu.new_folder import *
+from cmdl_backupu.run_journal import *
+from cmdl_backupu.tree_case import sourceTreeCase
+
+
+class TestRunJournal(sourceTreeCase):
+    tree_files = [('a.txt', 10), ('b.txt', 20), ('sub/c.txt', 30), ('big.bin', 300000)]
+
+    def test_journal(self):
+        """ test journal keeps copied files and last checkpoints, not finished last line is ignored """
+        rj = runJournal(self.dst, self.src)
+        self.assertFalse(rj.load())
+        rj.copied('/d/a.txt', 1, 2)
+        rj.checkpoint('/d/big bin', 10, 100, 5)
+        rj.checkpoint('/d/big bin', 20, 100, 5)
+        rj.checkpoint('/d/done.bin', 10, 100, 5)
+        rj.copied('/d/done.bin', 100, 5)
+        rj.close()
+        with open(rj.journal_file, 'a') as f:
+            f.write('D /d/not_fin')
+
+        rj = runJournal(self.dst, self.src)
+        self.assertTrue(rj.load())
+        self.assertEqual(rj.done, {'/d/a.txt': (1, 2), '/d/done.bin': (100, 5)})
+        self.assertEqual(rj.partial, {'/d/big bin': (20, 100, 5)})
+        self.assertFalse(runJournal(self.dst, self.dst).load())
+        self.assertEqual(find_resumable(self.tmp, self.src), self.dst)
+        self.assertIsNone(find_resumable(self.tmp, self.dst))
+
+        rj.close(finished=True)
+        self.assertFalse(os.path.exists(rj.journal_file))
+
+    def test_resumable_copy(self):
+        """ test new big file gets checkpoints while copying, copy stopped halfway is continued from the last one """
+        src, dst = os.path.join(self.src, 'big.bin'), os.path.join(self.dst, 'big.bin')
+        st = os.stat(src)
+
+        class stoppedJournal(runJournal):
+            def checkpoint(self, dst, offset, size, mtime_ns):
+                super().checkpoint(dst, offset, size, mtime_ns)
+                if offset >= 100000:
+                    raise KeyboardInterrupt
+
+        rj = stoppedJournal(self.dst, self.src)
+        backend = resumableCopy(rj, min_size=1000, checkpoint=50000)
+        with self.assertRaises(KeyboardInterrupt):
+            backend(src, dst)
+        rj.close()
+        rj = runJournal(self.dst, self.src)
+        self.assertTrue(rj.load())
+        self.assertEqual(rj.partial, {dst: (100000, st.st_size, st.st_mtime_ns)})
+
+        # the rest of file is garbage
+        with open(dst, 'ab') as f:
+            f.write(b'x' * 1000)
+        backend = resumableCopy(rj, min_size=1000, checkpoint=50000)
+        self.assertEqual(backend(src, dst), COPY_RESUMED)
+        self.assertEqual(rj.partial[dst][0], 100000)
+        self.assertTrue(filecmp.cmp(src, dst, shallow=False))
+        self.assertEqual(os.stat(src).st_mtime_ns, os.stat(dst).st_mtime_ns)
+
+        # source changed after checkpoint - full copy
+        rj.partial[dst] = (100000, st.st_size, st.st_mtime_ns + 1)
+        self.assertEqual(backend(src, dst), COPY_FULL)
+        self.assertEqual(backend.counts, {COPY_RESUMED: 1, COPY_FULL: 1})
+        rj.close()
+        rj = runJournal(self.dst, self.src)
+        rj.load()
+        self.assertEqual(rj.done, {dst: (st.st_size, st.st_mtime_ns)})
+        self.assertEqual(rj.partial, dict())
+        rj.close(finished=True)
+
+    def test_resume_work(self):
+        """ test resumed COPY work continues in the same dir and skips copied files """
+        def copy_work(resume, sub_name='DAY1', prefix='COPY'):
+            cw = xCopyU(source_base_dir=self.src, log_level=logging.ERROR, destination_base_dir=self.dst,
+                        destination_subdir=sub_name, prefix=prefix, new_folder_rule=incRule(), resume=resume)
+            return cw
+
+        cw = copy_work(False)
+        first = str(cw.destination_folder)
+        # work without resume doesn't keep journal
+        self.assertIsNone(cw._run_journal)
+        # stopped work: two files are copied and in journal, b.txt is changed in source since
+        os.makedirs(first, exist_ok=True)
+        rj = runJournal(first, self.src)
+        dst_a, dst_b = os.path.join(first, 'a.txt'), os.path.join(first, 'b.txt')
+        for dst in [dst_a, dst_b]:
+            with open(dst, 'w') as f:
+                f.write('copied before')
+            st = os.stat(os.path.join(self.src, os.path.basename(dst)))
+            rj.copied(dst, st.st_size, st.st_mtime_ns)
+        rj.close()
+        cw.close_log()
+        with open(os.path.join(self.src, 'b.txt'), 'ab') as f:
+            f.write(b'changed')
+
+        cw = copy_work(False)
+        self.assertNotEqual(str(cw.destination_folder), first)
+        cw.close_log()
+
+        # work of other prefix is not continued
+        cw = copy_work(True, prefix='OTHER')
+        self.assertNotEqual(str(cw.destination_folder), first)
+        cw.close_log()
+
+        # next day work has other dated name
+        cw = copy_work(True, 'DAY2')
+        self.assertEqual(str(cw.destination_folder), first)
+        cw.run()
+        cw.close_log()
+        self.assertEqual(cw._cnt_error, 0)
+        self.assertEqual(cw._resume_skipped, 1)
+        with open(dst_a) as f:
+            self.assertEqual(f.read(), 'copied before')
+        for name in self._files():
+            if name != 'a.txt':
+                self.assertTrue(filecmp.cmp(os.path.join(self.src, name), os.path.join(first, name), shallow=False))
+        self.assertFalse(os.path.exists(os.path.join(first, RUN_JOURNAL_NAME)))
@@ -0,0 +1,74 @@
+import logging
+import tempfile
+import threading
+import time
+from shutil import rmtree
+from unittest import TestCase, skipUnless
+
+from cmdl_backupu.actions import xBackupU, backup_types
+from cmdl_backupu.new_folder import *
+from cmdl_backupu.watch import *
+
+
+@skipUnless(inotify_supported(), 'inotify is not supported')
+class TestWatch(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, 'src')
+        self.dst = os.path.join(self.tmp, 'dst')
+        os.mkdir(self.dst)
+        for d in ['', 'a']:
+            os.makedirs(os.path.join(self.src, d), exist_ok=True)
+            for i in range(3):
+                with open(os.path.join(self.src, d, 'f{}.txt'.format(i)), 'w') as f:
+                    f.write(str(i))
+        self.journal = os.path.join(self.tmp, 'src.journal')
+
+        self.stop = threading.Event()
+        self.watcher = inotifyWatcher(source=self.src, journal_file=self.journal)
+        self.thread = threading.Thread(target=self.watcher.run, kwargs={'stop': self.stop, 'timeout': 0.05})
+        self.thread.start()
+        self.assertTrue(self.watcher.ready.wait(5))
+
+    def tearDown(self):
+        self.stop.set()
+        self.thread.join()
+        rmtree(self.tmp)
+
+    def _backup(self, backup_type):
+        cw = xBackupU(source_base_dir=self.src, log_level=logging.INFO, prefix=backup_type.name,
+                      destination_base_dir=self.dst, destination_subdir='BACKUP', backup_type=backup_type,
+                      new_folder_rule=incRule(), journal=self.journal)
+        files = sorted(os.path.relpath(f[0], self.src) for f in cw.run())
+        cw.close_log()
+        return files
+
+    def test_inc_backup_from_journal(self):
+        """ test INC backup takes changed files from journal, falls back to full scan if events are lost  """
+        self.assertEqual(len(self._backup(backup_types.FULL)), 6)
+        self.assertEqual(changeJournal(self.journal).read(self.src), list())
+
+        changed = os.path.join(self.src, 'a', 'f1.txt')
+        st = os.stat(changed)
+        with open(changed, 'w') as f:
+            f.write('changed')
+        # copied in with old change date - found by journal, not by date
+        os.utime(changed, ns=(st.st_atime_ns, st.st_mtime_ns - 10 ** 12))
+        with open(os.path.join(self.src, 'new.txt'), 'w') as f:
+            f.write('new')
+        os.remove(os.path.join(self.src, 'f0.txt'))
+        os.makedirs(os.path.join(self.src, 'n'))
+        with open(os.path.join(self.src, 'n', 'x.txt'), 'w') as f:
+            f.write('x')
+        time.sleep(0.5)
+
+        self.assertEqual(self._backup(backup_types.INC), [os.path.join('a', 'f1.txt'), os.path.join('n', 'x.txt'),
+                                                           'new.txt'])
+        self.assertEqual(self._backup(backup_types.INC), list())
+
+        with open(self.journal, 'a') as f:
+            f.write('O\n')
+        journal = changeJournal(self.journal)
+        self.assertIsNone(journal.read(self.src))
+        self.assertEqual(journal.reason, 'events lost by watcher')
@@ -1,4 +1,7 @@
 import logging
+import sqlite3
+import tempfile
+import time
 from shutil import rmtree
 from unittest import TestCase
 
@@ -47,6 +50,22 @@ class TestXCopyU(TestCase):
         files = xi.run()
         self.assertTrue(len(files) > 0)
 
+    def test_stream_run(self):
+        filters = [filterFileExt(color=filter_color.WHITE, rule=r'py'),
+                   filterFileExt(color=filter_color.BLACK, rule=r'pyc')]
+
+        cw = xCopyU(source_base_dir=str(Path('..')), log_level=logging.INFO, prefix='STREAM',
+                    destination_base_dir=self.base_folder, destination_subdir='TEST',
+                    scan_filters=filters, new_folder_rule=incRule())
+
+        cw.run(stream=True)
+        cw.close_log()
+
+        xi = xInfoU(source_base_dir=str(cw.destination_folder), log_level=logging.ERROR,
+                    scan_filters=[filterFileExt(color=filter_color.WHITE, rule=r'py')])
+        files = xi.run()
+        self.assertTrue(len(files) > 0)
+
     def test_ziprun(self):
         filters = [filterFileExt(color=filter_color.WHITE, rule=r'txt'),
                    filterFileExt(color=filter_color.WHITE, rule=r'py'),
@@ -68,3 +87,78 @@ class TestXCopyU(TestCase):
                     scan_filters=[filterFileExt(color=filter_color.WHITE, rule=r'zip')])
         files = xi.run()
         self.assertTrue(len(files) > 0)
+
+    def test_threads_run(self):
+        filters = [filterFileExt(color=filter_color.WHITE, rule=r'py'),
+                   filterFileExt(color=filter_color.BLACK, rule=r'pyc')]
+
+        for stream in [False, True]:
+            cw = xCopyU(source_base_dir=str(Path('..')), log_level=logging.INFO, prefix='THREADS',
+                        destination_base_dir=self.base_folder, destination_subdir='TEST',
+                        scan_filters=filters, new_folder_rule=incRule(), copy_threads=4)
+            done = list()
+            cw._post_work_action = done.append
+
+            cw.run(stream=stream)
+            cw.close_log()
+
+            copied = sorted(str(p.relative_to(cw.destination_folder)) for p in cw.destination_folder.rglob('*')
+                            if p.is_file() and p.name != 'COPY.log')
+            self.assertEqual(copied, sorted(str(Path(p).relative_to('..')) for p in done))
+            self.assertEqual(cw._cnt_error, 0)
+
+            # errors are counted, post work action - only for copied files
+            done.clear()
+            src = sorted(Path('.').glob('*.py'))[:3]
+            pairs = [(str(p), str(Path(cw.destination_folder).joinpath('x_' + p.name))) for p in src]
+            pairs.insert(1, (str(Path('not_exists.py')), str(Path(cw.destination_folder).joinpath('not_exists.py'))))
+            cw._do_copy(pairs)
+            self.assertEqual(cw._cnt_error, 1)
+            self.assertEqual(done, [str(p) for p in src])
+
+    def test_skip_unchanged(self):
+        src = tempfile.mkdtemp()
+        index_dir = tempfile.mkdtemp()
+        try:
+            for name in ['a.txt', 'b.txt', os.path.join('sub', 'c.txt')]:
+                os.makedirs(os.path.dirname(os.path.join(src, name)), exist_ok=True)
+                with open(os.path.join(src, name), 'w') as f:
+                    f.write(name)
+            # dirs are not changed just now - their listings are trusted by scan index
+            for d in [src, os.path.join(src, 'sub')]:
+                os.utime(d, (time.time() - 60, time.time() - 60))
+
+            # with scan index: b.txt is changed in place, its dir is not changed
+            for stream, scan_index in [(False, ''), (True, ''), (False, os.path.join(index_dir, 'index.db'))]:
+                def run():
+                    cw = xCopyU(source_base_dir=src, log_level=logging.ERROR,
+                                prefix='SKIP{0}{1}'.format(stream, bool(scan_index)),
+                                destination_base_dir=self.base_folder, destination_subdir='TEST',
+                                new_folder_rule=exsistOKRule(), skip_unchanged=True, scan_index=scan_index)
+                    done = list()
+                    cw._post_work_action = done.append
+                    cw.run(stream=stream)
+                    cw.close_log()
+                    return cw, sorted(os.path.relpath(p, src) for p in done)
+
+                cw, copied = run()
+                self.assertEqual(copied, ['a.txt', 'b.txt', os.path.join('sub', 'c.txt')])
+                self.assertEqual(cw._quick_check.skipped, 0)
+
+                cw, copied = run()
+                self.assertEqual(copied, [])
+                self.assertEqual(cw._quick_check.skipped, 3)
+
+                with open(os.path.join(src, 'b.txt'), 'a') as f:
+                    f.write('changed')
+                cw, copied = run()
+                self.assertEqual(copied, ['b.txt'])
+                self.assertEqual((cw._quick_check.checked, cw._quick_check.skipped), (3, 2))
+                self.assertEqual(cw._quick_check.skipped_size, len('a.txt') + len(os.path.join('sub', 'c.txt')))
+                if scan_index:
+                    # index file is closed by close_log
+                    with self.assertRaises(sqlite3.ProgrammingError):
+                        cw._scan.index.get(src, 0)
+        finally:
+            rmtree(src)
+            rmtree(index_dir)
@@ -1,3 +1,7 @@
+import json
+import tempfile
+import time
+from shutil import rmtree
 from unittest import TestCase
 
 from cmdl_backupu.actions import set_archive_sttrib
@@ -138,3 +142,328 @@ class TestXScan(TestCase):
         bB = self.xScan.size(filtered=True) != 0  # file __init__.py changed 2020-01-28
 
         self.assertTrue(bW and bB)
+
+    def test_scan_engines(self):
+        """ test scandir scan engine make the same file list as os.walk engine  """
+        _walk = xScan(engine=scan_engine.WALK).scan()
+        _scandir = xScan(engine=scan_engine.SCANDIR).scan()
+        self.assertEqual([f['path'] for f in _walk], [f['path'] for f in _scandir])
+        self.assertEqual([(f['size'], f['ext'], f['name']) for f in _walk],
+                         [(f['size'], f['ext'], f['name']) for f in _scandir])
+        # scandir engine make compact fileRecord objects with the same keys and values as file_info() dicts
+        self.assertIsInstance(_scandir[0], fileRecord)
+        self.assertEqual(_walk, _scandir)
+        self.assertEqual(dict(_scandir[0]), file_info(_scandir[0]['path']))
+
+    def test_iter_files(self):
+        """ test streaming scan yield the same filtered files as scan + files(filtered=True)  """
+        sc = xScan()
+        sc.set_filters(filterFileExt(color=filter_color.WHITE, rule=r'py'),
+                       filterFileExt(color=filter_color.WHITE, rule=r'txt'),
+                       filterFileExt(color=filter_color.BLACK, rule=r'pyc'),
+                       filterFileName(color=filter_color.BLACK, rule=r'__init__'))
+        sc.scan()
+        _streamed = list(sc.iter_files(filtered=True))
+        self.assertTrue(len(_streamed) > 0)
+        self.assertEqual(sorted(f['path'] for f in _streamed), sorted(f['path'] for f in sc.files(filtered=True)))
+        self.assertEqual(sc.stream_stats[0], sc.size(filtered=False))
+
+    def test_scan_parallel(self):
+        """ test parallel scan engine make the same file list in the same order as scandir engine  """
+        _scandir = xScan(engine=scan_engine.SCANDIR).scan()
+        _parallel = xScan(engine=scan_engine.PARALLEL, threads=4).scan()
+        self.assertEqual([f['path'] for f in _scandir], [f['path'] for f in _parallel])
+
+    def test_parallel_walk_bounded(self):
+        """ test parallel walk lists only a few dirs ahead of yielded ones, in the order of records_walk  """
+        tmp = tempfile.mkdtemp()
+        try:
+            for i in range(100):
+                os.makedirs(os.path.join(tmp, 'd{:03}'.format(i), 'sub'))
+                with open(os.path.join(tmp, 'd{:03}'.format(i), 'sub', 'f.txt'), 'w') as f:
+                    f.write(str(i))
+            calls = list()
+
+            def read(path):
+                calls.append(path)
+                return read_dir(path)
+
+            walk = parallel_records_walk(tmp, read=read, threads=2)
+            first = [next(walk) for _ in range(3)]
+            time.sleep(0.2)
+            self.assertLessEqual(len(calls), 3 + 2 * SCAN_QUEUE_PER_THREAD)
+            self.assertEqual([r.path for records in first + list(walk) for r in records],
+                             [r.path for records in records_walk(tmp) for r in records])
+            self.assertEqual(len(calls), 201)
+        finally:
+            rmtree(tmp)
+
+    def test_scan_prune_dirs(self):
+        """ test BLACK dir filters prune subtrees while walking, filtered result is the same  """
+        self.assertTrue(re_prefix_stable(r'\.git'))
+        self.assertTrue(re_prefix_stable(r'@Recycle\b'))
+        self.assertFalse(re_prefix_stable(r'\.git$'))
+        self.assertFalse(re_prefix_stable(r'\.git(?!hub)'))
+
+        tmp = tempfile.mkdtemp()
+        try:
+            for d in ['src', os.path.join('src', '.git', 'objects'), '@Recycle', 'docs']:
+                os.makedirs(os.path.join(tmp, d), exist_ok=True)
+                for n in ['a.py', 'b.txt']:
+                    with open(os.path.join(tmp, d, n), 'w') as f:
+                        f.write(n)
+
+            results = dict()
+            for prune in [True, False]:
+                sc = xScan(start_path=tmp, prune=prune)
+                sc.set_filters(filterFilePath(color=filter_color.BLACK, rule=r'\.git'),
+                               filterDirName(color=filter_color.BLACK, rule=r'@Recycle'),
+                               filterFilePath(color=filter_color.BLACK, rule=r'docs$'))
+                sc.scan()
+                results[prune] = sorted(f['path'] for f in sc.files(filtered=True))
+                if prune:
+                    self.assertEqual(sorted(os.path.basename(d) for d in sc.pruned_dirs), ['.git', '@Recycle'])
+                    self.assertEqual(sc.size(filtered=False), 4)
+
+            self.assertEqual(results[True], results[False])
+            self.assertEqual(len(results[True]), 4)
+        finally:
+            rmtree(tmp)
+
+    def test_scan_index(self):
+        """ test scan with persistent index: unchanged dirs are taken from index, changed dirs are listed again  """
+        tmp = tempfile.mkdtemp()
+        try:
+            src = os.path.join(tmp, 'src')
+            for d in ['', 'a', os.path.join('a', 'b'), 'c']:
+                os.makedirs(os.path.join(src, d), exist_ok=True)
+                for n in ['x.py', 'y.txt']:
+                    with open(os.path.join(src, d, n), 'w') as f:
+                        f.write(n)
+            # dirs changed just before listing are not trusted - make them old
+            for d in ['', 'a', os.path.join('a', 'b'), 'c']:
+                os.utime(os.path.join(src, d), (1e9, 1e9))
+
+            index_file = os.path.join(tmp, 'scan.index')
+            _ref = xScan(start_path=src).scan()
+
+            for engine in [scan_engine.SCANDIR, scan_engine.PARALLEL]:
+                index = scanIndex(index_file)
+                sc = xScan(start_path=src, engine=engine, index=index)
+                self.assertEqual(sc.scan(), _ref)
+                self.assertEqual(sc.scan(), _ref)
+                self.assertEqual(index.last_hits, 4)
+                self.assertEqual(index.last_misses, 0)
+                index.close()
+
+            with open(os.path.join(src, 'c', 'z.py'), 'w') as f:
+                f.write('z')
+            index = scanIndex(index_file, verify_files=True)
+            sc = xScan(start_path=src, index=index)
+            self.assertEqual(sc.scan(), xScan(start_path=src).scan())
+            self.assertEqual(index.last_misses, 1)
+            self.assertIn(os.path.join(src, 'c', 'z.py'), [f['path'] for f in sc.files()])
+            index.close()
+
+            # other source in the same index file - listings of one are kept by scan of other
+            other = os.path.join(tmp, 'src2')
+            os.makedirs(os.path.join(other, 'd'))
+            for d in [other, os.path.join(other, 'd'), os.path.join(src, 'c')]:
+                os.utime(d, (1e9, 1e9))
+            index = scanIndex(index_file)
+            for path, hits in [(other, 0), (src, 3), (other, 2), (src, 4)]:
+                xScan(start_path=path, index=index).scan()
+                self.assertEqual(index.last_hits, hits, path)
+            index.close()
+        finally:
+            rmtree(tmp)
+
+    def test_scan_lazy_stat(self):
+        """ test files are stat-ed only when filters need it: name filters first, stat data for passed files only  """
+        filters = [filterFileExt(color=filter_color.WHITE, rule=r'py'),
+                   filterFileSize(color=filter_color.BLACK, low_level=10 ** 9)]
+        _eager = xScan()
+        _eager.set_filters(*filters)
+        _eager.scan()
+        self.assertFalse(_eager.lazy_stat)
+
+        sc = xScan(need_fields=('path',))
+        sc.set_filters(*filters)
+        _all = sc.scan()
+        self.assertTrue(sc.lazy_stat)
+        self.assertEqual(sc.files(filtered=True), _eager.files(filtered=True))
+        self.assertEqual([f['path'] for f in _all], [f['path'] for f in _eager.files()])
+
+        _passed = {f['path'] for f in sc.files(filtered=True)}
+        for f in _all:
+            self.assertEqual(f.loaded, f['path'] in _passed)
+
+        # size filter by numpy columns - columns only of files passed ext filter
+        tmp = tempfile.mkdtemp()
+        try:
+            for i in range(40):
+                with open(os.path.join(tmp, 'f{0}.{1}'.format(i, 'py' if i % 8 == 0 else 'txt')), 'w') as f:
+                    f.write('x' * i)
+            vsc = xScan(start_path=tmp, need_fields=('path',))
+            vsc.set_filters(*filters)
+            vsc._vector_min_files = 0
+            _files = vsc.scan()
+            self.assertEqual(len(vsc.files(filtered=True)), 5)
+            self.assertEqual(sum(f.loaded for f in _files), 5)
+        finally:
+            rmtree(tmp)
+
+        _streamed = list(sc.iter_files(filtered=True))
+        self.assertEqual([f['path'] for f in _streamed], [f['path'] for f in sc.files(filtered=True)])
+        self.assertEqual(sc.stream_stats, (len(_all), None))
+
+        # only filters on stat data - stat all files while walking
+        sc.set_filters(filterFileSize(color=filter_color.BLACK, low_level=10 ** 9))
+        sc.scan()
+        self.assertFalse(sc.lazy_stat)
+
+    def test_filter_plan_parity(self):
+        """ test one pass filters plan select the same files as cascade of filters on random filters sets  """
+        import random
+        from cmdl_backupu.bench import make_tree
+
+        tmp = tempfile.mkdtemp()
+        try:
+            make_tree(tmp, depth=2, fanout=3, files_in_dir=30, max_size=2048)
+            sc = xScan(start_path=tmp)
+            files = sc.scan()
+            lsc = xScan(start_path=tmp, need_fields=('path',))
+            lsc._vector_min_files = 0
+            mid_date = sorted(f['change_date'] for f in files)[len(files) // 2]
+
+            def pool():
+                return [filterFileExt(color=c, rule=r) for c in filter_color for r in ['py', 'txt|csv', 'x']] + \
+                       [filterFileName(color=c, rule=r, case=string_case.ANY) for c in filter_color
+                        for r in ['FILE_1', r'_\d$']] + \
+                       [filterFilePath(color=c, rule=r) for c in filter_color for r in ['dir_0_1', r'dir_1_\d']] + \
+                       [filterDirName(color=c, rule=r) for c in filter_color for r in ['dir_0_2', r'dir_1_0$']] + \
+                       [filterFileSize(color=c, low_level=lo, high_level=hi) for c in filter_color
+                        for lo, hi in [(0, 500), (1000, 1e19)]] + \
+                       [filterFileDateRange(color=c, low_date=mid_date) for c in filter_color]
+
+            rnd = random.Random(5)
+            for _ in range(150):
+                filters = rnd.sample(pool(), rnd.randint(1, 8))
+                sc.set_filters(*filters)
+                sc._vector_min_files = rnd.choice([0, 10 ** 9])  # size and date filters by columns or by files
+                _plan = sc.files(filtered=True)
+                _cascade = sc._filtered_files_cascade()
+                self.assertEqual(sorted(f['path'] for f in _plan), sorted(f['path'] for f in _cascade),
+                                 [str(f) for f in filters])
+                _passed = {f['path'] for f in _plan}
+                self.assertEqual([f['path'] for f in _plan], [f['path'] for f in files if f['path'] in _passed])
+
+                # lazy stat: columns of files passed stat free filters
+                lsc.set_filters(*filters)
+                lsc.scan()
+                self.assertEqual([f['path'] for f in lsc.files(filtered=True)], [f['path'] for f in _plan],
+                                 [str(f) for f in filters])
+
+            # columns check of every file on range margins is the same as file check
+            columns = file_columns(files)
+            for f in [filterFileDateRange(color=c, low_date=files[i]['change_date'],
+                                          high_date=files[i + 1]['change_date'], left_margin=lm, right_margin=rm)
+                      for c in filter_color for lm in [True, False] for rm in [True, False] for i in range(0, 40, 7)] + \
+                     [filterFileSize(color=filter_color.BLACK, low_level=100, high_level=files[3]['size'])]:
+                self.assertEqual(list(f.mask(columns)), [f.s_check(x) for x in files], str(f))
+
+            # plan order checks: stat free first, after sample - the most selective first
+            plan = filterPlan([filterFileSize(color=filter_color.BLACK, low_level=0, high_level=500),
+                               filterFileExt(color=filter_color.WHITE, rule='x'),
+                               filterFileExt(color=filter_color.BLACK, rule='py')])
+            self.assertFalse(stat_free(plan.groups[-1][0]))
+            plan.filter(files * (PLAN_SAMPLE_SIZE // len(files) + 1))
+            self.assertEqual(plan.groups[0][0].rule, 'x')
+        finally:
+            rmtree(tmp)
+
+    def test_filter_fusion(self):
+        """ test re filters of the same class, color and case are fused in one filter with the same result """
+        ext_w = [filterFileExt(color=filter_color.WHITE, rule=r) for r in ['py', 'txt', '^csv$']]
+        ext_b = [filterFileExt(color=filter_color.BLACK, rule=r) for r in ['^tmp$', '^lnk$']]
+        name_b = [filterFileName(color=filter_color.BLACK, rule=r) for r in ['_1', r'(\d)\1', '(?i)x', 'y$']]
+        red = [filterFileExt(color=filter_color.RED, rule=r) for r in ['p', 'y']]
+        filters = ext_w + ext_b + name_b + red
+
+        fused = fuse_filters(filters)
+        self.assertEqual(len(fused), 1 + 1 + 3 + 2)
+        self.assertEqual(fused[0].fused, ext_w)
+        self.assertIsNone(fused[0]._literals)
+        self.assertEqual(fused[1]._literals, frozenset(['tmp', 'lnk']))
+        self.assertEqual(fused[2].fused, [name_b[0], name_b[3]])
+        self.assertTrue(all(f in fused for f in name_b[1:3] + red))
+
+        for ext in ['py', 'pyc', 'txt', 'csv', 'csvx', 'tmp', 'tmpx', 'lnk', 'sqlite', '']:
+            self.assertEqual(fused[0].s_check({'ext': ext}), any(f.s_check({'ext': ext}) for f in ext_w), ext)
+            self.assertEqual(fused[1].s_check({'ext': ext}), all(f.s_check({'ext': ext}) for f in ext_b), ext)
+
+        for path in ['/a/file_1.py', '/a/file_11.py', '/a/X.py', '/a/file_2.py', '/a/y.py']:
+            item = {'path': path, 'name': Path(path).stem}
+            self.assertEqual(all(f.s_check(item) for f in fused if f.type == filter_type.FILE and
+                                 f.subtype == filter_subtype.NAME),
+                             all(f.s_check(item) for f in name_b), path)
+
+        sc = self.xScan
+        sc.set_filters(*filters)
+        self.assertEqual(sorted(f['path'] for f in sc.files(filtered=True)),
+                         sorted(f['path'] for f in sc._filtered_files_cascade()))
+
+    def test_filter_dir_memo(self):
+        """ test filters on dir and path check dir once for all its files with the same result as by file """
+        files = self.xScan.files()
+        dirs = {os.path.dirname(f['path']) for f in files}
+        for cls, rule in [(filterDirName, 'cmdl'), (filterDirName, r'\w$'), (filterFilePath, 'cmdl'),
+                          (filterFilePath, r'test_\w+\.py$'), (filterFilePath, r'\B'), (filterFilePath, '_')]:
+            for color in filter_color:
+                f = cls(color=color, rule=rule)
+                f.BasePath = self.xScan.base_path
+                self.assertEqual([f.s_check(x) for x in files], [f.check(x['path']) for x in files],
+                                 str(f))
+                self.assertLessEqual(len(f._dir_memo), len(dirs))
+
+    def test_filter_stats(self):
+        """ test counters of filters: every file is rejected once, counted filters give the same result """
+        files = self.xScan.files()
+        sc = xScan(start_path=self.xScan.base_path, filter_stats=True)
+        sc.scan()
+        for min_files in [0, 10 ** 9]:
+            filters = [filterFileExt(color=filter_color.WHITE, rule='py'),
+                       filterFileName(color=filter_color.BLACK, rule='test_'),
+                       filterFileSize(color=filter_color.WHITE, low_level=100)]
+            sc.set_filters(*filters)
+            sc._vector_min_files = min_files
+            passed = sc.files(filtered=True)
+            self.assertEqual(sorted(f['path'] for f in passed),
+                             sorted(f['path'] for f in sc._filtered_files_cascade()))
+            for f in filters:
+                self.assertEqual(f.passes + f.rejects, f.evaluations, str(f))
+            self.assertEqual(len(passed), len(files) - sum(f.rejects for f in filters))
+            self.assertEqual(max(f.evaluations for f in filters), len(files))
+
+        tmp = tempfile.mkdtemp()
+        try:
+            save_filters_stats(filters, os.path.join(tmp, 'stats.json'))
+            with open(os.path.join(tmp, 'stats.json')) as f:
+                stats = json.load(f)
+            self.assertEqual([st['filter'] for st in stats], [str(f) for f in filters])
+            self.assertEqual([st['rejects'] for st in stats], [f.rejects for f in filters])
+            self.assertAlmostEqual(sum(st['reject_share'] for st in stats), 1)
+        finally:
+            rmtree(tmp)
+
+    def test_record_rel_path(self):
+        """ test scan records keep file path relative to base path - the same as path slicing """
+        for base in [str(Path('..')), os.path.abspath('..')]:
+            for engine in [scan_engine.SCANDIR, scan_engine.PARALLEL]:
+                for need_fields in [tuple(FILE_INFO), ('path',)]:
+                    sc = xScan(start_path=base, engine=engine, need_fields=need_fields)
+                    files = sc.scan()
+                    self.assertEqual([f.rel_to(base) for f in files], [f['path'][len(base) + 1:] for f in files])
+                    self.assertEqual([f['name'] for f in files], [Path(f['path']).stem for f in files])
+            self.assertIsNone(xScan(start_path=base).scan()[0].rel_to(base + 'x'))
+        self.assertIsNone(xScan(start_path=os.path.join('..', '')).scan()[0].rel_to(os.path.join('..', '')))
@@ -0,0 +1,40 @@
+import os
+import random
+import tempfile
+from shutil import rmtree
+from unittest import TestCase
+
+
+class sourceTreeCase(TestCase):
+    """
+    base of tests with source tree of random files: data of files is made once for class, src (with files) and empty
+    dst dirs are made in temp dir for every test
+    """
+    # source files: (path with '/' delimiter, size in bytes)
+    tree_files = list()
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(1)
+        cls.tree_data = [(name, rnd.getrandbits(8 * size).to_bytes(size, 'little')) for name, size in cls.tree_files]
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, 'src')
+        self.dst = os.path.join(self.tmp, 'dst')
+        os.makedirs(self.src)
+        os.mkdir(self.dst)
+        for name, data in self.tree_data:
+            path = os.path.join(self.src, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        rmtree(self.tmp)
+
+    def _files(self) -> list:
+        """
+        :return: list of str - paths of source files relative to src
+        """
+        return [os.path.relpath(os.path.join(d, f), self.src) for d, _, files in os.walk(self.src) for f in files]
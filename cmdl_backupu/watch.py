@@ -0,0 +1,313 @@
+"""
+Change journal of source dir for incremental backup without full scan - Linux only (inotify)
+
+    inotifyWatcher - watch source dir tree (inotify, by ctypes) and write to journal file paths of created, changed
+                     and deleted files; run as long-lived process (backupu --watch)
+    changeJournal - read journal: paths of files changed after last backup - xBackupU INC takes work list from it
+                    instead of scanning all source; position of last backup is kept in <journal>.pos file
+
+journal is text file, one line for every event:
+    S <pid> <time_ns> <source> - start mark: first line, watcher process id - journal is valid while it is alive
+    C <path> - file created or changed
+    D <path> - file or dir deleted (or moved out)
+    O - events are lost (inotify queue overflow, no more watches) - next backup must scan all source
+
+Journal can not be used (and backup scan all source) if it is missing, watcher is not running, watcher was
+restarted or journal was rotated twice after last backup, events were lost
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import platform
+import select
+import struct
+import threading
+import time
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+_EVENT = struct.Struct('iIII')
+
+# journal size (bytes) for rotation: journal is renamed to <journal>.1 and new journal is started
+JOURNAL_MAX_SIZE = 64 * 1024 ** 2
+
+JOURNAL_START, JOURNAL_CHANGED, JOURNAL_DELETED, JOURNAL_OVERFLOW = 'S', 'C', 'D', 'O'
+
+
+def inotify_supported() -> bool:
+    return platform.system() == 'Linux' and hasattr(_libc(), 'inotify_init1')
+
+
+def _libc():
+    return ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class inotifyWatcher:
+    """
+    watch source dir tree with inotify and write changes to journal file;
+    on start old journal is deleted - journal is valid only from watcher start
+    """
+
+    def __init__(self, source: str, journal_file: str, max_journal_size: int = JOURNAL_MAX_SIZE):
+        """
+        :param source: str or pathlike - source dir
+        :param journal_file: str or pathlike - journal file
+        :param max_journal_size: int - journal size in bytes for rotation
+        """
+        assert os.path.isdir(source), 'source dir must exists'
+        self._source = os.path.abspath(str(source))
+        self._journal_file = os.path.abspath(str(journal_file))
+        self._max_size = max_journal_size
+        self._own_files = {self._journal_file, self._journal_file + '.1', self._journal_file + '.pos',
+                           self._journal_file + '.pos.tmp'}
+        self._wds = dict()
+        self._fd = -1
+        self._journal = None
+        self.ready = threading.Event()
+
+    @property
+    def journal_file(self) -> str:
+        return self._journal_file
+
+    def _start_journal(self):
+        self._journal = open(self._journal_file, 'w', encoding='utf-8', errors='surrogateescape')
+        self._journal.write('{0} {1} {2} {3}\n'.format(JOURNAL_START, os.getpid(), time.time_ns(), self._source))
+        self._journal.flush()
+
+    def _write(self, op: str, path: str = ''):
+        if path in self._own_files:
+            return
+        if '\n' in path:
+            op, path = JOURNAL_OVERFLOW, ''
+        self._journal.write('{0} {1}\n'.format(op, path) if path else op + '\n')
+
+    def _add_watch(self, path: str):
+        wd = self._inotify.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err not in [errno.ENOENT, errno.ENOTDIR, errno.EACCES]:
+                # no more watches (ENOSPC) - changes in this dir will be lost
+                self._write(JOURNAL_OVERFLOW)
+            return
+        self._wds[wd] = path
+
+    def _add_tree(self, top: str, emit: bool):
+        for root, dirs, files in os.walk(top):
+            self._add_watch(root)
+            if emit:
+                for f in files:
+                    self._write(JOURNAL_CHANGED, os.path.join(root, f))
+
+    def _remove_tree(self, top: str):
+        prefix = os.path.join(top, '')
+        for wd, path in list(self._wds.items()):
+            if path == top or path.startswith(prefix):
+                self._inotify.inotify_rm_watch(self._fd, wd)
+                del self._wds[wd]
+
+    def _handle(self, data: bytes):
+        off = 0
+        while off < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, off)
+            name = os.fsdecode(data[off + _EVENT.size: off + _EVENT.size + length].rstrip(b'\0'))
+            off += _EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                self._write(JOURNAL_OVERFLOW)
+                continue
+            top = self._wds.get(wd)
+            if top is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._wds[wd]
+                continue
+            path = os.path.join(top, name) if name else top
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # files can be created in new dir before it is watched - write all of them
+                    self._add_tree(path, emit=True)
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    self._remove_tree(path)
+                    self._write(JOURNAL_DELETED, path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._write(JOURNAL_DELETED, path)
+            elif mask & (IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_TO):
+                self._write(JOURNAL_CHANGED, path)
+
+        self._journal.flush()
+        if self._journal.tell() > self._max_size:
+            self._journal.close()
+            os.replace(self._journal_file, self._journal_file + '.1')
+            self._start_journal()
+
+    def run(self, stop: threading.Event = None, timeout: float = 1.0):
+        """
+        watch source until stop is set (or forever - until KeyboardInterrupt)
+        :param stop: threading.Event or None
+        :param timeout: float - seconds between checks of stop
+        """
+        self._inotify = _libc()
+        self._fd = self._inotify.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        for f in [self._journal_file + '.1', self._journal_file]:
+            if os.path.exists(f):
+                os.remove(f)
+        self._start_journal()
+        try:
+            self._add_tree(self._source, emit=False)
+            self._journal.flush()
+            self.ready.set()
+            while stop is None or not stop.is_set():
+                if select.select([self._fd], [], [], timeout)[0]:
+                    self._handle(os.read(self._fd, 64 * 1024))
+        finally:
+            os.close(self._fd)
+            self._journal.close()
+            self._wds = dict()
+
+
+class changeJournal:
+    """
+    read changes from journal, written by inotifyWatcher, after last backup; save position of backup (commit)
+    """
+
+    def __init__(self, journal_file: str):
+        """
+        :param journal_file: str or pathlike - journal file
+        """
+        self._journal_file = os.path.abspath(str(journal_file))
+        self._pos_file = self._journal_file + '.pos'
+        self._end = None
+        self.reason = ''
+
+    @property
+    def journal_file(self) -> str:
+        return self._journal_file
+
+    @staticmethod
+    def _read_lines(path: str, offset: int) -> tuple:
+        """
+        :return: tuple (list of full lines from offset, offset after last full line)
+        """
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        lines = data[:end].decode('utf-8', errors='surrogateescape').split('\n')[:-1]
+        return lines, offset + end
+
+    @staticmethod
+    def _first_line(path: str) -> str:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                return f.readline().rstrip('\n')
+        except OSError:
+            return ''
+
+    def _load_pos(self):
+        try:
+            with open(self._pos_file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                marker, offset = f.read().split('\n')[:2]
+            return marker, int(offset)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, source: str):
+        """
+        read changes after last committed backup; position of journal end is kept for commit
+        :param source: str or pathlike - source dir (must be the same as watched)
+        :return: list of changed file (or new dir) paths or None - if journal can not be used (reason is in reason)
+        """
+        self._end = None
+        marker = self._first_line(self._journal_file)
+        if not marker:
+            self.reason = 'journal not found'
+            return None
+        parts = marker.split(' ', 3)
+        if parts[0] != JOURNAL_START or len(parts) < 4:
+            self.reason = 'no start mark in journal'
+            return None
+        if os.path.abspath(str(source)) != parts[3]:
+            self.reason = 'journal of other source dir {}'.format(parts[3])
+            return None
+        if not _alive(int(parts[1])):
+            self.reason = 'watcher is not running'
+            return None
+
+        pos = self._load_pos()
+        if pos is not None and pos[0] == marker:
+            lines, end = self._read_lines(self._journal_file, pos[1])
+        elif pos is not None and self._first_line(self._journal_file + '.1') == pos[0]:
+            lines = self._read_lines(self._journal_file + '.1', pos[1])[0]
+            new_lines, end = self._read_lines(self._journal_file, 0)
+            lines += new_lines
+        else:
+            self.reason = 'watcher restarted or journal rotated after last backup' if pos else \
+                'no position of last backup in journal'
+            lines, end = None, self._read_lines(self._journal_file, 0)[1]
+
+        if self._first_line(self._journal_file) != marker:
+            self.reason = 'journal rotated while reading'
+            return None
+        self._end = (marker, end)
+
+        if lines is None:
+            return None
+        changes = dict()
+        for line in lines:
+            op, path = line[:1], line[2:]
+            if op == JOURNAL_OVERFLOW:
+                self.reason = 'events lost by watcher'
+                return None
+            if op == JOURNAL_CHANGED:
+                changes[path] = True
+            elif op == JOURNAL_DELETED:
+                changes.pop(path, None)
+                prefix = os.path.join(path, '')
+                for p in [p for p in changes if p.startswith(prefix)]:
+                    del changes[p]
+        self.reason = ''
+        return list(changes)
+
+    def commit(self):
+        """
+        save journal position, read by last read() - backup is done, next backup takes changes after it
+        """
+        if self._end is None:
+            return
+        with open(self._pos_file + '.tmp', 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.write('{0}\n{1}\n'.format(*self._end))
+        os.replace(self._pos_file + '.tmp', self._pos_file)
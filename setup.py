@@ -27,5 +27,7 @@ setup(
     # install_requires=[
     #     're >= 2.2', 'pandas >= 0.22.0', 'argparse >=1.1', 'numpy>=1.1', 'python_dateutil>=2.5'
     # ],
+    # numpy is optional: size and date filters check all files at once (filters.filterPlan)
+    extras_require={'fast': ['numpy']},
     # python_requires='>=3.3'
 )
\ No newline at end of file